@@ -0,0 +1,126 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.perft import run_perft
+from chess.game.selfplay import run_selfplay
+import argparse
+import json
+import platform
+import random
+import time
+
+def sample_positions(n_positions: int, seed=0, max_plies=80):
+    # move code sequences reaching varied positions by seeded random play, replayable on any Board class
+    rng = random.Random(seed)
+    sequences = []
+    while len(sequences) < n_positions:
+        board = BitBoard(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+        codes = []
+        for _ in range(rng.randrange(max_plies)):
+            player = board.get_player(board.turn)
+            moves = board.get_legal_moves(player)
+            if not moves or board.is_draw():
+                break
+            piece, move = rng.choice(sorted(moves, key=lambda x: (x[0].position, x[1])))
+            board.make_move(player, piece, move)
+            codes.append(board.last_move_code())
+        sequences.append(codes)
+    return sequences
+
+def build_boards(board_class: type[Board], sequences):
+    boards = []
+    for codes in sequences:
+        # no action cache, every call below has to really generate
+        board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False, action_cache_size=0)
+        for code in codes:
+            board.make_move_code(code)
+        boards.append(board)
+    return boards
+
+def time_calls(fn, boards, repeat):
+    time_start = time.perf_counter()
+    n_calls = 0
+    for _ in range(repeat):
+        for board in boards:
+            n_calls += fn(board)
+    seconds = time.perf_counter() - time_start
+    return {'calls': n_calls, 'seconds': seconds, 'usec_per_call': 1e6 * seconds / n_calls if n_calls else 0.0}
+
+def bench_get_valid_actions(board: Board):
+    board.get_valid_actions(board.get_player(board.turn))
+    return 1
+
+def bench_move(board: Board):
+    # validated move + unmake for every legal move of the side to move
+    player = board.get_player(board.turn)
+    moves = board.get_legal_moves(player)
+    for piece, move in moves:
+        board.move(player, piece, move)
+        board.unmake_move()
+    return len(moves)
+
+def bench_has_checkmated(board: Board):
+    board.has_checkmated(board.get_opp_player(board.get_player(board.turn)))
+    return 1
+
+def run_benchmarks(board_classes, n_positions=40, repeat=3, perft_depth=3, n_games=4, seed=0):
+    sequences = sample_positions(n_positions, seed)
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'timestamp': time.time(),
+            'n_positions': n_positions,
+            'seed': seed
+        }
+    }
+    for board_class in board_classes:
+        boards = build_boards(board_class, sequences)
+        perft_results = run_perft(board_class, perft_depth)
+        game_results = list(run_selfplay(n_games, n_workers=1, seed=seed, board_class=board_class, max_turns=300))
+        game_seconds = sum(result['seconds'] for result in game_results)
+        game_plies = sum(result['n_turns'] for result in game_results)
+        results[board_class.__name__] = {
+            'perft': perft_results,
+            'perft_ok': all(result['ok'] for result in perft_results),
+            'get_valid_actions': time_calls(bench_get_valid_actions, boards, repeat),
+            'move': time_calls(bench_move, boards, repeat),
+            'has_checkmated': time_calls(bench_has_checkmated, boards, repeat),
+            'selfplay': {
+                'games': len(game_results),
+                'plies': game_plies,
+                'seconds': game_seconds,
+                'plies_per_sec': game_plies / game_seconds if game_seconds else 0.0
+            }
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='time move generation and self-play, results are written as json')
+    parser.add_argument('--out', default='bench_output.json')
+    parser.add_argument('--board', choices=['bitboard', 'list', 'both'], default='both')
+    parser.add_argument('--positions', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--perft-depth', type=int, default=3)
+    parser.add_argument('--games', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    board_classes = {'bitboard': [BitBoard], 'list': [Board], 'both': [Board, BitBoard]}[args.board]
+    results = run_benchmarks(board_classes, args.positions, args.repeat, args.perft_depth, args.games, args.seed)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for board_class in board_classes:
+        result = results[board_class.__name__]
+        print(
+            f"{board_class.__name__:>8}: perft {'ok' if result['perft_ok'] else 'MISMATCH'} "
+            f"{result['perft'][-1]['nodes_per_sec']:.0f} nodes/sec | "
+            f"get_valid_actions {result['get_valid_actions']['usec_per_call']:.0f} us | "
+            f"move {result['move']['usec_per_call']:.1f} us | "
+            f"has_checkmated {result['has_checkmated']['usec_per_call']:.1f} us | "
+            f"self-play {result['selfplay']['plies_per_sec']:.0f} plies/sec"
+        )
+    print(f"results written to {args.out}")
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+class ActionCache:
+    """
+    LRU cache for generated actions, keyed by (Board.hash, color, kind).
+    The hash changes with every move/castle so entries are re-keyed implicitly and never need invalidation.
+    Values are stored by square rather than by Piece so transpositions with swapped identical pieces stay correct.
+    """
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        n_lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / n_lookups if n_lookups else 0.0,
+            'size': len(self.entries)
+        }
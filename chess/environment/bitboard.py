@@ -0,0 +1,343 @@
+from chess.environment.board import Board
+from chess.environment.piece import Piece, PieceType, piece_captured_score
+from chess.environment.player import Player
+from chess.environment.color import Color
+
+# squares are indexed rank major, sq = y * 8 + x for position (x, y), so A1 = 0, H1 = 7, A8 = 56
+FULL = (1 << 64) - 1
+SQUARE_POS = tuple((sq & 7, sq >> 3) for sq in range(64))
+
+def pos_to_square(pos: tuple[int, int]):
+    return pos[1] * 8 + pos[0]
+
+def iter_squares(bb: int):
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+def bitboard_to_moves(bb: int):
+    moves_out = []
+    while bb:
+        lsb = bb & -bb
+        moves_out.append(SQUARE_POS[lsb.bit_length() - 1])
+        bb ^= lsb
+    return moves_out
+
+def _step_table(steps):
+    table = []
+    for sq in range(64):
+        x, y = SQUARE_POS[sq]
+        bb = 0
+        for dx, dy in steps:
+            if 0 <= x + dx <= 7 and 0 <= y + dy <= 7:
+                bb |= 1 << pos_to_square((x + dx, y + dy))
+        table.append(bb)
+    return tuple(table)
+
+def _line_mask(sq, dx, dy):
+    # every square on the line through sq in direction (dx, dy), excluding sq itself
+    x, y = SQUARE_POS[sq]
+    bb = 0
+    for sign in (1, -1):
+        x_, y_ = x + sign * dx, y + sign * dy
+        while 0 <= x_ <= 7 and 0 <= y_ <= 7:
+            bb |= 1 << pos_to_square((x_, y_))
+            x_ += sign * dx
+            y_ += sign * dy
+    return bb
+
+def _first_rank_attacks():
+    # sliding attacks along a single rank for every slider file and 8 bit occupancy
+    table = []
+    for x in range(8):
+        row = []
+        for occ in range(256):
+            bb = 0
+            for step in (1, -1):
+                x_ = x + step
+                while 0 <= x_ <= 7:
+                    bb |= 1 << x_
+                    if occ & (1 << x_):
+                        break
+                    x_ += step
+            row.append(bb)
+        table.append(tuple(row))
+    return tuple(table)
+
+def _between_table():
+    # squares strictly between two squares sharing a rank, file or diagonal, 0 otherwise
+    table = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        x, y = SQUARE_POS[sq]
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)):
+            x_, y_, bb = x + dx, y + dy, 0
+            while 0 <= x_ <= 7 and 0 <= y_ <= 7:
+                table[sq][pos_to_square((x_, y_))] = bb
+                bb |= 1 << pos_to_square((x_, y_))
+                x_ += dx
+                y_ += dy
+    return tuple(tuple(row) for row in table)
+
+KNIGHT_ATTACKS = _step_table(((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)))
+KING_ATTACKS = _step_table(((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)))
+PAWN_ATTACKS = {
+    Color.WHITE: _step_table(((1, 1), (-1, 1))),
+    Color.BLACK: _step_table(((1, -1), (-1, -1)))
+}
+FILE_MASKS = tuple(_line_mask(sq, 0, 1) for sq in range(64))
+DIAG_MASKS = tuple(_line_mask(sq, 1, 1) for sq in range(64))
+ANTI_DIAG_MASKS = tuple(_line_mask(sq, 1, -1) for sq in range(64))
+FIRST_RANK_ATTACKS = _first_rank_attacks()
+BETWEEN = _between_table()
+PAWN_START_RANK = {Color.WHITE: 1, Color.BLACK: 6}
+
+def flip_vertical(bb: int):
+    return int.from_bytes((bb & FULL).to_bytes(8, 'little'), 'big')
+
+def line_attacks(occ: int, sq: int, mask: int):
+    # hyperbola quintessence, valid for masks holding at most one square per rank (files and diagonals)
+    o = occ & mask
+    s = 1 << sq
+    forward = o - 2 * s
+    reverse = flip_vertical(flip_vertical(o) - 2 * flip_vertical(s))
+    return (forward ^ reverse) & mask
+
+def rank_attacks(occ: int, sq: int):
+    shift = sq & 56
+    return FIRST_RANK_ATTACKS[sq & 7][(occ >> shift) & 0xFF] << shift
+
+def rook_attacks(occ: int, sq: int):
+    return line_attacks(occ, sq, FILE_MASKS[sq]) | rank_attacks(occ, sq)
+
+def bishop_attacks(occ: int, sq: int):
+    return line_attacks(occ, sq, DIAG_MASKS[sq]) | line_attacks(occ, sq, ANTI_DIAG_MASKS[sq])
+
+def queen_attacks(occ: int, sq: int):
+    return rook_attacks(occ, sq) | bishop_attacks(occ, sq)
+
+def piece_attacks(piece_type: PieceType, color: Color, sq: int, occ: int):
+    # squares attacked by a piece on sq, regardless of what occupies them
+    match piece_type:
+        case PieceType.PAWN:
+            return PAWN_ATTACKS[color][sq]
+        case PieceType.KNIGHT:
+            return KNIGHT_ATTACKS[sq]
+        case PieceType.KING:
+            return KING_ATTACKS[sq]
+        case PieceType.ROOK:
+            return rook_attacks(occ, sq)
+        case PieceType.BISHOP:
+            return bishop_attacks(occ, sq)
+        case PieceType.QUEEN:
+            return queen_attacks(occ, sq)
+
+def opp_color(color: Color):
+    return Color.BLACK if color == Color.WHITE else Color.WHITE
+
+
+class BitBoard(Board):
+    """
+    Board with 64 bit occupancy sets per color and per (color, piece type) kept in sync with the 8x8 grid.
+    Move generation is answered from precomputed step tables and sliding attack lookups,
+    the rest of the Board api (actions, move, castle, check detection) is unchanged.
+
+    Attacked squares are kept per occupied square and per side. Square writes only mark the square dirty,
+    the next attack query recomputes the dirty squares and the sliders whose rays cross them.
+    Legal moves are then filtered directly with checkers and pin rays instead of make/unmake per candidate.
+    """
+    def __init__(self, player_white: Player, player_black: Player, main_board=True, verbose=True, action_cache_size=4096):
+        self.occupancy = {Color.WHITE: 0, Color.BLACK: 0}
+        self.piece_bitboards = {color: {piece_type: 0 for piece_type in PieceType} for color in Color}
+        self.attacks_by_square = [0] * 64
+        self.attack_maps = {Color.WHITE: 0, Color.BLACK: 0}
+        self.dirty_squares = 0
+        super().__init__(player_white, player_black, main_board, verbose, action_cache_size)
+
+    def _set_square(self, pos: tuple[int, int], piece: Piece | None):
+        bit = 1 << (pos[1] * 8 + pos[0])
+        old = self.board[pos[0]][pos[1]]
+        if old:
+            self.occupancy[old.color] ^= bit
+            self.piece_bitboards[old.color][old.type] ^= bit
+        if piece:
+            self.occupancy[piece.color] |= bit
+            self.piece_bitboards[piece.color][piece.type] |= bit
+        self.dirty_squares |= bit
+        super()._set_square(pos, piece)
+
+    def refresh_attacks(self):
+        dirty = self.dirty_squares
+        if not dirty:
+            return
+        
+        self.dirty_squares = 0
+        occ = self.occupancy[Color.WHITE] | self.occupancy[Color.BLACK]
+        attacks = self.attacks_by_square
+        for sq in iter_squares(dirty):
+            piece = self.board[sq & 7][sq >> 3]
+            attacks[sq] = piece_attacks(piece.type, piece.color, sq, occ) if piece else 0
+
+        # a slider only sees a different set if a square inside its previous attack set changed
+        sliders = 0
+        for color in Color:
+            piece_bitboards = self.piece_bitboards[color]
+            sliders |= piece_bitboards[PieceType.ROOK] | piece_bitboards[PieceType.BISHOP] | piece_bitboards[PieceType.QUEEN]
+        for sq in iter_squares(sliders & ~dirty):
+            if attacks[sq] & dirty:
+                piece = self.board[sq & 7][sq >> 3]
+                attacks[sq] = piece_attacks(piece.type, piece.color, sq, occ)
+        
+        for color in Color:
+            attack_map = 0
+            for sq in iter_squares(self.occupancy[color]):
+                attack_map |= attacks[sq]
+            self.attack_maps[color] = attack_map
+
+    def attacked_squares(self, color: Color):
+        self.refresh_attacks()
+        return self.attack_maps[color]
+
+    def is_square_attacked(self, sq: int, color: Color, occ: int):
+        # reverse lookup from sq, so occ can differ from the current occupancy (king moved away, castled)
+        piece_bitboards = self.piece_bitboards[color]
+        return bool(
+            KNIGHT_ATTACKS[sq] & piece_bitboards[PieceType.KNIGHT] or
+            KING_ATTACKS[sq] & piece_bitboards[PieceType.KING] or
+            PAWN_ATTACKS[opp_color(color)][sq] & piece_bitboards[PieceType.PAWN] or
+            rook_attacks(occ, sq) & (piece_bitboards[PieceType.ROOK] | piece_bitboards[PieceType.QUEEN]) or
+            bishop_attacks(occ, sq) & (piece_bitboards[PieceType.BISHOP] | piece_bitboards[PieceType.QUEEN])
+        )
+
+    def get_checkers(self, color: Color):
+        # opponent pieces giving check to the king of color
+        king = self.piece_bitboards[color][PieceType.KING]
+        if not king:
+            return 0
+        
+        self.refresh_attacks()
+        checkers = 0
+        for sq in iter_squares(self.occupancy[opp_color(color)]):
+            if self.attacks_by_square[sq] & king:
+                checkers |= 1 << sq
+        return checkers
+
+    def get_pins(self, color: Color):
+        # square of each piece of color pinned to its king -> squares it may still move to (ray incl. pinner)
+        pins = {}
+        king = self.piece_bitboards[color][PieceType.KING]
+        if not king:
+            return pins
+        
+        k = king.bit_length() - 1
+        opp_piece_bitboards = self.piece_bitboards[opp_color(color)]
+        opp_occ = self.occupancy[opp_color(color)]
+        occ = opp_occ | self.occupancy[color]
+        
+        # own pieces are transparent here, so these are the first enemy sliders seen from the king on each line
+        snipers = (
+            rook_attacks(opp_occ, k) & (opp_piece_bitboards[PieceType.ROOK] | opp_piece_bitboards[PieceType.QUEEN]) |
+            bishop_attacks(opp_occ, k) & (opp_piece_bitboards[PieceType.BISHOP] | opp_piece_bitboards[PieceType.QUEEN])
+        )
+        for sq in iter_squares(snipers):
+            blockers = BETWEEN[k][sq] & occ
+            if blockers and not blockers & (blockers - 1):
+                pins[blockers.bit_length() - 1] = BETWEEN[k][sq] | (1 << sq)
+        return pins
+
+    def get_moves_bitboard(self, piece: Piece, attack_only=False):
+        sq = pos_to_square(piece.position)
+        if piece.type != PieceType.PAWN:
+            self.refresh_attacks()
+            return self.attacks_by_square[sq] & ~self.occupancy[piece.color]
+
+        captures = PAWN_ATTACKS[piece.color][sq] & self.occupancy[opp_color(piece.color)]
+        if attack_only:
+            return captures
+
+        empty = ~(self.occupancy[Color.WHITE] | self.occupancy[Color.BLACK])
+        step = 8 if piece.color == Color.WHITE else -8
+        push = 1 << (sq + step)
+        if not push & empty:
+            return captures
+
+        pushes = push
+        if piece.position[1] == PAWN_START_RANK[piece.color] and (1 << (sq + 2 * step)) & empty:
+            pushes |= 1 << (sq + 2 * step)
+        return pushes | captures
+
+    def get_valid_moves(self, piece: Piece, attack_only=False):
+        return bitboard_to_moves(self.get_moves_bitboard(piece, attack_only))
+
+    def generate_legal_moves(self, player: Player):
+        legal_moves = []
+        self.refresh_attacks()
+        color, opp = player.color, opp_color(player.color)
+        king = self.piece_bitboards[color][PieceType.KING]
+        k = king.bit_length() - 1
+        occ = self.occupancy[Color.WHITE] | self.occupancy[Color.BLACK]
+        checkers = self.get_checkers(color)
+
+        # king steps: never onto an attacked square, and when checked by a slider not along the checking line either
+        opp_attack_map = self.attack_maps[opp]
+        king_piece = self.board[k & 7][k >> 3]
+        for sq in iter_squares(KING_ATTACKS[k] & ~self.occupancy[color] & ~opp_attack_map):
+            if checkers and self.is_square_attacked(sq, opp, occ ^ king):
+                continue
+            legal_moves.append((king_piece, SQUARE_POS[sq]))
+
+        if checkers & (checkers - 1):
+            return legal_moves # double check, only the king can move
+
+        # under check every other move has to capture the checker or block the line to the king
+        targets = checkers | BETWEEN[k][checkers.bit_length() - 1] if checkers else FULL
+        pins = self.get_pins(color)
+        for piece in list(player.pieces):
+            if piece.type == PieceType.KING:
+                continue
+            
+            sq = pos_to_square(piece.position)
+            moves = self.get_moves_bitboard(piece) & targets
+            if sq in pins:
+                moves &= pins[sq]
+            for move_sq in iter_squares(moves):
+                legal_moves.append((piece, SQUARE_POS[move_sq]))
+        
+        return legal_moves
+
+    def get_attack_options(self, player: Player):
+        opp_player = self.get_opp_player(player)
+        targets = self.attacked_squares(player.color) & self.occupancy[opp_player.color]
+        attack_options_out = [self.board[x][y] for x, y in bitboard_to_moves(targets)]
+        attack_options_score = sum(
+            piece_captured_score[piece_type] * (targets & bb).bit_count()
+            for piece_type, bb in self.piece_bitboards[opp_player.color].items()
+        )
+        return attack_options_out, attack_options_score
+
+    def has_checked(self, player: Player):
+        return bool(self.attacked_squares(player.color) & self.piece_bitboards[opp_color(player.color)][PieceType.KING])
+
+    def can_castle(self, player: Player, king_side=True):
+        color, opp = player.color, opp_color(player.color)
+        if self.attacked_squares(opp) & self.piece_bitboards[color][PieceType.KING]:
+            return False
+        
+        col = 0 if color == Color.WHITE else 7
+        rook_row = 7 if king_side else 0
+        king_row = 4
+        king = self.board[king_row][col]
+        rook = self.board[rook_row][col]
+        if not king or king.has_moved or not rook or rook.has_moved:
+            return False
+        
+        occ = self.occupancy[Color.WHITE] | self.occupancy[Color.BLACK]
+        gap = BETWEEN[pos_to_square((king_row, col))][pos_to_square((rook_row, col))]
+        if occ & gap:
+            return False
+
+        # ensure that you cant castle into check (by opponent), evaluated on the occupancy after castling
+        king_move = pos_to_square((6, col) if king_side else (2, col))
+        rook_move = pos_to_square((5, col) if king_side else (3, col))
+        occ_after = occ ^ (1 << pos_to_square((king_row, col))) ^ (1 << pos_to_square((rook_row, col))) ^ (1 << king_move) ^ (1 << rook_move)
+        return not self.is_square_attacked(king_move, opp, occ_after)
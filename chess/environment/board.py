@@ -1,8 +1,9 @@
 from chess.environment.piece import Piece, PieceType, piece_captured_score
 from chess.environment.player import Player
 from chess.environment.color import Color
-from chess.environment.utils import square_pos_to_str
-from copy import deepcopy
+from chess.environment.utils import square_pos_to_str, encode_move, encode_castle, decode_move, MOVE_FLAG_PROMOTION, MOVE_FLAG_CASTLE
+from chess.environment.action_cache import ActionCache
+from chess.environment.zobrist import ZOBRIST_PIECES, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_CASTLING, CASTLE_WHITE_KING_SIDE, CASTLE_WHITE_QUEEN_SIDE, CASTLE_BLACK_KING_SIDE, CASTLE_BLACK_QUEEN_SIDE
 from enum import Enum
 
 class ActionType(Enum):
@@ -16,28 +17,94 @@ slide_move_directions = {
 }
 
 class Board:
-    def __init__(self, player_white: Player, player_black: Player, main_board=True):
+    def __init__(self, player_white: Player, player_black: Player, main_board=True, verbose=True, action_cache_size=4096):
         self.board = [[None for _ in range(8)] for _ in range(8)]
         self.player_white = player_white
         self.player_black = player_black
+        self.undo_stack = [] # one entry per make_move/make_castle, popped by unmake_move
+        self.turn = Color.WHITE
+        self.ply = 0 # half moves played since the start position
+        self.halfmove_clock = 0 # half moves since the last capture or pawn move
+        self.hash = 0 # zobrist key of placement, side to move and castling rights, kept incrementally
+        self.repetitions = {} # hash -> times the position occurred earlier on the current line
+        self.action_cache = ActionCache(action_cache_size) # legal/scored actions shared by Game and agents within a turn
+        self.evaluator = None # chess.environment.evaluation.PSTEvaluator keeping eval_score, attached with its attach()
+        self.eval_score = 0 # incremental evaluation, white minus black
         self.init_board()
+        self.castling = self.get_castling_rights()
+        self.hash ^= ZOBRIST_CASTLING[self.castling]
         self.main_board = main_board
+        self.verbose = verbose # quiet mode for headless self-play, silences move logging and print_board
+        self.tablebase = None # chess.environment.tablebase.Tablebase, exact results of the endgames it covers
 
     def init_board(self):
         for player in [self.player_white, self.player_black]:
             for piece in player.pieces:
-                self.board[piece.position[0]][piece.position[1]] = piece
+                self._set_square(piece.position, piece)
+
+    def _set_square(self, pos: tuple[int, int], piece: Piece | None):
+        # single write path for board squares, representations layered on top of the grid hook in here
+        sq = pos[1] * 8 + pos[0]
+        old = self.board[pos[0]][pos[1]]
+        if old:
+            self.hash ^= ZOBRIST_PIECES[old.color][old.type][sq]
+        if piece:
+            self.hash ^= ZOBRIST_PIECES[piece.color][piece.type][sq]
+        if self.evaluator is not None:
+            values = self.evaluator.values
+            if old:
+                self.eval_score -= values[old.color][old.type][sq]
+            if piece:
+                self.eval_score += values[piece.color][piece.type][sq]
+        self.board[pos[0]][pos[1]] = piece
+
+    def get_castling_rights(self):
+        # castling mask from unmoved kings and rooks on their home squares
+        rights = 0
+        for color, col, king_side_flag, queen_side_flag in [
+            (Color.WHITE, 0, CASTLE_WHITE_KING_SIDE, CASTLE_WHITE_QUEEN_SIDE),
+            (Color.BLACK, 7, CASTLE_BLACK_KING_SIDE, CASTLE_BLACK_QUEEN_SIDE)
+        ]:
+            king = self.board[4][col]
+            if not king or king.type != PieceType.KING or king.color != color or king.has_moved:
+                continue
+            for rook_row, flag in [(7, king_side_flag), (0, queen_side_flag)]:
+                rook = self.board[rook_row][col]
+                if rook and rook.type == PieceType.ROOK and rook.color == color and not rook.has_moved:
+                    rights |= flag
+        return rights
+
+    def _switch_turn(self):
+        # called after every make/unmake, keeps side to move and castling rights folded into the hash
+        self.turn = Color.BLACK if self.turn == Color.WHITE else Color.WHITE
+        self.hash ^= ZOBRIST_BLACK_TO_MOVE
+        castling = self.get_castling_rights()
+        if castling != self.castling:
+            self.hash ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+            self.castling = castling
+
+    def is_repetition(self, n_times=3):
+        return self.repetitions.get(self.hash, 0) + 1 >= n_times
     
     def get_opp_player(self, player: Player):
         return self.player_black if player.color == Color.WHITE else self.player_white
+
+    def get_player(self, color: Color):
+        return self.player_white if color == Color.WHITE else self.player_black
     
     def is_draw(self):
         # TODO expand with other auto-draw scenarios
         if len(self.player_white.pieces) == 1 and len(self.player_black.pieces) == 1:
             assert next(iter(self.player_white.pieces)).type == PieceType.KING and next(iter(self.player_black.pieces)).type == PieceType.KING
             return True
-        
-        return False
+        if self.tablebase is not None and self.probe_tablebase() == (0, 0):
+            return True
+
+        return self.is_repetition()
+
+    def probe_tablebase(self):
+        # (wdl, plies to mate) for the side to move, None without a tablebase or outside its piece sets
+        return self.tablebase.probe(self) if self.tablebase is not None else None
     
     def has_checked(self, player: Player):
         attack_options_pieces, _ = self.get_attack_options(player)
@@ -47,11 +114,8 @@ class Board:
         if not self.has_checked(player):
             return False 
 
-        opp_player = self.get_opp_player(player)
-        valid_actions = self.get_valid_actions(opp_player)
-
-        # if actions dict is empty for move and castling options
-        return not any(actions for _, actions in valid_actions.items())
+        # only existence of a legal reply matters here, no need to score the opponents actions
+        return not self.has_legal_actions(self.get_opp_player(player))
 
     
     def is_stalemate(self, player: Player):
@@ -59,8 +123,35 @@ class Board:
         if self.has_checked(opp_player):
             return False # curr turn player in check, opp player has checked
         
-        valid_actions = self.get_valid_actions(player)
-        return not any(actions for _, actions in valid_actions.items())
+        return not self.has_legal_actions(player)
+
+    def has_legal_actions(self, player: Player):
+        return bool(self.get_legal_moves(player)) or self.can_castle(player, True) or self.can_castle(player, False)
+
+    def get_legal_moves(self, player: Player):
+        # (piece, move) pairs that do not leave the players own king in check
+        key = (self.hash, player.color, False)
+        cached = self.action_cache.get(key)
+        if cached is not None:
+            return [(self.board[position[0]][position[1]], move) for position, move in cached]
+        
+        legal_moves = self.generate_legal_moves(player)
+        self.action_cache.put(key, tuple((piece.position, move) for piece, move in legal_moves))
+        return legal_moves
+
+    def generate_legal_moves(self, player: Player):
+        legal_moves = []
+        opp_player = self.get_opp_player(player)
+        
+        # iterate over a snapshot, nested make/unmake removes and re-adds pieces to the sets
+        for piece in list(player.pieces):
+            for move in self.get_valid_moves(piece):
+                self.make_move(player, piece, move)
+                if not self.has_checked(opp_player):
+                    legal_moves.append((piece, move))
+                self.unmake_move()
+        
+        return legal_moves
     
     def get_attack_options(self, player: Player):
         attack_options_out = []
@@ -75,43 +166,46 @@ class Board:
 
 
     def get_valid_actions(self, player: Player):
-        # TODO split into two functions
+        key = (self.hash, player.color, True)
+        cached = self.action_cache.get(key)
+        if cached is not None:
+            moves_cached, castles_cached = cached
+            return {
+                ActionType.MOVE: {self.board[position[0]][position[1]]: list(moves) for position, moves in moves_cached},
+                ActionType.CASTLE: dict(castles_cached)
+            }
+        
+        valid_actions = self.generate_valid_actions(player)
+        self.action_cache.put(key, (
+            tuple((piece.position, tuple(moves)) for piece, moves in valid_actions[ActionType.MOVE].items()),
+            tuple(valid_actions[ActionType.CASTLE].items())
+        ))
+        return valid_actions
+
+    def generate_valid_actions(self, player: Player):
         valid_actions = {ActionType.MOVE: {}, ActionType.CASTLE: {}}
         
         opp_player = self.get_opp_player(player)
         _, opp_player_attack_score = self.get_attack_options(opp_player)
         
-        for piece in player.pieces:
-            valid_moves_piece = []
-            for move in self.get_valid_moves(piece):
-                board_copy = deepcopy(self)
-                board_copy.main_board = False
-                piece_copy = board_copy.board[piece.position[0]][piece.position[1]]
-                player_copy = board_copy.player_white if player.color == Color.WHITE else board_copy.player_black
-                opp_player_copy = board_copy.get_opp_player(player_copy)
-                piece_captured_type = board_copy.move(player_copy, piece_copy, move)
-                move_score_base = piece_captured_score[piece_captured_type] if piece_captured_type else 0
-                
-                _, opp_player_copy_attack_score = board_copy.get_attack_options(opp_player_copy)
-                if not board_copy.has_checked(opp_player_copy):
-                    move_score = 1e9 if board_copy.has_checkmated(player_copy) else move_score_base + (opp_player_attack_score - opp_player_copy_attack_score)
-                    valid_moves_piece.append((move, move_score))
-
-            if valid_moves_piece:
-                valid_actions[ActionType.MOVE][piece] = valid_moves_piece
+        for piece, move in self.get_legal_moves(player):
+            piece_captured_type = self.make_move(player, piece, move)
+            move_score_base = piece_captured_score[piece_captured_type] if piece_captured_type else 0
+            
+            _, opp_player_attack_score_after = self.get_attack_options(opp_player)
+            move_score = 1e9 if self.has_checkmated(player) else move_score_base + (opp_player_attack_score - opp_player_attack_score_after)
+            self.unmake_move()
+            
+            valid_actions[ActionType.MOVE].setdefault(piece, []).append((move, move_score))
         
         for king_side in [True, False]:
             if self.can_castle(player, king_side):
-                board_copy = deepcopy(self)
-                board_copy.main_board = False
-                player_copy = board_copy.player_white if player.color == Color.WHITE else board_copy.player_black
-                opp_player_copy = board_copy.get_opp_player(player_copy)
-
-                board_copy.castle(player_copy, king_side)
-                _, opp_player_copy_attack_score = board_copy.get_attack_options(opp_player_copy)
+                self.make_castle(player, king_side)
+                _, opp_player_attack_score_after = self.get_attack_options(opp_player)
 
                 # note that check for castle into check is done in can_castle
-                castle_score = 1e9 if board_copy.has_checkmated(player_copy) else (opp_player_attack_score - opp_player_copy_attack_score)
+                castle_score = 1e9 if self.has_checkmated(player) else (opp_player_attack_score - opp_player_attack_score_after)
+                self.unmake_move()
                 valid_actions[ActionType.CASTLE][king_side] = castle_score
         
         return valid_actions
@@ -124,31 +218,139 @@ class Board:
         if move not in piece_moves:
             raise ValueError(f"Invalid move for piece {piece.type} at {piece.position}: {move}")
         
-        piece_captured_type = None
-        opp_player = self.get_opp_player(player)
-        self.board[piece.position[0]][piece.position[1]] = None
+        if self.main_board and self.verbose and self.board[move[0]][move[1]]:
+            print(f"{player} captures {self.board[move[0]][move[1]]} using {piece}")
+
+        piece_type = piece.type
+        piece_captured_type = self.make_move(player, piece, move)
+
+        if self.main_board and self.verbose and piece.type != piece_type:
+            print(f'Promoting Pawn at {square_pos_to_str(piece.position)} to Queen')
         
-        if self.board[move[0]][move[1]]:
-            piece_eliminated = self.board[move[0]][move[1]]
-            if self.main_board:
-                print(f"{player} captures {piece_eliminated} using {piece}")
-            
-            piece_captured_type = piece_eliminated.type
-            piece_eliminated.position = None
-            opp_player.pieces.remove(piece_eliminated)
-            opp_player.pieces_eliminated.add(piece_eliminated)
+        return piece_captured_type
 
-        self.board[move[0]][move[1]] = piece
-        piece.has_moved = True
-        piece.position = move
+    def make_move(self, player: Player, piece: Piece, move: tuple[int, int]):
+        """
+        Apply a move in place without validation or logging and push what is needed to restore it onto the undo stack.
+        Returns the captured piece type, None if the target square was empty
+        """
+        piece_captured = self.board[move[0]][move[1]]
+        self.undo_stack.append((ActionType.MOVE, piece, piece.position, piece_captured, piece.has_moved, piece.type, self.halfmove_clock))
+        self.repetitions[self.hash] = self.repetitions.get(self.hash, 0) + 1
+        self.halfmove_clock = 0 if piece_captured or piece.type == PieceType.PAWN else self.halfmove_clock + 1
+        self.ply += 1
+        self._set_square(piece.position, None)
+        
+        if piece_captured:
+            opp_player = self.get_opp_player(player)
+            self._set_square(move, None)
+            piece_captured.position = None
+            opp_player.pieces.remove(piece_captured)
+            opp_player.pieces_eliminated.add(piece_captured)
 
-        # promote pawn
+        # promote pawn, type changes while the piece is off the board so the square write sees the new type
         if piece.type == PieceType.PAWN and (move[1] == 0 or move[1] == 7):
-            if self.main_board:
-                print(f'Promoting Pawn at {square_pos_to_str(piece.position)} to Queen')
             piece.type = PieceType.QUEEN
+
+        self._set_square(move, piece)
+        piece.has_moved = True
+        piece.position = move
+        self._switch_turn()
+
+        return piece_captured.type if piece_captured else None
+
+    def make_castle(self, player: Player, king_side=True):
+        col = 0 if player.color == Color.WHITE else 7
+        rook_row = 7 if king_side else 0
+        king_row = 4
+
+        king = self.board[king_row][col]
+        rook = self.board[rook_row][col]
+        self.undo_stack.append((ActionType.CASTLE, king, rook, king_side, self.halfmove_clock))
+        self.repetitions[self.hash] = self.repetitions.get(self.hash, 0) + 1
+        self.halfmove_clock += 1
+        self.ply += 1
+
+        self._set_square((king_row, col), None)
+        self._set_square((rook_row, col), None)
+
+        king_move = (6, col) if king_side else (2, col)
+        rook_move = (5, col) if king_side else (3, col)
+        self._set_square(king_move, king)
+        self._set_square(rook_move, rook)
+        king.position = king_move
+        rook.position = rook_move
+        self._switch_turn()
+
+    def unmake_move(self):
+        # revert the last make_move/make_castle, restoring captured pieces, has_moved flags and promotions exactly
+        entry = self.undo_stack.pop()
+        if entry[0] == ActionType.CASTLE:
+            _, king, rook, king_side, _ = entry
+            col = king.position[1]
+            self._set_square(king.position, None)
+            self._set_square(rook.position, None)
+            king.position = (4, col)
+            rook.position = (7 if king_side else 0, col)
+            self._set_square(king.position, king)
+            self._set_square(rook.position, rook)
         
-        return piece_captured_type
+        else:
+            _, piece, position, piece_captured, has_moved, piece_type, _ = entry
+            move = piece.position
+            self._set_square(move, None)
+            piece.type = piece_type
+            piece.has_moved = has_moved
+            piece.position = position
+            self._set_square(position, piece)
+            
+            if piece_captured:
+                opp_player = self.get_player(piece_captured.color)
+                opp_player.pieces_eliminated.remove(piece_captured)
+                opp_player.pieces.add(piece_captured)
+                piece_captured.position = move
+                self._set_square(move, piece_captured)
+        
+        self.halfmove_clock = entry[-1]
+        self.ply -= 1
+        self._switch_turn()
+        if self.repetitions[self.hash] == 1:
+            del self.repetitions[self.hash]
+        else:
+            self.repetitions[self.hash] -= 1
+    
+    def last_move_code(self):
+        # 16 bit code (see utils.encode_move) of the action on top of the undo stack
+        entry = self.undo_stack[-1]
+        if entry[0] == ActionType.CASTLE:
+            _, king, _, king_side, _ = entry
+            return encode_castle(king.position[1], king_side)
+        
+        _, piece, position, _, _, piece_type, _ = entry
+        return encode_move(position, piece.position, MOVE_FLAG_PROMOTION if piece_type != piece.type else 0)
+
+    def generate_legal_move_codes(self, player: Player):
+        # move codes of every legal move and castle of player, bypasses the action cache like generate_legal_moves
+        codes = []
+        for piece, move in self.generate_legal_moves(player):
+            promotion = piece.type == PieceType.PAWN and (move[1] == 0 or move[1] == 7)
+            codes.append(encode_move(piece.position, move, MOVE_FLAG_PROMOTION if promotion else 0))
+
+        col = 0 if player.color == Color.WHITE else 7
+        for king_side in [True, False]:
+            if self.can_castle(player, king_side):
+                codes.append(encode_castle(col, king_side))
+        return codes
+
+    def make_move_code(self, code: int):
+        # apply a decoded move code for the side owning the moved piece (no validation), returns the captured type
+        from_pos, to_pos, flag = decode_move(code)
+        piece = self.board[from_pos[0]][from_pos[1]]
+        player = self.get_player(piece.color)
+        if flag == MOVE_FLAG_CASTLE:
+            self.make_castle(player, to_pos[0] == 6)
+            return None
+        return self.make_move(player, piece, to_pos)
     
     def get_valid_moves(self, piece: Piece, attack_only=False):
         match piece.type:
@@ -249,27 +451,11 @@ class Board:
         return moves_out
     
     def castle(self, player: Player, king_side=True):
-        if self.main_board:
+        if self.main_board and self.verbose:
             print(f"{player} castling {'king side' if king_side else 'queen side'}\n")
         
-        col = 0 if player.color == Color.WHITE else 7
-        rook_row = 7 if king_side else 0
-        king_row = 4
-
-        king = self.board[king_row][col]
-        rook = self.board[rook_row][col]
-
-        self.board[king_row][col] = None
-        self.board[rook_row][col] = None
-
-        king_move = (6, col) if king_side else (2, col)
-        rook_move = (5, col) if king_side else (3, col)
-        self.board[king_move[0]][king_move[1]] = king
-        self.board[rook_move[0]][rook_move[1]] = rook
-        king.position = king_move
-        rook.position = rook_move
+        self.make_castle(player, king_side)
         
-    
     def can_castle(self, player: Player, king_side=True):
         opp_player = self.get_opp_player(player)
         if self.has_checked(opp_player):
@@ -290,14 +476,15 @@ class Board:
             self.board[rook_row][col] and not self.board[rook_row][col].has_moved and
             gap_vacant
         ):
-            board_copy = deepcopy(self)
-            board_copy.main_board = False
-            player_copy = board_copy.player_white if player.color == Color.WHITE else board_copy.player_black
-            opp_player_copy = board_copy.get_opp_player(player_copy)
-            board_copy.castle(player_copy, king_side)
-            return not board_copy.has_checked(opp_player_copy) # ensure that you cant castle into check (by opponent)
+            self.make_castle(player, king_side)
+            into_check = self.has_checked(opp_player) # ensure that you cant castle into check (by opponent)
+            self.unmake_move()
+            return not into_check
     
     def print_board(self):
+        if not self.verbose:
+            return
+        
         print(f"\n  {'-'*55}")
         for i in range(7, -1, -1):
             for j in range(8):
@@ -0,0 +1,146 @@
+from chess.environment.board import Board, ActionType
+from chess.environment.bitboard import BitBoard
+from chess.environment.piece import PieceType
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.zobrist import CASTLE_WHITE_KING_SIDE, CASTLE_WHITE_QUEEN_SIDE, CASTLE_BLACK_KING_SIDE, CASTLE_BLACK_QUEEN_SIDE
+import numpy as np
+
+# feature planes, indexed [plane, y, x] with y the rank so plane[0, 0] is A1
+PIECE_PLANES = {(color, piece_type): i * 6 + piece_type.value - 1 for i, color in enumerate(Color) for piece_type in PieceType}
+PLANE_SIDE_TO_MOVE = 12 # ones when white is to move
+PLANE_CASTLING = 13 # 4 planes, white king side, white queen side, black king side, black queen side
+PLANE_HALFMOVE_CLOCK = 17 # half moves since the last capture or pawn move / 100
+PLANE_FULLMOVE = 18 # full move number / 200
+N_PLANES = 19
+CASTLING_FLAGS = (CASTLE_WHITE_KING_SIDE, CASTLE_WHITE_QUEEN_SIDE, CASTLE_BLACK_KING_SIDE, CASTLE_BLACK_QUEEN_SIDE)
+
+# actions are indexed from_sq | to_sq << 6, the low 12 bits of utils.encode_move. Castles are the king's
+# two square step and promotions are always to queen, so the index is unique per legal action
+N_ACTIONS = 4096
+
+# byte -> its 8 bits, least significant first
+BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1, bitorder='little')
+
+def action_index(from_pos: tuple[int, int], to_pos: tuple[int, int]):
+    return (from_pos[1] * 8 + from_pos[0]) | ((to_pos[1] * 8 + to_pos[0]) << 6)
+
+def castle_action_index(color: Color, king_side: bool):
+    col = 0 if color == Color.WHITE else 7
+    return action_index((4, col), (6 if king_side else 2, col))
+
+def decode_action(board: Board, index: int):
+    # action index -> (ActionType.MOVE, piece, move) or (ActionType.CASTLE, king_side), the inverse of the encoders
+    index = int(index) # numpy integers would leak into positions and overflow bitboard shifts
+    from_sq, to_sq = index & 63, index >> 6
+    from_pos, to_pos = (from_sq & 7, from_sq >> 3), (to_sq & 7, to_sq >> 3)
+    piece = board.board[from_pos[0]][from_pos[1]]
+    if piece.type == PieceType.KING and abs(to_pos[0] - from_pos[0]) == 2:
+        return ActionType.CASTLE, to_pos[0] == 6
+    return ActionType.MOVE, piece, to_pos
+
+def apply_action(board: Board, player: Player, index: int):
+    action = decode_action(board, index)
+    if action[0] == ActionType.CASTLE:
+        board.castle(player, action[1])
+    else:
+        board.move(player, action[1], action[2])
+
+def piece_bitboards(board: Board):
+    # 12 occupancy sets in plane order, read straight from a BitBoard or built from the piece sets
+    if isinstance(board, BitBoard):
+        return [board.piece_bitboards[color][piece_type] for color in Color for piece_type in PieceType]
+
+    bitboards = [0] * 12
+    for player in [board.player_white, board.player_black]:
+        for piece in player.pieces:
+            bitboards[PIECE_PLANES[(piece.color, piece.type)]] |= 1 << (piece.position[1] * 8 + piece.position[0])
+    return bitboards
+
+def bitboards_to_planes(bitboards: np.ndarray, out: np.ndarray, bits: np.ndarray = None):
+    """
+    Expand (n, 12) uint64 piece sets into (n, 12, 8, 8) planes with one byte -> bits table lookup.
+    bits is an optional (n, 12 * 8, 8) uint8 scratch buffer, allocated when not given.
+    """
+    n = bitboards.shape[0]
+    if bits is None:
+        bits = np.empty((n, 12 * 8, 8), dtype=np.uint8)
+
+    # little endian bytes and bits give square order, byte k is rank k and bit j within it is file j
+    if np.little_endian:
+        raw = bitboards.view(np.uint8)
+    else:
+        raw = bitboards.byteswap().view(np.uint8)
+    np.take(BYTE_BITS, raw, axis=0, out=bits)
+    out[:] = bits.reshape(n, 12, 8, 8)
+    return out
+
+
+class BoardEncoder:
+    """
+    Writes positions into a caller owned (N, N_PLANES, 8, 8) array.
+    Piece planes are gathered as 64 bit sets into a reused uint64 scratch buffer and expanded for the whole batch
+    with a single byte -> bits table lookup, the scalar planes are broadcast writes. The arrays are reused across calls,
+    per position only the short list of 12 piece sets from piece_bitboards is built.
+    """
+    def __init__(self, max_batch_size: int):
+        self.max_batch_size = max_batch_size
+        self.bitboards = np.zeros((max_batch_size, 12), dtype=np.uint64)
+        self.scalars = np.zeros((max_batch_size, N_PLANES - 12), dtype=np.float32)
+        self.bits = np.zeros((max_batch_size, 12 * 8, 8), dtype=np.uint8)
+
+    def encode(self, boards: list[Board], out: np.ndarray):
+        n = len(boards)
+        assert n <= self.max_batch_size and out.shape[0] >= n and out.shape[1:] == (N_PLANES, 8, 8)
+
+        bitboards, scalars = self.bitboards[:n], self.scalars[:n]
+        for i, board in enumerate(boards):
+            bitboards[i] = piece_bitboards(board)
+            castling = board.castling
+            scalars[i, 0] = board.turn == Color.WHITE
+            for j, flag in enumerate(CASTLING_FLAGS):
+                scalars[i, 1 + j] = bool(castling & flag)
+            scalars[i, 5] = board.halfmove_clock / 100
+            scalars[i, 6] = (board.ply // 2 + 1) / 200
+
+        bitboards_to_planes(bitboards, out[:n, :12], self.bits[:n])
+        out[:n, 12:] = scalars[:, :, None, None]
+        return out[:n]
+
+    def encode_one(self, board: Board, out: np.ndarray):
+        # out has shape (N_PLANES, 8, 8)
+        return self.encode([board], out[None])[0]
+
+
+def encode_actions(valid_actions: dict, color: Color, mask_out: np.ndarray, scores_out: np.ndarray = None):
+    """
+    Scatter the dict returned by Board.get_valid_actions into preallocated N_ACTIONS rows:
+    mask_out gets 1 at legal action indices, scores_out (optional) the action scores, both are cleared first
+    """
+    mask_out[:] = 0
+    if scores_out is not None:
+        scores_out[:] = 0
+
+    for piece, moves in valid_actions[ActionType.MOVE].items():
+        for move, score in moves:
+            index = action_index(piece.position, move)
+            mask_out[index] = 1
+            if scores_out is not None:
+                scores_out[index] = score
+
+    for king_side, score in valid_actions[ActionType.CASTLE].items():
+        index = castle_action_index(color, king_side)
+        mask_out[index] = 1
+        if scores_out is not None:
+            scores_out[index] = score
+    return mask_out
+
+def encode_legal_mask(board: Board, player: Player, mask_out: np.ndarray):
+    # mask from unscored legal moves, cheaper than get_valid_actions when only legality is needed
+    mask_out[:] = 0
+    for piece, move in board.get_legal_moves(player):
+        mask_out[action_index(piece.position, move)] = 1
+    for king_side in [True, False]:
+        if board.can_castle(player, king_side):
+            mask_out[castle_action_index(player.color, king_side)] = 1
+    return mask_out
@@ -0,0 +1,169 @@
+from chess.environment.board import Board
+from chess.environment.piece import Piece, PieceType
+from chess.environment.player import Player
+from chess.environment.color import Color
+
+# material in centipawns
+MATERIAL = {
+    PieceType.PAWN: 100,
+    PieceType.KNIGHT: 320,
+    PieceType.BISHOP: 330,
+    PieceType.ROOK: 500,
+    PieceType.QUEEN: 900,
+    PieceType.KING: 0
+}
+
+# piece-square bonuses in centipawns for white, written as seen from white: first row rank 8, last row rank 1.
+# black uses the ranks mirrored. These are the widely used "simplified evaluation function" tables.
+PIECE_SQUARE_TABLES = {
+    PieceType.PAWN: (
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0
+    ),
+    PieceType.KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50
+    ),
+    PieceType.BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20
+    ),
+    PieceType.ROOK: (
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0
+    ),
+    PieceType.QUEEN: (
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20
+    ),
+    PieceType.KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20
+    )
+}
+
+def mobility(board: Board, player: Player):
+    # pseudo legal moves of player's pieces, pins and checks ignored
+    return sum(len(board.get_valid_moves(piece)) for piece in player.pieces)
+
+def pawn_shield(board: Board, player: Player):
+    # own pawns on the king's and adjacent files one or two ranks in front of it
+    king = next(piece for piece in player.pieces if piece.type == PieceType.KING)
+    x, y = king.position
+    forward = 1 if player.color == Color.WHITE else -1
+    count = 0
+    for x_ in range(max(x - 1, 0), min(x + 2, 8)):
+        for y_ in (y + forward, y + 2 * forward):
+            piece = board.board[x_][y_] if 0 <= y_ <= 7 else None
+            if piece and piece.type == PieceType.PAWN and piece.color == player.color:
+                count += 1
+    return count
+
+
+class PSTEvaluator:
+    """
+    Material plus piece-square tables, kept up to date incrementally: once attached to a board,
+    Board._set_square adds and removes the value of every piece written or cleared in board.eval_score
+    (white minus black), so make/unmake, castles and promotions update it for a few table lookups.
+
+    Called as evaluate(board, player) it scores the position for player in centipawns and attaches itself on first use,
+    so it drops into AgentAlphaBeta(evaluate=...) and RolloutEvaluator(evaluate_position=...).
+    move_delta/castle_delta give the change of that score by a move without playing it, AgentRandom(evaluator=...) weights its moves by them.
+    mobility and king_safety add non incremental terms, centipawns per pseudo legal move and per pawn shielding the king,
+    computed on every evaluation when non zero.
+    """
+    def __init__(self, material: dict = None, tables: dict = None, mobility=0.0, king_safety=0.0):
+        material = material or MATERIAL
+        tables = tables or PIECE_SQUARE_TABLES
+        # signed value of a piece on square y * 8 + x, looked up by Board._set_square
+        self.values = {
+            Color.WHITE: {t: tuple(material[t] + tables[t][(7 - (sq >> 3)) * 8 + (sq & 7)] for sq in range(64)) for t in PieceType},
+            Color.BLACK: {t: tuple(-material[t] - tables[t][(sq >> 3) * 8 + (sq & 7)] for sq in range(64)) for t in PieceType}
+        }
+        self.mobility = mobility
+        self.king_safety = king_safety
+
+    def __deepcopy__(self, memo):
+        # immutable tables, copied boards share them
+        return self
+
+    def full_score(self, board: Board):
+        # eval_score from scratch, white minus black
+        values = self.values
+        return sum(
+            values[piece.color][piece.type][piece.position[1] * 8 + piece.position[0]]
+            for player in (board.player_white, board.player_black) for piece in player.pieces
+        )
+
+    def attach(self, board: Board):
+        board.evaluator = self
+        board.eval_score = self.full_score(board)
+
+    def __call__(self, board: Board, player: Player):
+        if board.evaluator is not self:
+            self.attach(board)
+        score = board.eval_score if player.color == Color.WHITE else -board.eval_score
+        if self.mobility or self.king_safety:
+            opp_player = board.get_opp_player(player)
+            if self.mobility:
+                score += self.mobility * (mobility(board, player) - mobility(board, opp_player))
+            if self.king_safety:
+                score += self.king_safety * (pawn_shield(board, player) - pawn_shield(board, opp_player))
+        return score
+
+    def move_delta(self, board: Board, piece: Piece, move: tuple[int, int]):
+        # change of the mover's table score by moving piece to move, capture and promotion included
+        values = self.values[piece.color]
+        from_sq, to_sq = piece.position[1] * 8 + piece.position[0], move[1] * 8 + move[0]
+        piece_type = PieceType.QUEEN if piece.type == PieceType.PAWN and move[1] in (0, 7) else piece.type
+        delta = values[piece_type][to_sq] - values[piece.type][from_sq]
+        captured = board.board[move[0]][move[1]]
+        if captured:
+            delta -= self.values[captured.color][captured.type][to_sq]
+        return delta if piece.color == Color.WHITE else -delta
+
+    def castle_delta(self, player: Player, king_side=True):
+        values = self.values[player.color]
+        row = 0 if player.color == Color.WHITE else 56
+        king_to, rook_from, rook_to = (6, 7, 5) if king_side else (2, 0, 3)
+        delta = (
+            values[PieceType.KING][row + king_to] - values[PieceType.KING][row + 4] +
+            values[PieceType.ROOK][row + rook_to] - values[PieceType.ROOK][row + rook_from]
+        )
+        return delta if player.color == Color.WHITE else -delta
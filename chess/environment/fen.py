@@ -0,0 +1,148 @@
+from chess.environment.board import Board
+from chess.environment.piece import Piece, PieceType
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.zobrist import ZOBRIST_BLACK_TO_MOVE, CASTLE_WHITE_KING_SIDE, CASTLE_WHITE_QUEEN_SIDE, CASTLE_BLACK_KING_SIDE, CASTLE_BLACK_QUEEN_SIDE
+import shlex
+
+# Forsyth-Edwards Notation. This ruleset has no en passant, so that field is accepted and ignored on import and written as '-'.
+# Castling rights map onto has_moved: a right keeps its king and rook unmoved, every other king and rook counts as moved.
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+FEN_PIECES = {
+    'p': PieceType.PAWN, 'r': PieceType.ROOK, 'n': PieceType.KNIGHT,
+    'b': PieceType.BISHOP, 'q': PieceType.QUEEN, 'k': PieceType.KING
+}
+PIECE_LETTERS = {piece_type: letter for letter, piece_type in FEN_PIECES.items()}
+FEN_CASTLING = (
+    ('K', CASTLE_WHITE_KING_SIDE), ('Q', CASTLE_WHITE_QUEEN_SIDE), ('k', CASTLE_BLACK_KING_SIDE), ('q', CASTLE_BLACK_QUEEN_SIDE)
+)
+# castling flag -> (rook square, king square) that have to stay unmoved
+CASTLING_SQUARES = {
+    CASTLE_WHITE_KING_SIDE: ((7, 0), (4, 0)), CASTLE_WHITE_QUEEN_SIDE: ((0, 0), (4, 0)),
+    CASTLE_BLACK_KING_SIDE: ((7, 7), (4, 7)), CASTLE_BLACK_QUEEN_SIDE: ((0, 7), (4, 7))
+}
+
+def players_from_placement(placement: str, castling=0):
+    # white and black Player with exactly the pieces of a FEN placement field, no opening set is built
+    player_white, player_black = Player(Color.WHITE, init_pieces=False), Player(Color.BLACK, init_pieces=False)
+    unmoved = {square for flag, squares in CASTLING_SQUARES.items() if castling & flag for square in squares}
+
+    ranks = placement.split('/')
+    if len(ranks) != 8:
+        raise ValueError(f"FEN placement needs 8 ranks: {placement}")
+    for i, rank in enumerate(ranks):
+        y, x = 7 - i, 0
+        for char in rank:
+            if char.isdigit():
+                x += int(char)
+                continue
+            if char.lower() not in FEN_PIECES or x > 7:
+                raise ValueError(f"Invalid FEN rank {rank}")
+
+            color = Color.WHITE if char.isupper() else Color.BLACK
+            piece = Piece(FEN_PIECES[char.lower()], color, (x, y))
+            if piece.type == PieceType.PAWN:
+                piece.has_moved = y != (1 if color == Color.WHITE else 6)
+            elif piece.type in (PieceType.KING, PieceType.ROOK):
+                piece.has_moved = (x, y) not in unmoved
+            (player_white if color == Color.WHITE else player_black).pieces.add(piece)
+            x += 1
+        if x != 8:
+            raise ValueError(f"Invalid FEN rank {rank}")
+    return player_white, player_black
+
+def board_from_fen(fen: str, board_class: type[Board] = Board, **board_kwargs):
+    """
+    Board set up from a FEN string (trailing halfmove/fullmove fields optional, as in EPD).
+    Side to move, castling rights, halfmove clock and ply are restored. board_kwargs go to the board constructor.
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"FEN needs at least 4 fields: {fen}")
+    placement, side, castling_field = fields[:3]
+    castling = 0
+    for letter, flag in FEN_CASTLING:
+        if letter in castling_field:
+            castling |= flag
+
+    player_white, player_black = players_from_placement(placement, castling)
+    # rights without their king and rook in place are dropped by the board, like after any other move
+    board = board_class(player_white, player_black, **board_kwargs)
+
+    if side == 'b':
+        board.turn = Color.BLACK
+        board.hash ^= ZOBRIST_BLACK_TO_MOVE
+    elif side != 'w':
+        raise ValueError(f"Invalid side to move {side}")
+    board.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+    fullmove = int(fields[5]) if len(fields) > 5 else 1
+    board.ply = 2 * (fullmove - 1) + (board.turn == Color.BLACK)
+    return board
+
+def placement_to_fen(grid):
+    # placement field of a grid indexed [x][y] like Board.board
+    ranks = []
+    for y in range(7, -1, -1):
+        rank, empty = '', 0
+        for x in range(8):
+            piece = grid[x][y]
+            if not piece:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            letter = PIECE_LETTERS[piece.type]
+            rank += letter.upper() if piece.color == Color.WHITE else letter
+        ranks.append(rank + (str(empty) if empty else ''))
+    return '/'.join(ranks)
+
+def board_to_fen(board: Board):
+    castling = ''.join(letter for letter, flag in FEN_CASTLING if board.castling & flag) or '-'
+    side = 'w' if board.turn == Color.WHITE else 'b'
+    return f"{placement_to_fen(board.board)} {side} {castling} - {board.halfmove_clock} {board.ply // 2 + 1}"
+
+def player_to_fen(player: Player):
+    # the placement field restricted to one player's pieces
+    grid = [[None] * 8 for _ in range(8)]
+    for piece in player.pieces:
+        grid[piece.position[0]][piece.position[1]] = piece
+    return placement_to_fen(grid)
+
+
+def parse_epd(line: str):
+    """
+    EPD line -> (fen, operations). The 4 position fields become a FEN (clocks from hmvc/fmvn when present),
+    operations maps each opcode to its operand list, e.g. {'bm': ['Qh4#'], 'id': ['fools mate'], 'D1': ['20']}.
+    """
+    fields = line.split(maxsplit=4)
+    if len(fields) < 4:
+        raise ValueError(f"EPD needs at least 4 fields: {line}")
+
+    # quote aware: a quoted operand is one token and a ';' inside quotes does not end the operation
+    lexer = shlex.shlex(fields[4] if len(fields) > 4 else '', posix=True, punctuation_chars=';')
+    lexer.whitespace_split = True
+    lexer.commenters = ''
+    operations, tokens = {}, []
+    for token in [*lexer, ';']:
+        if token.startswith(';'):
+            if tokens:
+                operations[tokens[0]] = tokens[1:]
+            tokens = []
+        else:
+            tokens.append(token)
+    halfmove = operations.get('hmvc', ['0'])[0]
+    fullmove = operations.get('fmvn', ['1'])[0]
+    return f"{' '.join(fields[:4])} {halfmove} {fullmove}", operations
+
+def load_epd(path: str, board_class: type[Board] = Board, **board_kwargs):
+    # yields (board, operations) per position of an EPD suite, skipping blank and '#' comment lines
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fen, operations = parse_epd(line)
+            yield board_from_fen(fen, board_class, **board_kwargs), operations
@@ -0,0 +1,111 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.utils import square_pos_to_str
+from chess.environment.fen import board_from_fen, START_FEN
+from itertools import product
+import argparse
+import time
+
+# leaf counts under this ruleset: no en passant, queen-only promotion, and castling may pass an attacked square
+# (only out of and into check are illegal). The start position matches the standard counts up to depth 4, where
+# none of these differences occur yet. The others are the usual test positions, whose standard counts differ,
+# recounted by an independent generator with these rules
+PERFT_REFERENCE = {
+    'startpos': {1: 20, 2: 400, 3: 8902, 4: 197281},
+    'castling': {1: 26, 2: 572, 3: 13872, 4: 318014},
+    'kiwipete': {1: 48, 2: 2042, 3: 98100, 4: 4092896},
+    'position4': {1: 6, 2: 228, 3: 8083, 4: 321481},
+    'promotion': {1: 15, 2: 210, 3: 3253, 4: 47828}
+}
+PERFT_POSITIONS = {
+    'startpos': START_FEN,
+    'castling': 'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1', # every castle, rooks capturing rooks
+    'kiwipete': 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', # castles, pins, checks, promotions
+    'position4': 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', # root in check, promotions by capture, black castles
+    'promotion': 'n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1' # promotions on both sides
+}
+
+def perft(board: Board, player: Player, depth: int):
+    # number of leaf positions depth plies below the current one, move generation bypasses the action cache
+    if depth == 0:
+        return 1
+
+    castles = [king_side for king_side in [True, False] if board.can_castle(player, king_side)]
+    moves = board.generate_legal_moves(player)
+    if depth == 1:
+        return len(moves) + len(castles)
+
+    opp_player = board.get_opp_player(player)
+    nodes = 0
+    for piece, move in moves:
+        board.make_move(player, piece, move)
+        nodes += perft(board, opp_player, depth - 1)
+        board.unmake_move()
+    for king_side in castles:
+        board.make_castle(player, king_side)
+        nodes += perft(board, opp_player, depth - 1)
+        board.unmake_move()
+    return nodes
+
+def divide(board: Board, player: Player, depth: int):
+    # leaf counts split by root action, the usual way to bisect a mismatch against a reference engine
+    counts = {}
+    opp_player = board.get_opp_player(player)
+    for piece, move in board.generate_legal_moves(player):
+        key = f"{square_pos_to_str(piece.position)}{square_pos_to_str(move)}"
+        board.make_move(player, piece, move)
+        counts[key] = perft(board, opp_player, depth - 1)
+        board.unmake_move()
+    for king_side in [True, False]:
+        if board.can_castle(player, king_side):
+            board.make_castle(player, king_side)
+            counts['O-O' if king_side else 'O-O-O'] = perft(board, opp_player, depth - 1)
+            board.unmake_move()
+    return counts
+
+def run_perft(board_class: type[Board], depth: int, position='startpos'):
+    """
+    Count leaves from a named position of PERFT_POSITIONS or a FEN string to the given depth.
+    Returns one dict per depth with nodes, the reference count (None if unknown), nodes/sec and correctness.
+    """
+    results = []
+    fen = PERFT_POSITIONS.get(position, position)
+    for d in range(1, depth + 1):
+        board = board_from_fen(fen, board_class, verbose=False)
+        time_start = time.perf_counter()
+        nodes = perft(board, board.get_player(board.turn), d)
+        seconds = time.perf_counter() - time_start
+        expected = PERFT_REFERENCE.get(position, {}).get(d)
+        results.append({
+            'board': board_class.__name__,
+            'position': position,
+            'depth': d,
+            'nodes': nodes,
+            'expected': expected,
+            'ok': expected is None or nodes == expected,
+            'seconds': seconds,
+            'nodes_per_sec': nodes / seconds if seconds else 0.0
+        })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='perft move generation check')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--board', choices=['bitboard', 'list', 'both'], default='both')
+    parser.add_argument('--position', default='startpos', help=f"one of {', '.join(PERFT_POSITIONS)}, all, or a FEN string")
+    args = parser.parse_args()
+
+    board_classes = {'bitboard': [BitBoard], 'list': [Board], 'both': [Board, BitBoard]}[args.board]
+    positions = list(PERFT_POSITIONS) if args.position == 'all' else [args.position]
+    failed = False
+    for board_class, position in product(board_classes, positions):
+        for result in run_perft(board_class, args.depth, position):
+            failed |= not result['ok']
+            print(
+                f"{result['board']:>8} {position if position in PERFT_POSITIONS else 'fen'} depth {result['depth']}: {result['nodes']} nodes "
+                f"(expected {result['expected']}) {'ok' if result['ok'] else 'MISMATCH'} "
+                f"{result['nodes_per_sec']:.0f} nodes/sec"
+            )
+    raise SystemExit(1 if failed else 0)
@@ -1,7 +1,7 @@
 from enum import Enum
 from chess.environment.color import Color
 from chess.environment.utils import *
-import uuid
+from itertools import count
 
 class PieceType(Enum):
     PAWN = 1
@@ -21,9 +21,14 @@ piece_captured_score = {
     PieceType.KING: 50 # effective score for checking
 }
 
+# process wide piece ids, small ints hash to themselves so piece sets are cheap and iterate in a stable order
+_piece_ids = count()
+
 class Piece:
+    __slots__ = ('_id', 'type', 'color', 'position', 'has_moved')
+
     def __init__(self, type: PieceType, color: Color, position: tuple[int, int]):
-        self._id = uuid.uuid4()
+        self._id = next(_piece_ids)
         self.type = type
         self.color = color
         self.position = position
@@ -37,7 +42,18 @@ class Piece:
         return isinstance(other, Piece) and self._id == other._id
 
     def __hash__(self):
-        return hash(self._id)
+        return self._id
+
+    def __deepcopy__(self, memo):
+        # copies keep the id, like the uuid before, so a copied board's pieces compare equal to the originals
+        piece = Piece.__new__(Piece)
+        piece._id = self._id
+        piece.type = self.type
+        piece.color = self.color
+        piece.position = self.position
+        piece.has_moved = self.has_moved
+        memo[id(self)] = piece
+        return piece
     
     def __str__(self):
-        return f"{self.color.name} {self.type.name} at {square_pos_to_str(self.position)}"
\ No newline at end of file
+        return f"{self.color.name} {self.type.name} at {square_pos_to_str(self.position)}"
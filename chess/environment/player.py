@@ -2,11 +2,14 @@ from chess.environment.color import Color
 from chess.environment.piece import Piece, PieceType
 
 class Player:
-    def __init__(self, color: Color):
+    __slots__ = ('color', 'pieces', 'pieces_eliminated')
+
+    def __init__(self, color: Color, init_pieces=True):
         self.color = color
         self.pieces = set[Piece]()
         self.pieces_eliminated = set[Piece]()
-        self.init_pieces()
+        if init_pieces: # False leaves the set empty for a position set up piece by piece (see fen.py)
+            self.init_pieces()
     
     def init_pieces(self):
         if self.color == Color.WHITE:
@@ -0,0 +1,331 @@
+from chess.environment.board import Board
+from chess.environment.piece import PieceType
+from chess.environment.color import Color
+from chess.environment.bitboard import KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks, queen_attacks
+from array import array
+from itertools import product
+import numpy as np
+import argparse
+import mmap
+import os
+import struct
+import time
+
+# Endgame tables by retrograde analysis, one file per material signature such as 'KQK' (white K+Q against a bare black king).
+# Signatures list the first side's pieces then the second's, each starting with its king, the first side is the stronger one.
+# A table holds one int8 per position, index = stm * 64 ** n + sum(sq_i * 64 ** (n - 1 - i)) over the pieces in signature
+# order with stm 1 when the second side is to move. Values are for the side to move:
+#   0 draw, d > 0 wins and mates in d plies, d < 0 loses and is mated in -d - 1 plies (-1 checkmated), ILLEGAL unreachable.
+# The rules are this repo's: queen-only promotion, no en passant, and no castling (probing needs board.castling == 0).
+
+MAGIC = b'CHTB'
+VERSION = 1
+HEADER = struct.Struct('<4sHH8s')
+ILLEGAL = -128
+
+SIGNATURE_LETTERS = {'K': PieceType.KING, 'Q': PieceType.QUEEN, 'R': PieceType.ROOK, 'B': PieceType.BISHOP, 'N': PieceType.KNIGHT, 'P': PieceType.PAWN}
+TYPE_LETTERS = {piece_type: letter for letter, piece_type in SIGNATURE_LETTERS.items()}
+LETTER_ORDER = 'KQRBNP'
+MATERIAL = {'K': 0, 'Q': 9, 'R': 5, 'B': 3, 'N': 3, 'P': 1}
+
+# solver states
+UNKNOWN, WIN, LOSS, DRAW, UNREACHABLE = range(5)
+
+def side_letters(types):
+    return ''.join(sorted((TYPE_LETTERS[piece_type] for piece_type in types), key=LETTER_ORDER.index))
+
+def canonical_signature(first: str, second: str):
+    # (signature, swapped) with the materially stronger side first, swapped when that is the second given side
+    if (material_value(second), second) > (material_value(first), first):
+        return second + first, True
+    return first + second, False
+
+def material_value(letters: str):
+    return sum(MATERIAL[letter] for letter in letters)
+
+def parse_signature(signature: str):
+    split = signature.index('K', 1)
+    return signature[:split], signature[split:]
+
+def position_index(squares, stm: int):
+    index = stm
+    for sq in squares:
+        index = index * 64 + sq
+    return index
+
+
+class Tablebase:
+    """
+    Memory mapped probing of the tables in a directory, files are opened on first use.
+    probe(board) -> (wdl, dtm) for the side to move, wdl 1/0/-1 and dtm the plies to mate (0 for draws),
+    None when the material has no table or castling is still possible. A probe is an index computation and one byte read.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.tables = {}
+        self.signatures = {name[:-3] for name in os.listdir(directory) if name.endswith('.tb')} if os.path.isdir(directory) else set()
+        self.max_pieces = max((len(signature) for signature in self.signatures), default=0)
+
+    def __deepcopy__(self, memo):
+        # read only, copied boards share the maps
+        return self
+
+    def table(self, signature: str):
+        if signature not in self.tables:
+            with open(os.path.join(self.directory, f"{signature}.tb"), 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, n_pieces, stored = HEADER.unpack_from(data, 0)
+            if magic != MAGIC or version != VERSION or stored.rstrip(b'\0').decode() != signature:
+                raise ValueError(f"{signature}.tb is not a version {VERSION} table for {signature}")
+            self.tables[signature] = np.frombuffer(data, dtype=np.int8, offset=HEADER.size)
+        return self.tables[signature]
+
+    def probe_value(self, white, black, stm: int):
+        """
+        Raw table value of a position given as (piece type, square) lists per color and stm (0 white, 1 black to move).
+        None when there is no table, bare kings are a draw.
+        """
+        if len(white) == 1 and len(black) == 1:
+            return 0
+        white = sorted(white, key=lambda x: LETTER_ORDER.index(TYPE_LETTERS[x[0]]))
+        black = sorted(black, key=lambda x: LETTER_ORDER.index(TYPE_LETTERS[x[0]]))
+        signature, swapped = canonical_signature(side_letters(t for t, _ in white), side_letters(t for t, _ in black))
+        if signature not in self.signatures:
+            return None
+        if swapped:
+            # mirror the ranks and swap colors, the value for the side to move stays the same
+            white, black = [(t, sq ^ 56) for t, sq in black], [(t, sq ^ 56) for t, sq in white]
+            stm ^= 1
+        value = int(self.table(signature)[position_index([sq for _, sq in white + black], stm)])
+        return None if value == ILLEGAL else value
+
+    def probe(self, board: Board):
+        if board.castling or len(board.player_white.pieces) + len(board.player_black.pieces) > self.max_pieces:
+            return None
+        white = [(piece.type, piece.position[1] * 8 + piece.position[0]) for piece in board.player_white.pieces]
+        black = [(piece.type, piece.position[1] * 8 + piece.position[0]) for piece in board.player_black.pieces]
+        value = self.probe_value(white, black, 0 if board.turn == Color.WHITE else 1)
+        if value is None:
+            return None
+        if value > 0:
+            return 1, value
+        if value < 0:
+            return -1, -value - 1
+        return 0, 0
+
+
+def _attack_fn(piece_type: PieceType, color: Color):
+    # attacks(occ, sq) of one kind of piece, resolved once instead of matching the type on every call
+    match piece_type:
+        case PieceType.ROOK:
+            return rook_attacks
+        case PieceType.BISHOP:
+            return bishop_attacks
+        case PieceType.QUEEN:
+            return queen_attacks
+        case PieceType.PAWN:
+            table = PAWN_ATTACKS[color]
+        case PieceType.KNIGHT:
+            table = KNIGHT_ATTACKS
+        case PieceType.KING:
+            table = KING_ATTACKS
+    return lambda occ, sq: table[sq]
+
+def generate_table(signature: str, tablebase: Tablebase, verbose=False):
+    """
+    Solve every position of a signature by retrograde iteration. Tables reached through captures and promotions
+    have to be in tablebase already. Returns the int8 values in table order.
+    """
+    first, second = parse_signature(signature)
+    types = [SIGNATURE_LETTERS[letter] for letter in first + second]
+    colors = [Color.WHITE] * len(first) + [Color.BLACK] * len(second)
+    n = len(types)
+    n_positions = 2 * 64 ** n
+    time_start = time.perf_counter()
+
+    state = np.zeros(n_positions, dtype=np.int8)
+    n_moves = np.zeros(n_positions, dtype=np.int16)
+    in_check = np.zeros(n_positions, dtype=bool)
+    owners, successors = array('q'), array('q')
+    # outcomes of moves leaving the table (captures, promotions), from the mover's point of view
+    exit_win = np.full(n_positions, 1 << 14, dtype=np.int16) # shortest win through an exit
+    exit_loss = np.full(n_positions, -1, dtype=np.int16) # longest loss through an exit
+    exit_draw = np.zeros(n_positions, dtype=bool)
+
+    attacks = [_attack_fn(types[i], colors[i]) for i in range(n)]
+    weights = [64 ** (n - 1 - i) for i in range(n)]
+    is_pawn = [piece_type == PieceType.PAWN for piece_type in types]
+    pawns = [i for i in range(n) if is_pawn[i]]
+    sides = [range(len(first)), range(len(first), n)]
+    for stm in (0, 1):
+        own, opp = sides[stm], sides[stm ^ 1]
+        step, start_rank = (8, 1) if stm == 0 else (-8, 6)
+        flip = (1 - 2 * stm) * 64 ** n # successor index offset of passing the move
+        for index, squares in enumerate(product(range(64), repeat=n), stm * 64 ** n):
+            if (
+                len(set(squares)) < n or
+                any(squares[i] >> 3 in (0, 7) for i in pawns) or
+                KING_ATTACKS[squares[0]] >> squares[len(first)] & 1
+            ):
+                state[index] = UNREACHABLE
+                continue
+
+            own_occ = opp_occ = 0
+            for i in own:
+                own_occ |= 1 << squares[i]
+            for i in opp:
+                opp_occ |= 1 << squares[i]
+            occ = own_occ | opp_occ
+            opp_king_sq, king_sq = squares[opp[0]], squares[own[0]]
+            if any(attacks[i](occ, squares[i]) >> opp_king_sq & 1 for i in own):
+                state[index] = UNREACHABLE # the side that just moved is in check
+                continue
+            in_check[index] = any(attacks[j](occ, squares[j]) >> king_sq & 1 for j in opp)
+
+            count = 0
+            for i in own:
+                from_sq = squares[i]
+                if is_pawn[i]:
+                    targets = attacks[i](occ, from_sq) & opp_occ
+                    if not occ >> (from_sq + step) & 1:
+                        targets |= 1 << (from_sq + step)
+                        if from_sq >> 3 == start_rank and not occ >> (from_sq + 2 * step) & 1:
+                            targets |= 1 << (from_sq + 2 * step)
+                else:
+                    targets = attacks[i](occ, from_sq) & ~own_occ
+                moved_occ = occ ^ (1 << from_sq)
+
+                while targets:
+                    lsb = targets & -targets
+                    to = lsb.bit_length() - 1
+                    targets ^= lsb
+
+                    captured = next(j for j in opp if squares[j] == to) if opp_occ & lsb else -1
+                    new_occ = moved_occ | lsb
+                    new_king_sq = to if i == own[0] else king_sq
+                    if any(j != captured and attacks[j](new_occ, squares[j]) >> new_king_sq & 1 for j in opp):
+                        continue
+
+                    count += 1
+                    promotion = is_pawn[i] and to >> 3 in (0, 7)
+                    if captured < 0 and not promotion:
+                        owners.append(index)
+                        successors.append(index + flip + (to - from_sq) * weights[i])
+                        continue
+
+                    new_squares = list(squares)
+                    new_squares[i] = to
+                    new_types = list(types)
+                    if promotion:
+                        new_types[i] = PieceType.QUEEN
+                    white = [(new_types[j], new_squares[j]) for j in range(n) if colors[j] == Color.WHITE and j != captured]
+                    black = [(new_types[j], new_squares[j]) for j in range(n) if colors[j] == Color.BLACK and j != captured]
+                    value = tablebase.probe_value(white, black, stm ^ 1)
+                    if value is None:
+                        raise ValueError(f"{signature} needs the table for {side_letters(t for t, _ in white)}{side_letters(t for t, _ in black)}")
+                    if value < 0:
+                        exit_win[index] = min(exit_win[index], -value) # opponent mated in -value - 1 plies, so +1 for this move
+                    elif value > 0:
+                        exit_loss[index] = max(exit_loss[index], value + 1)
+                    else:
+                        exit_draw[index] = True
+            n_moves[index] = count
+
+    owners = np.frombuffer(owners, dtype=np.int64)
+    successors = np.frombuffer(successors, dtype=np.int64)
+    n_internal = np.bincount(owners, minlength=n_positions)
+    if verbose:
+        print(f"{signature}: {len(successors)} moves generated in {time.perf_counter() - time_start:.1f}s")
+
+    dist = np.zeros(n_positions, dtype=np.int16)
+    no_moves = (state == UNKNOWN) & (n_moves == 0)
+    state[no_moves & in_check] = LOSS
+    state[no_moves & ~in_check] = DRAW
+
+    # plies d ascending: wins at odd d reach a loss at d - 1, losses at even d only reach wins no longer than d - 1
+    exit_nonwin = exit_draw | (exit_win < (1 << 14))
+    max_exit = int(max(exit_loss.max(), np.where(exit_win < (1 << 14), exit_win, 0).max()))
+    d, quiet = 0, 0
+    while quiet < 2 or d <= max_exit:
+        d += 1
+        unknown = state == UNKNOWN
+        if d % 2:
+            edge = (state[successors] == LOSS) & (dist[successors] == d - 1)
+            new = unknown & ((np.bincount(owners, weights=edge, minlength=n_positions) > 0) | (exit_win == d))
+            state[new] = WIN
+        else:
+            edge = state[successors] == WIN
+            new = (
+                unknown & (np.bincount(owners, weights=edge, minlength=n_positions) == n_internal) &
+                ~exit_nonwin & (exit_loss <= d) & (n_moves > 0)
+            )
+            state[new] = LOSS
+        dist[new] = d
+        quiet = 0 if new.any() else quiet + 1
+    state[state == UNKNOWN] = DRAW
+
+    if dist.max() > 126:
+        raise ValueError(f"{signature} has mates longer than 126 plies, more than the int8 values hold")
+    values = np.zeros(n_positions, dtype=np.int8)
+    values[state == WIN] = dist[state == WIN]
+    values[state == LOSS] = -dist[state == LOSS] - 1
+    values[state == UNREACHABLE] = ILLEGAL
+    if verbose:
+        print(f"{signature}: solved in {time.perf_counter() - time_start:.1f}s, longest mate {dist.max()} plies")
+    return values
+
+def dependencies(signature: str):
+    # canonical signatures reachable by one capture or promotion, bare kings excluded
+    first, second = parse_signature(signature)
+    out = set()
+    for side, other, side_first in [(first, second, True), (second, first, False)]:
+        for i, letter in enumerate(side):
+            if letter == 'K':
+                continue
+            changed = [side[:i] + side[i + 1:]] # captured
+            if letter == 'P':
+                changed.append(side_letters(SIGNATURE_LETTERS[x] for x in side[:i] + 'Q' + side[i + 1:])) # promoted
+            for new_side in changed:
+                a, b = (new_side, other) if side_first else (other, new_side)
+                if a != 'K' or b != 'K':
+                    out.add(canonical_signature(a, b)[0])
+    return out
+
+def generate_tablebases(directory: str, signatures=('KQK', 'KRK', 'KPK'), max_pieces=3, verbose=False):
+    """
+    Write the tables for signatures and everything they depend on to directory, existing files are kept.
+    Tables with more than max_pieces pieces are refused, generation is pure Python and grows by 64x per piece.
+    """
+    os.makedirs(directory, exist_ok=True)
+    tablebase = Tablebase(directory)
+
+    def build(signature: str):
+        signature = canonical_signature(*parse_signature(signature))[0]
+        if signature in tablebase.signatures:
+            return
+        if len(signature) > max_pieces:
+            raise ValueError(f"{signature} has more than {max_pieces} pieces")
+        for dependency in sorted(dependencies(signature)):
+            build(dependency)
+
+        values = generate_table(signature, tablebase, verbose)
+        path = os.path.join(directory, f"{signature}.tb")
+        with open(path + '.tmp', 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(signature), signature.encode()))
+            f.write(values.tobytes())
+        os.replace(path + '.tmp', path)
+        tablebase.signatures.add(signature)
+        tablebase.max_pieces = max(tablebase.max_pieces, len(signature))
+
+    for signature in signatures:
+        build(signature)
+    return tablebase
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='generate endgame tablebases by retrograde analysis')
+    parser.add_argument('--dir', default='tablebases')
+    parser.add_argument('--signatures', nargs='+', default=['KQK', 'KRK', 'KPK'])
+    parser.add_argument('--max-pieces', type=int, default=3)
+    args = parser.parse_args()
+    generate_tablebases(args.dir, args.signatures, args.max_pieces, verbose=True)
@@ -8,4 +8,25 @@ def square_str_to_pos(square_str):
 def square_pos_to_str(pos):
     letters = 'ABCDEFGH'
     row, col = pos
-    return f"{letters[row]}{col + 1}"
\ No newline at end of file
+    return f"{letters[row]}{col + 1}"
+
+# 16 bit move codes: bits 0-5 from square, 6-11 to square (square = y * 8 + x), 12-13 move flag
+MOVE_FLAG_NORMAL = 0
+MOVE_FLAG_PROMOTION = 1
+MOVE_FLAG_CASTLE = 2 # from/to are the king squares
+
+def encode_move(from_pos, to_pos, flag=MOVE_FLAG_NORMAL):
+    return (from_pos[1] * 8 + from_pos[0]) | ((to_pos[1] * 8 + to_pos[0]) << 6) | (flag << 12)
+
+def decode_move(code):
+    from_sq, to_sq = code & 63, (code >> 6) & 63
+    return (from_sq & 7, from_sq >> 3), (to_sq & 7, to_sq >> 3), code >> 12
+
+def encode_castle(col, king_side):
+    return encode_move((4, col), (6 if king_side else 2, col), MOVE_FLAG_CASTLE)
+
+def move_code_str(code):
+    from_pos, to_pos, flag = decode_move(code)
+    if flag == MOVE_FLAG_CASTLE:
+        return f"Castle {'king side' if to_pos[0] == 6 else 'queen side'}"
+    return f"{square_pos_to_str(from_pos)} -> {square_pos_to_str(to_pos)}"
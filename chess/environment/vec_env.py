@@ -0,0 +1,79 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.encoding import BoardEncoder, N_PLANES, N_ACTIONS, apply_action, encode_legal_mask
+import numpy as np
+
+class VecEnv:
+    """
+    K independent self-play boards stepped in lockstep for batched policy evaluation.
+
+    Observations are (K, N_PLANES, 8, 8) feature planes of the side to move's position and masks are (K, N_ACTIONS)
+    legal-action masks, both in the encoding of chess.environment.encoding. step() applies one action index per
+    board for whichever side is to move there. The reward goes to the side that just moved: 1 for a checkmate, 0 otherwise.
+    Finished boards are reset before step() returns, so the observation in that row is already the next game's start.
+    The returned arrays are reused between calls, copy them if they need to outlive the next step.
+
+    Boards are rewound through their undo stacks on reset, so piece objects and each board's action cache live on
+    across episodes. The bitboard step and slider tables are module level and shared by every board.
+    """
+    def __init__(self, n_envs: int, board_class: type[Board] = BitBoard, max_plies=None):
+        self.n_envs = n_envs
+        self.max_plies = max_plies # truncate games at this many plies, None never truncates
+        self.boards = [board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False) for _ in range(n_envs)]
+        self.encoder = BoardEncoder(n_envs)
+        self.obs = np.zeros((n_envs, N_PLANES, 8, 8), dtype=np.float32)
+        self.masks = np.zeros((n_envs, N_ACTIONS), dtype=bool)
+        self.rewards = np.zeros(n_envs, dtype=np.float32)
+        self.dones = np.zeros(n_envs, dtype=bool)
+
+    def reset(self):
+        for board in self.boards:
+            self.reset_board(board)
+        return self.observe()
+
+    def reset_board(self, board: Board):
+        while board.undo_stack:
+            board.unmake_move()
+
+    def observe(self):
+        self.encoder.encode(self.boards, self.obs)
+        for i, board in enumerate(self.boards):
+            encode_legal_mask(board, board.get_player(board.turn), self.masks[i])
+        return self.obs, self.masks
+
+    def step(self, actions):
+        """
+        actions holds one action index per board.
+        Returns (obs, masks, rewards, dones, infos), infos maps the index of every board that finished this step
+        to {'result': 'checkmate' | 'stalemate' | 'draw' | 'truncated', 'winner': Color or None, 'plies': int}
+        """
+        infos = {}
+        for i, (board, action) in enumerate(zip(self.boards, actions)):
+            if not self.masks[i, action]:
+                raise ValueError(f"Illegal action {action} for board {i}")
+
+            player = board.get_player(board.turn)
+            apply_action(board, player, action)
+            result = self.get_result(board, player)
+            self.rewards[i] = 1.0 if result == 'checkmate' else 0.0
+            self.dones[i] = result is not None
+            if result:
+                infos[i] = {'result': result, 'winner': player.color if result == 'checkmate' else None, 'plies': board.ply}
+                self.reset_board(board)
+
+        obs, masks = self.observe()
+        return obs, masks, self.rewards, self.dones, infos
+
+    def get_result(self, board: Board, player: Player):
+        # same order of checks as Game.gameplay_loop, for the position right after player moved
+        if board.is_draw():
+            return 'draw'
+        if board.has_checkmated(player):
+            return 'checkmate'
+        if board.is_stalemate(board.get_opp_player(player)):
+            return 'stalemate'
+        if self.max_plies and board.ply >= self.max_plies:
+            return 'truncated'
+        return None
@@ -0,0 +1,19 @@
+from chess.environment.piece import PieceType
+from chess.environment.color import Color
+import random
+
+# fixed seed so hashes are stable across processes and runs (books, tablebases and tt dumps key on them)
+_rng = random.Random(20240607)
+
+ZOBRIST_PIECES = {
+    color: {piece_type: tuple(_rng.getrandbits(64) for _ in range(64)) for piece_type in PieceType}
+    for color in Color
+}
+ZOBRIST_BLACK_TO_MOVE = _rng.getrandbits(64)
+
+# castling rights as a 4 bit mask, one key per mask value
+CASTLE_WHITE_KING_SIDE = 1
+CASTLE_WHITE_QUEEN_SIDE = 2
+CASTLE_BLACK_KING_SIDE = 4
+CASTLE_BLACK_QUEEN_SIDE = 8
+ZOBRIST_CASTLING = tuple(_rng.getrandbits(64) for _ in range(16))
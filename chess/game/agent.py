@@ -1,16 +1,39 @@
 from abc import abstractmethod
 from chess.environment.board import Board
 from chess.environment.player import Player
+from chess.environment.utils import decode_move, move_code_str, MOVE_FLAG_CASTLE
 
 class Agent:
-    def __init__(self, name: str):
+    def __init__(self, name: str, book=None):
         self.name = name
         self.board = None
         self.player = None
+        self.book = book # chess.game.opening_book.OpeningBook, played from before the agent's own choice
 
     @abstractmethod
     def act(self):
         pass
+
+    def close(self):
+        # release what the agent holds for a game (AgentParallel's pool and shared table), called by Game.finish
+        pass
+
+    def play_book_move(self):
+        # play a move from the opening book and return its code, None without a book or once out of book
+        code = self.book.choose(self.board) if self.book is not None else None
+        if code is not None:
+            if self.board.verbose:
+                print(f"\nAction Chosen: {move_code_str(code)} (book)\n")
+            self.play_code(code)
+        return code
+
+    def play_code(self, code: int):
+        # play a move code for self.player through the logged board API
+        from_pos, to_pos, flag = decode_move(code)
+        if flag == MOVE_FLAG_CASTLE:
+            self.board.castle(self.player, to_pos[0] == 6)
+        else:
+            self.board.move(self.player, self.board.board[from_pos[0]][from_pos[1]], to_pos)
     
     def __str__(self):
-        return f"{self.name} - {self.player.color}"
\ No newline at end of file
+        return f"{self.name} - {self.player.color}"
@@ -0,0 +1,293 @@
+from chess.game.agent import Agent
+from chess.game.transposition import TranspositionTable, Bound
+from chess.environment.board import Board
+from chess.environment.evaluation import MATERIAL
+from chess.environment.piece import PieceType, piece_captured_score
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.utils import encode_move, encode_castle, move_code_str, MOVE_FLAG_PROMOTION
+import time
+
+MATE_SCORE = 1_000_000 # mate in n plies scores MATE_SCORE - n
+MATE_BOUND = MATE_SCORE - 1000 # anything beyond is a mate score
+
+# move ordering tiers, history scores stay below KILLER_ORDER
+TT_MOVE_ORDER = 1 << 30
+CAPTURE_ORDER = 1 << 24
+KILLER_ORDER = 1 << 20
+
+# material in centipawns, from the point of view of player
+def material_evaluate(board: Board, player: Player):
+    opp_player = board.get_opp_player(player)
+    return sum(MATERIAL[piece.type] for piece in player.pieces) - sum(MATERIAL[piece.type] for piece in opp_player.pieces)
+
+
+class AgentAlphaBeta(Agent):
+    """
+    Negamax with alpha-beta pruning, iterative deepening and a quiescence search of captures, or of every evasion when in check.
+    Moves are searched transposition table move first, then captures by most valuable victim / least valuable attacker
+    (piece_captured_score), then killer moves and the rest by history score.
+
+    Each act() deepens until max_depth or until the per-move budget runs out, time_limit in seconds and/or max_nodes.
+    An unfinished iteration is dropped and the best move of the last completed depth is played,
+    depth 1 is always completed. Statistics of the last search are kept in last_search.
+    evaluate(board, player) scores a position for the side to move, material_evaluate by default,
+    chess.environment.evaluation.PSTEvaluator() adds piece-square tables and is updated incrementally by the board.
+    With a chess.environment.tablebase.Tablebase, positions it covers below the root score their exact distance to mate.
+    """
+    def __init__(
+        self, name: str, max_depth=4, time_limit=None, max_nodes=None, tt_size_mb=16, evaluate=material_evaluate, tablebase=None,
+        book=None
+    ):
+        super().__init__(name, book)
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.evaluate = evaluate
+        self.tt = TranspositionTable(tt_size_mb)
+        self.tablebase = tablebase
+        self.tb_hits = 0
+        self.killers = []
+        self.history = [0] * 4096 # indexed by from_sq | to_sq << 6
+        self.nodes = 0
+        self.stopped = False
+        self.can_stop = False # the budget only applies once depth 1 is complete
+        self.deadline = None
+        self.last_search = None
+
+    def act(self):
+        code = self.play_book_move()
+        if code is not None:
+            return
+
+        code = self.search()
+        if self.board.verbose:
+            search = self.last_search
+            print(
+                f"\nAction Chosen: {move_code_str(code)} = {search['score']} "
+                f"(depth {search['depth']}, {search['nodes']} nodes, {search['nodes_per_sec']:.0f} nodes/sec)\n"
+            )
+
+        self.play_code(code)
+
+    def search(self):
+        """
+        Iteratively deepen from the current position for self.player, returns the move code to play.
+        The board is only touched through make_move/make_castle/unmake_move and is left as it was found.
+        """
+        time_start = time.perf_counter()
+        self.deadline = time_start + self.time_limit if self.time_limit else None
+        self.nodes = 0
+        self.tb_hits = 0
+        self.stopped = False
+        self.can_stop = False
+        self.killers = [[0, 0] for _ in range(self.max_depth + 1)]
+        self.history = [h >> 1 for h in self.history] # age history between moves, keep the trend
+
+        best_code, best_score, depth_reached = None, 0, 0
+        for depth in range(1, self.max_depth + 1):
+            score, code = self.search_root(depth)
+            if self.stopped and best_code is not None:
+                break
+
+            best_code, best_score, depth_reached = code, score, depth
+            self.can_stop = True
+            if self.stopped or abs(score) >= MATE_BOUND:
+                break
+
+        seconds = time.perf_counter() - time_start
+        self.last_search = {
+            'move': best_code,
+            'score': best_score,
+            'depth': depth_reached,
+            'nodes': self.nodes,
+            'seconds': seconds,
+            'nodes_per_sec': self.nodes / seconds if seconds else 0.0,
+            'tt_hits': self.tt.hits,
+            'tb_hits': self.tb_hits
+        }
+        return best_code
+
+    def search_root(self, depth: int):
+        board, player = self.board, self.player
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+        entry = self.tt.probe(board.hash)
+        moves = self.order_moves(self.generate_moves(player), entry[3] if entry else 0, 0)
+
+        best_code = moves[0][1]
+        opp_player = board.get_opp_player(player)
+        for _, code in moves:
+            board.make_move_code(code)
+            score = -self.negamax(opp_player, depth - 1, -beta, -alpha, 1)
+            board.unmake_move()
+            if self.stopped:
+                return alpha, best_code
+            if score > alpha:
+                alpha, best_code = score, code
+
+        self.tt.store(board.hash, depth, alpha, Bound.EXACT, best_code)
+        return alpha, best_code
+
+    def negamax(self, player: Player, depth: int, alpha: float, beta: float, ply: int):
+        board = self.board
+        self.nodes += 1
+        if self.out_of_budget():
+            return 0
+        if board.is_draw():
+            return 0
+        if self.tablebase is not None:
+            probe = self.tablebase.probe(board)
+            if probe is not None:
+                self.tb_hits += 1
+                wdl, dtm = probe
+                return wdl * (MATE_SCORE - ply - dtm)
+        if depth <= 0:
+            return self.quiescence(player, alpha, beta, ply)
+
+        alpha_orig = alpha
+        entry = self.tt.probe(board.hash)
+        tt_code = 0
+        if entry:
+            tt_depth, tt_value, tt_bound, tt_code = entry
+            if tt_depth >= depth:
+                tt_value = self.value_from_tt(tt_value, ply)
+                if tt_bound == Bound.EXACT:
+                    return tt_value
+                if tt_bound == Bound.LOWER:
+                    alpha = max(alpha, tt_value)
+                else:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_value
+
+        moves = self.generate_moves(player)
+        if not moves:
+            # checkmated or stalemate
+            return -MATE_SCORE + ply if board.has_checked(board.get_opp_player(player)) else 0
+
+        opp_player = board.get_opp_player(player)
+        best_score, best_code = -MATE_SCORE - 1, 0
+        for order, code in self.order_moves(moves, tt_code, ply):
+            board.make_move_code(code)
+            score = -self.negamax(opp_player, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if self.stopped:
+                return 0
+
+            if score > best_score:
+                best_score, best_code = score, code
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if order < CAPTURE_ORDER: # quiet move
+                    killers = self.killers[ply]
+                    if killers[0] != code:
+                        killers[1], killers[0] = killers[0], code
+                    self.history[code & 4095] += depth * depth
+                break
+
+        bound = Bound.UPPER if best_score <= alpha_orig else Bound.LOWER if best_score >= beta else Bound.EXACT
+        self.tt.store(board.hash, depth, self.value_to_tt(best_score, ply), bound, best_code)
+        return best_score
+
+    def quiescence(self, player: Player, alpha: float, beta: float, ply: int):
+        # only captures (and promotions) until the position is quiet, standing pat on the static evaluation.
+        # in check there is no standing pat, every evasion is searched and having none is mate
+        board = self.board
+        if self.out_of_budget():
+            return 0
+        opp_player = board.get_opp_player(player)
+        in_check = board.has_checked(opp_player)
+        if not in_check:
+            stand_pat = self.evaluate(board, player)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+
+        captures = []
+        for piece, move in board.generate_legal_moves(player):
+            victim = board.board[move[0]][move[1]]
+            promotion = piece.type == PieceType.PAWN and (move[1] == 0 or move[1] == 7)
+            if victim or promotion or in_check:
+                order = (piece_captured_score[victim.type] if victim else 0) * 16 - piece_captured_score[piece.type]
+                flag = MOVE_FLAG_PROMOTION if promotion else 0
+                captures.append((order, encode_move(piece.position, move, flag)))
+        if in_check and not captures:
+            return -MATE_SCORE + ply
+        captures.sort(reverse=True)
+
+        for _, code in captures:
+            self.nodes += 1
+            board.make_move_code(code)
+            score = -self.quiescence(opp_player, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if self.stopped:
+                return 0
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def generate_moves(self, player: Player):
+        # legal (piece, move) pairs and castles as (capture victim or None, moving piece type, move code)
+        board = self.board
+        col = 0 if player.color == Color.WHITE else 7
+        moves = []
+        for piece, move in board.generate_legal_moves(player):
+            promotion = piece.type == PieceType.PAWN and (move[1] == 0 or move[1] == 7)
+            flag = MOVE_FLAG_PROMOTION if promotion else 0
+            moves.append((board.board[move[0]][move[1]], piece.type, encode_move(piece.position, move, flag)))
+        for king_side in [True, False]:
+            if board.can_castle(player, king_side):
+                moves.append((None, PieceType.KING, encode_castle(col, king_side)))
+        return moves
+
+    def order_moves(self, moves, tt_code: int, ply: int):
+        # (order, code) pairs, highest order first
+        killers = self.killers[ply] if ply < len(self.killers) else (0, 0)
+        ordered = []
+        for victim, piece_type, code in moves:
+            if code == tt_code:
+                order = TT_MOVE_ORDER
+            elif victim:
+                order = CAPTURE_ORDER + piece_captured_score[victim.type] * 16 - piece_captured_score[piece_type]
+            elif code >> 12 == MOVE_FLAG_PROMOTION:
+                order = CAPTURE_ORDER + piece_captured_score[PieceType.QUEEN] * 16
+            elif code == killers[0]:
+                order = KILLER_ORDER + 1
+            elif code == killers[1]:
+                order = KILLER_ORDER
+            else:
+                order = min(self.history[code & 4095], KILLER_ORDER - 1)
+            ordered.append((order, code))
+        ordered.sort(key=lambda x: x[0], reverse=True)
+        return ordered
+
+    def out_of_budget(self):
+        if self.stopped:
+            return True
+        if not self.can_stop:
+            return False
+        if self.max_nodes and self.nodes >= self.max_nodes:
+            self.stopped = True
+        # the clock is only read every 1024 nodes
+        elif self.deadline and not self.nodes & 1023 and time.perf_counter() >= self.deadline:
+            self.stopped = True
+        return self.stopped
+
+    @staticmethod
+    def value_to_tt(value: float, ply: int):
+        # mate scores are stored relative to the stored node, not the root
+        if value >= MATE_BOUND:
+            return value + ply
+        if value <= -MATE_BOUND:
+            return value - ply
+        return value
+
+    @staticmethod
+    def value_from_tt(value: float, ply: int):
+        if value >= MATE_BOUND:
+            return value - ply
+        if value <= -MATE_BOUND:
+            return value + ply
+        return value
@@ -0,0 +1,318 @@
+from abc import abstractmethod
+from chess.game.agent import Agent
+from chess.game.agent_alphabeta import material_evaluate
+from chess.environment.board import Board, ActionType
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.utils import encode_move, encode_castle, move_code_str
+from chess.environment.encoding import BoardEncoder, N_PLANES, N_ACTIONS
+import numpy as np
+import math
+import random
+import time
+
+class Node:
+    # value_sum is from the point of view of the player who made the move into this node
+    __slots__ = ('prior', 'visits', 'value_sum', 'virtual_loss', 'children', 'hash', 'terminal_value', 'pending')
+
+    def __init__(self, prior: float):
+        self.prior = prior
+        self.visits = 0
+        self.value_sum = 0.0
+        self.virtual_loss = 0
+        self.children = None # move code -> Node once expanded
+        self.hash = None # Board.hash of the position, set on expansion
+        self.terminal_value = None # for the side to move, set once the position is known to be decided
+        self.pending = False # queued for evaluation in the current batch
+
+    def q(self):
+        # in flight visits count as losses, so parallel descents of one batch spread over the tree
+        n = self.visits + self.virtual_loss
+        return (self.value_sum - self.virtual_loss) / n if n else 0.0
+
+
+class LeafEvaluator:
+    """
+    Leaves are queued with add_leaf while the board sits at the leaf position and evaluated together by evaluate(),
+    which returns one (priors, value) pair per queued leaf in queue order and empties the queue.
+    priors are aligned with the move codes passed to add_leaf, value is in [-1, 1] for the side to move at the leaf.
+    """
+    @abstractmethod
+    def add_leaf(self, board: Board, player: Player, codes: list[int]):
+        pass
+
+    @abstractmethod
+    def evaluate(self):
+        pass
+
+
+def uniform_prior(board: Board, player: Player, codes: list[int]):
+    return [1 / len(codes)] * len(codes)
+
+def scored_prior(board: Board, player: Player, codes: list[int]):
+    # AgentRandom's weighting of the one ply get_valid_actions scores, normalized
+    actions = board.get_valid_actions(player)
+    scores = {}
+    for piece, moves in actions[ActionType.MOVE].items():
+        for move, score in moves:
+            scores[encode_move(piece.position, move) & 4095] = score
+    col = 0 if player.color == Color.WHITE else 7
+    for king_side, score in actions[ActionType.CASTLE].items():
+        scores[encode_castle(col, king_side) & 4095] = score
+
+    weights = [scores[code & 4095] for code in codes]
+    offset = abs(min(weights)) + 1
+    weights = [w + offset for w in weights]
+    total = sum(weights)
+    return [w / total for w in weights]
+
+def rollout_value(board: Board, player: Player, max_plies=40, rng=random, evaluate=material_evaluate):
+    """
+    Random playout from the current position, undone before returning.
+    1/-1 when the side to move at the start wins/loses, 0 for draws, and a squashed evaluate(board, player) when cut off.
+    """
+    n_plies = 0
+    side = player
+    value = None
+    while n_plies < max_plies:
+        if board.is_draw():
+            value = 0.0
+            break
+
+        codes = board.generate_legal_move_codes(side)
+        if not codes:
+            mated = board.has_checked(board.get_opp_player(side))
+            value = (-1.0 if mated else 0.0) * (1 if side == player else -1)
+            break
+
+        board.make_move_code(rng.choice(codes))
+        n_plies += 1
+        side = board.get_opp_player(side)
+
+    if value is None:
+        value = math.tanh(evaluate(board, player) / 400)
+    for _ in range(n_plies):
+        board.unmake_move()
+    return value
+
+
+class RolloutEvaluator(LeafEvaluator):
+    # the default, random playouts for values and a cheap prior (uniform_prior or scored_prior)
+    def __init__(self, prior=uniform_prior, max_plies=40, seed=None, evaluate_position=material_evaluate):
+        self.prior = prior
+        self.max_plies = max_plies
+        self.evaluate_position = evaluate_position # centipawns for the side to move, scores playouts cut off at max_plies
+        self.rng = random.Random(seed) if seed is not None else random
+        self.results = []
+
+    def add_leaf(self, board: Board, player: Player, codes: list[int]):
+        # playouts need the board at the leaf, so they run here and evaluate() only hands the results over
+        self.results.append((self.prior(board, player, codes), rollout_value(board, player, self.max_plies, self.rng, self.evaluate_position)))
+
+    def evaluate(self):
+        results, self.results = self.results, []
+        return results
+
+
+class NetworkEvaluator(LeafEvaluator):
+    """
+    Batched evaluation through a policy/value function of the encoded positions.
+    fn(obs, masks) gets (n, N_PLANES, 8, 8) planes and (n, N_ACTIONS) legal masks (see chess.environment.encoding)
+    and returns (n, N_ACTIONS) policy logits and (n,) values for the side to move. Buffers are allocated once.
+    """
+    def __init__(self, fn, max_batch_size: int):
+        self.fn = fn
+        self.encoder = BoardEncoder(max_batch_size)
+        self.obs = np.zeros((max_batch_size, N_PLANES, 8, 8), dtype=np.float32)
+        self.masks = np.zeros((max_batch_size, N_ACTIONS), dtype=bool)
+        self.leaf_codes = []
+
+    def add_leaf(self, board: Board, player: Player, codes: list[int]):
+        i = len(self.leaf_codes)
+        self.encoder.encode_one(board, self.obs[i])
+        self.masks[i] = 0
+        indices = [code & 4095 for code in codes]
+        self.masks[i, indices] = 1
+        self.leaf_codes.append(indices)
+
+    def evaluate(self):
+        n = len(self.leaf_codes)
+        if not n:
+            return []
+
+        logits, values = self.fn(self.obs[:n], self.masks[:n])
+        results = []
+        for i, indices in enumerate(self.leaf_codes):
+            leaf_logits = np.asarray(logits[i])[indices]
+            priors = np.exp(leaf_logits - leaf_logits.max())
+            results.append(((priors / priors.sum()).tolist(), float(values[i])))
+        self.leaf_codes = []
+        return results
+
+
+class AgentMCTS(Agent):
+    """
+    PUCT Monte Carlo tree search over move codes on the shared Board (make/unmake, no copies).
+
+    Simulations run in batches: up to batch_size leaves are selected with a virtual loss on their paths,
+    queued to the evaluator and expanded/backed up together, so batched evaluators see whole batches.
+    A batch ends early when a descent reaches a leaf already queued in it.
+    After every act() the subtree of the played move is kept and the opponent's reply is looked up in it on the next turn.
+
+    The move played is the most visited one, or sampled from visit counts ** (1 / temperature) when temperature > 0.
+    """
+    def __init__(
+        self, name: str, n_simulations=200, batch_size=8, c_puct=1.5, evaluator: LeafEvaluator = None,
+        time_limit=None, temperature=0.0, reuse_tree=True, book=None
+    ):
+        super().__init__(name, book)
+        self.n_simulations = n_simulations
+        self.batch_size = batch_size
+        self.c_puct = c_puct
+        self.evaluator = evaluator if evaluator is not None else RolloutEvaluator()
+        self.time_limit = time_limit
+        self.temperature = temperature
+        self.reuse_tree = reuse_tree
+        self.root = None
+        self.last_search = None
+
+    def act(self):
+        code = self.play_book_move()
+        if code is not None:
+            self.advance(code)
+            return
+
+        code = self.search()
+        if code is None:
+            raise ValueError(f"{self.player} has no legal move to play")
+        if self.board.verbose:
+            search = self.last_search
+            child = self.root.children[code]
+            print(
+                f"\nAction Chosen: {move_code_str(code)} = {child.q():.3f} ({child.visits} visits, "
+                f"{search['simulations']} simulations in {search['batches']} batches, {search['seconds']:.2f}s)\n"
+            )
+
+        self.play_code(code)
+        self.advance(code)
+
+    def advance(self, code: int):
+        # move the root along a played move, dropping the rest of the tree
+        if self.reuse_tree and self.root and self.root.children and code in self.root.children:
+            self.root = self.root.children[code]
+        else:
+            self.root = None
+
+    def sync_root(self):
+        # follow the opponent's reply into the kept subtree, start afresh when it is unknown
+        board = self.board
+        if self.root is not None and self.root.hash != board.hash and board.undo_stack:
+            self.advance(board.last_move_code())
+        if self.root is None or self.root.hash != board.hash:
+            self.root = Node(1.0)
+        return self.root
+
+    def search(self):
+        """
+        Run the simulations from the current position for self.player, returns the move code to play,
+        None when the position is checkmate or stalemate. The board is left as it was found.
+        """
+        time_start = time.perf_counter()
+        deadline = time_start + self.time_limit if self.time_limit else None
+        root = self.sync_root()
+        visits_reused = root.visits
+        n_simulations, n_batches = 0, 0
+        while n_simulations < self.n_simulations:
+            n_simulations += self.run_batch(root, min(self.batch_size, self.n_simulations - n_simulations))
+            n_batches += 1
+            if deadline and time.perf_counter() >= deadline:
+                break
+
+        code = self.choose_move(root)
+        seconds = time.perf_counter() - time_start
+        self.last_search = {
+            'move': code,
+            'simulations': n_simulations,
+            'batches': n_batches,
+            'visits_reused': visits_reused,
+            'root_visits': root.visits,
+            'seconds': seconds,
+            'simulations_per_sec': n_simulations / seconds if seconds else 0.0
+        }
+        return code
+
+    def choose_move(self, root: Node):
+        if not root.children:
+            return None # terminal root
+        codes = list(root.children)
+        visits = [root.children[code].visits for code in codes]
+        if self.temperature <= 0:
+            return codes[visits.index(max(visits))]
+        weights = [v ** (1 / self.temperature) for v in visits]
+        return random.choices(codes, weights=weights, k=1)[0] if sum(weights) else random.choice(codes)
+
+    def select_child(self, node: Node):
+        sqrt_visits = math.sqrt(node.visits + node.virtual_loss + 1)
+        best_score, best_code, best_child = -math.inf, None, None
+        for code, child in node.children.items():
+            score = child.q() + self.c_puct * child.prior * sqrt_visits / (1 + child.visits + child.virtual_loss)
+            if score > best_score:
+                best_score, best_code, best_child = score, code, child
+        return best_code, best_child
+
+    def run_batch(self, root: Node, batch_size: int):
+        # select up to batch_size leaves, evaluate them together and back up, returns the number of simulations done
+        board = self.board
+        queued = [] # (leaf, path, codes)
+        n_done = 0
+        for _ in range(batch_size):
+            node, path = root, [root]
+            n_plies = 0
+            while node.children and node.terminal_value is None:
+                code, node = self.select_child(node)
+                board.make_move_code(code)
+                path.append(node)
+                n_plies += 1
+
+            if node.pending:
+                for _ in range(n_plies):
+                    board.unmake_move()
+                break # collision with a leaf of this batch, evaluate what is queued
+
+            if node.terminal_value is None:
+                node.hash = board.hash
+                player = board.get_player(board.turn)
+                codes = board.generate_legal_move_codes(player) if not board.is_draw() else None
+                if codes:
+                    node.pending = True
+                    self.evaluator.add_leaf(board, player, codes)
+                    queued.append((node, path, codes))
+                    for n in path:
+                        n.virtual_loss += 1
+                elif codes is None:
+                    node.terminal_value = 0.0
+                else:
+                    node.terminal_value = -1.0 if board.has_checked(board.get_opp_player(player)) else 0.0
+
+            for _ in range(n_plies):
+                board.unmake_move()
+
+            if node.terminal_value is not None:
+                self.backup(path, node.terminal_value)
+                n_done += 1
+
+        for (node, path, codes), (priors, value) in zip(queued, self.evaluator.evaluate()):
+            node.children = {code: Node(prior) for code, prior in zip(codes, priors)}
+            node.pending = False
+            for n in path:
+                n.virtual_loss -= 1
+            self.backup(path, value)
+            n_done += 1
+        return n_done
+
+    def backup(self, path: list[Node], value: float):
+        # value is for the side to move at the last node of path, each node is scored for the player who moved into it
+        for node in reversed(path):
+            value = -value
+            node.visits += 1
+            node.value_sum += value
@@ -0,0 +1,174 @@
+from chess.game.agent import Agent
+from chess.game.agent_mcts import AgentMCTS
+from chess.game.transposition import SharedTranspositionTable
+from chess.environment.board import Board
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.fen import board_from_fen, board_to_fen
+from chess.environment.utils import move_code_str
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+import os
+import random
+import time
+
+# state of a search worker process, built once by _init_worker and kept between moves
+_worker = {}
+
+def _init_worker(board_class: type[Board], agent_class: type[Agent], agent_kwargs: dict, tt_name: str, tt_size_mb: int, seed: int):
+    random.seed(seed + os.getpid())
+    agent = agent_class('worker', **agent_kwargs)
+    if tt_name:
+        agent.tt = SharedTranspositionTable(tt_size_mb, tt_name)
+        # detach from the segment when the worker exits, AgentParallel.close lets the workers exit rather than killing them
+        Finalize(agent.tt, agent.tt.close, exitpriority=0)
+    # the board is set up from the game's root position by the first _sync_board
+    _worker.update(
+        board_class=board_class, board=None, agent=agent, root_fen=None, codes=[],
+        max_depth=getattr(agent, 'max_depth', None), shared_tt=bool(tt_name)
+    )
+
+def _sync_board(root_fen: str, codes: list[int]):
+    # bring the worker board to the position after codes from root_fen, only replaying what is new since the last move
+    agent = _worker['agent']
+    if root_fen != _worker['root_fen']:
+        # a new game, possibly not from the start position
+        _worker.update(board=board_from_fen(root_fen, _worker['board_class'], verbose=False), root_fen=root_fen, codes=[])
+        agent.board = _worker['board']
+        if isinstance(agent, AgentMCTS):
+            agent.root = None
+    board, played = _worker['board'], _worker['codes']
+    n_common = 0
+    while n_common < min(len(played), len(codes)) and played[n_common] == codes[n_common]:
+        n_common += 1
+    for _ in range(len(played) - n_common):
+        board.unmake_move()
+    for code in codes[n_common:]:
+        board.make_move_code(code)
+    _worker['codes'] = list(codes)
+
+    # walk a kept MCTS tree along the moves played since, whichever worker's choice was played
+    if isinstance(agent, AgentMCTS):
+        if n_common < len(played):
+            agent.root = None
+        for code in codes[n_common:]:
+            agent.advance(code)
+
+def _search_task(args):
+    root_fen, codes, worker_idx = args
+    _sync_board(root_fen, codes)
+    board, agent = _worker['board'], _worker['agent']
+    agent.player = board.get_player(board.turn)
+
+    # helpers of a shared table search one ply deeper every other worker, so they fill the table ahead of each other
+    if _worker['shared_tt'] and _worker['max_depth'] is not None:
+        agent.max_depth = _worker['max_depth'] + worker_idx % 2
+
+    code = agent.search()
+    if isinstance(agent, AgentMCTS):
+        votes = {child_code: child.visits for child_code, child in (agent.root.children or {}).items()}
+    else:
+        # one vote per worker, worth its depth so deeper searches win
+        votes = {code: agent.last_search.get('depth', 1)}
+    return {'move': code, 'votes': votes, 'search': agent.last_search}
+
+
+class AgentParallel(Agent):
+    """
+    Runs a search agent in n_workers processes on the same root position and merges their results into one move.
+
+    Root parallel: every worker builds agent_class(**agent_kwargs) with its own board and searches the position independently,
+    MCTS workers add up their root visit counts and other searches vote for their move weighted by the depth they reached.
+    With shared_tt the workers' transposition tables are one SharedTranspositionTable (lazy SMP for AgentAlphaBeta),
+    every other worker then searches one ply deeper.
+
+    Workers get the game's root position as a FEN plus the moves played from it, keep their board and agent between moves
+    and only replay the moves played since, so MCTS trees are reused.
+    The pool is started on the first act(), close() stops it and frees the shared table. Game.finish calls close(),
+    an agent playing another game starts a new pool.
+    """
+    def __init__(
+        self, name: str, agent_class: type[Agent] = AgentMCTS, agent_kwargs: dict = None, n_workers=None,
+        shared_tt=False, tt_size_mb=16, seed=0, book=None
+    ):
+        super().__init__(name, book)
+        self.agent_class = agent_class
+        self.agent_kwargs = agent_kwargs or {}
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.shared_tt = shared_tt
+        self.tt_size_mb = tt_size_mb
+        self.seed = seed
+        self.pool = None
+        self.tt = None
+        self.last_search = None
+
+    def start(self):
+        if self.shared_tt:
+            self.tt = SharedTranspositionTable(self.tt_size_mb)
+        self.pool = Pool(
+            self.n_workers, initializer=_init_worker,
+            initargs=(type(self.board), self.agent_class, self.agent_kwargs, self.tt.name if self.tt is not None else None, self.tt_size_mb, self.seed)
+        )
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.tt is not None:
+            self.tt.close()
+            self.tt = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def game_codes(self):
+        # (root FEN, move codes from the root to the current position), read by unwinding and replaying the undo stack
+        board = self.board
+        codes = []
+        while board.undo_stack:
+            codes.append(board.last_move_code())
+            board.unmake_move()
+        root_fen = board_to_fen(board)
+        codes.reverse()
+        for code in codes:
+            board.make_move_code(code)
+        return root_fen, codes
+
+    def search(self):
+        if self.pool is None:
+            self.start()
+
+        time_start = time.perf_counter()
+        root_fen, codes = self.game_codes()
+        results = self.pool.map(_search_task, [(root_fen, codes, i) for i in range(self.n_workers)], chunksize=1)
+
+        votes = {}
+        for result in results:
+            for code, n in result['votes'].items():
+                votes[code] = votes.get(code, 0) + n
+        code = max(votes, key=lambda x: (votes[x], -x)) if votes else None # no votes: no legal move
+
+        seconds = time.perf_counter() - time_start
+        self.last_search = {
+            'move': code,
+            'votes': votes,
+            'workers': len(results),
+            'seconds': seconds,
+            'worker_searches': [result['search'] for result in results]
+        }
+        return code
+
+    def act(self):
+        code = self.play_book_move()
+        if code is not None:
+            return
+
+        code = self.search()
+        if self.board.verbose:
+            print(f"\nAction Chosen: {move_code_str(code)} with {self.last_search['votes'][code]} votes from {self.last_search['workers']} workers\n")
+
+        self.play_code(code)
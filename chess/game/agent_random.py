@@ -1,10 +1,92 @@
 from chess.game.agent import Agent
 from chess.environment.board import ActionType
+from chess.environment.piece import PieceType
+from chess.environment.bitboard import KNIGHT_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks, queen_attacks, iter_squares
 from chess.environment.utils import *
 import random
 
+CHECKMATE_SCORE = 1e9 # what Board.get_valid_actions scores a mating move
+
 class AgentRandom(Agent):
-    def act(self):
+    """
+    Picks a legal move at random, weighted by its score. Scores come from Board.get_valid_actions,
+    or with an evaluator (chess.environment.evaluation.PSTEvaluator) from its move deltas, which skip the attack rescans.
+    Mating moves score CHECKMATE_SCORE either way, so mates in one are almost always played.
+    """
+    def __init__(self, name: str, book=None, evaluator=None):
+        super().__init__(name, book)
+        self.evaluator = evaluator
+
+    def checking_squares(self):
+        """
+        Where a move can give check in the current position: target squares per piece type from which it would attack
+        the enemy king, the own pieces whose move uncovers a slider on the king (discovered checks), and the occupancy.
+        A piece never blocks its own line to the king, so the targets hold on this occupancy, except for a promotion
+        whose pawn stood on the new queen's line, see mates().
+        """
+        board, player = self.board, self.player
+        opp_player = board.get_opp_player(player)
+        occ, own, orthogonal, diagonal = 0, 0, 0, 0
+        for piece in player.pieces | opp_player.pieces:
+            bit = 1 << (piece.position[1] * 8 + piece.position[0])
+            occ |= bit
+            if piece.color == player.color:
+                own |= bit
+                if piece.type in (PieceType.ROOK, PieceType.QUEEN):
+                    orthogonal |= bit
+                if piece.type in (PieceType.BISHOP, PieceType.QUEEN):
+                    diagonal |= bit
+        king = next(piece for piece in opp_player.pieces if piece.type == PieceType.KING)
+        king_sq = king.position[1] * 8 + king.position[0]
+        rook_lines, bishop_lines = rook_attacks(occ, king_sq), bishop_attacks(occ, king_sq)
+        targets = {
+            PieceType.PAWN: PAWN_ATTACKS[opp_player.color][king_sq],
+            PieceType.KNIGHT: KNIGHT_ATTACKS[king_sq],
+            PieceType.BISHOP: bishop_lines,
+            PieceType.ROOK: rook_lines,
+            PieceType.QUEEN: rook_lines | bishop_lines,
+            PieceType.KING: 0
+        }
+        discoverers = 0
+        for sq in iter_squares((rook_lines | bishop_lines) & own):
+            occ_without = occ & ~(1 << sq)
+            if rook_attacks(occ_without, king_sq) & orthogonal or bishop_attacks(occ_without, king_sq) & diagonal:
+                discoverers |= 1 << sq
+        return targets, discoverers, occ, king_sq
+
+    def mates(self, piece, move: tuple[int, int], checking_squares: tuple[dict, int, int, int]):
+        # only a checking move can mate, the few there are get played and tested
+        targets, discoverers, occ, king_sq = checking_squares
+        from_bit, to_bit = 1 << (piece.position[1] * 8 + piece.position[0]), 1 << (move[1] * 8 + move[0])
+        if piece.type == PieceType.PAWN and move[1] in (0, 7):
+            checks = queen_attacks(occ & ~from_bit, king_sq) & to_bit
+        else:
+            checks = targets[piece.type] & to_bit
+        if not (checks or discoverers & from_bit):
+            return False
+        board = self.board
+        board.make_move(self.player, piece, move)
+        mate = board.has_checkmated(self.player)
+        board.unmake_move()
+        return mate
+
+    def scored_options(self):
+        if self.evaluator is not None:
+            # table deltas of each move, with get_valid_actions' mate score for moves that mate
+            evaluator, board, player = self.evaluator, self.board, self.player
+            checking_squares = self.checking_squares()
+            options = []
+            for piece, move in board.get_legal_moves(player):
+                score = CHECKMATE_SCORE if self.mates(piece, move, checking_squares) else evaluator.move_delta(board, piece, move)
+                options.append([ActionType.MOVE, score, piece, move])
+            for king_side in [True, False]:
+                if board.can_castle(player, king_side):
+                    board.make_castle(player, king_side)
+                    mate = board.has_checkmated(player)
+                    board.unmake_move()
+                    options.append([ActionType.CASTLE, CHECKMATE_SCORE if mate else evaluator.castle_delta(player, king_side), king_side])
+            return options
+
         actions = self.board.get_valid_actions(self.player)
         moves_dict = actions[ActionType.MOVE]
         castles_dict = actions[ActionType.CASTLE]
@@ -12,31 +94,42 @@ class AgentRandom(Agent):
         options = []
         options += [[ActionType.MOVE, move_score, piece, move] for piece, moves in moves_dict.items() for move, move_score in moves]
         options += [[ActionType.CASTLE, castle_score, king_side] for king_side, castle_score in castles_dict.items()]
+        return options
+
+    def act(self):
+        if self.play_book_move() is not None:
+            return
+
+        options = self.scored_options()
         
         min_score = min(x[1] for x in options)
         for o in options:
             o[1] += (abs(min_score) + 1)
 
-        options.sort(key = lambda x: -x[1]) # sort just for presentation of ranking of options in logs/io player
+        # sort for presentation of ranking of options in logs/io player, ties broken by square so a seeded game replays exactly
+        options.sort(key = lambda x: (-x[1], x[2].position, x[3]) if x[0] == ActionType.MOVE else (-x[1], (-1, -1), (x[2], 0)))
         
-        print(f'Options: {self.player.color}')
-        for x in options:
-            if x[0] == ActionType.MOVE:
-                score, piece, move = x[1:]
-                print(f"{piece.color.name[0]}-{piece.type.name[:2]}: {square_pos_to_str(piece.position)} -> {square_pos_to_str(move)} = {score}")
-            else:
-                castle_score, king_side = x[1:]
-                print(f"Castle {'king side' if king_side else 'queen side'} = {castle_score}")
+        if self.board.verbose:
+            print(f'Options: {self.player.color}')
+            for x in options:
+                if x[0] == ActionType.MOVE:
+                    score, piece, move = x[1:]
+                    print(f"{piece.color.name[0]}-{piece.type.name[:2]}: {square_pos_to_str(piece.position)} -> {square_pos_to_str(move)} = {score}")
+                else:
+                    castle_score, king_side = x[1:]
+                    print(f"Castle {'king side' if king_side else 'queen side'} = {castle_score}")
         
         action_scores = [x[1] for x in options]
         x = random.choices(options, weights=action_scores, k=1)[0]
         
         if x[0] == ActionType.MOVE:
             score, piece, move = x[1:]
-            print(f"\nAction Chosen: {piece.color.name[0]}-{piece.type.name[:2]}: {square_pos_to_str(piece.position)} -> {square_pos_to_str(move)} = {score}\n")
+            if self.board.verbose:
+                print(f"\nAction Chosen: {piece.color.name[0]}-{piece.type.name[:2]}: {square_pos_to_str(piece.position)} -> {square_pos_to_str(move)} = {score}\n")
             self.board.move(self.player, piece, move)
         
         else:
             score, king_side = x[1:]
-            print(f"\nAction Chosen: Castle {'king side' if king_side else 'queen side'} = {score}")
+            if self.board.verbose:
+                print(f"\nAction Chosen: Castle {'king side' if king_side else 'queen side'} = {score}")
             self.board.castle(self.player, king_side)
@@ -0,0 +1,6 @@
+from chess.game.agent_random import AgentRandom
+from chess.game.agent_alphabeta import AgentAlphaBeta
+from chess.game.agent_mcts import AgentMCTS
+
+# agents selectable by name on the command lines (chess.game.server, chess.game.tournament)
+AGENTS = {'random': AgentRandom, 'alphabeta': AgentAlphaBeta, 'mcts': AgentMCTS}
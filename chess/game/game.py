@@ -4,11 +4,21 @@ from chess.environment.color import Color
 from chess.game.agent import Agent
 
 class Game:
-    def __init__(self, agent_white: Agent, agent_black: Agent, display_board=True):
+    def __init__(
+        self, agent_white: Agent, agent_black: Agent, display_board=True, board_class: type[Board] = Board,
+        verbose=True, max_turns=None, record_writer=None, seed=0, replay_buffer=None,
+        tablebase=None
+    ):
         p_white, p_black = Player(Color.WHITE), Player(Color.BLACK)
-        self.board = Board(p_white, p_black)
+        self.board = board_class(p_white, p_black, verbose=verbose)
 
         self.display_board = display_board
+        self.verbose = verbose
+        self.max_turns = max_turns # adjudicate as draw after this many turns, None plays until a result
+        self.record_writer = record_writer # chess.game.record.GameRecordWriter, gets the game once it ends
+        self.seed = seed # stored in the game record header only
+        self.replay_buffer = replay_buffer # chess.game.replay_buffer.ReplayBuffer, gets every position and the outcome
+        self.board.tablebase = tablebase # tablebase draws end the game through is_draw, wins are adjudicated below
         self.agent_white = agent_white
         self.agent_black = agent_black
         self.agent_white.player = p_white
@@ -21,36 +31,95 @@ class Game:
         self.winner = None
         self.draw = False
         self.stalemate = False
+        self.move_codes = [] # one 16 bit code per ply, see utils.encode_move
+        self.termination = None # reason of a forfeit, None for games decided on the board
+        self.replay_slot = None
 
+    def result(self):
+        if self.winner:
+            return 'white' if self.winner.player.color == Color.WHITE else 'black'
+        if self.stalemate:
+            return 'stalemate'
+        return 'draw' if self.draw else None
 
     def gameplay_loop(self):
         self.board.print_board()
-        while not self.winner:
-            curr_agent = self.agents[self.n_turns % 2]
-            if self.display_board:
-                print(f"\nCurrent Player: {curr_agent}")
+        while self.start_turn():
+            self.agents[self.n_turns % 2].act()
+            self.end_turn()
+        self.finish()
 
-            if self.board.is_stalemate(curr_agent.player):
+    # gameplay_loop in steps, for drivers that get the move some other way (chess.game.server awaits it)
+    def start_turn(self):
+        # False once the game is over, otherwise the side to move, agents[n_turns % 2], has to play a move
+        if self.result() is not None:
+            return False
+
+        curr_agent = self.agents[self.n_turns % 2]
+        if self.display_board and self.verbose:
+            print(f"\nCurrent Player: {curr_agent}")
+
+        if self.board.is_stalemate(curr_agent.player):
+            if self.verbose:
                 print(f"Game ended in stalemate after {self.n_turns} turns")
-                self.stalemate = True
-                break
-            
-            curr_agent.act()
+            self.stalemate = True
+            return False
+
+        if self.replay_buffer is not None:
+            # scored actions come from the action cache, agents asking for them in act() get the same entry
+            self.replay_slot = self.replay_buffer.add_position(self.board, curr_agent.player, self.board.get_valid_actions(curr_agent.player))
+        return True
+
+    def end_turn(self):
+        # book keeping and end of game checks once the side to move has played
+        curr_agent = self.agents[self.n_turns % 2]
+        self.move_codes.append(self.board.last_move_code())
+        if self.replay_buffer is not None:
+            self.replay_buffer.set_action(self.replay_slot, self.move_codes[-1])
+        if self.display_board:
             self.board.print_board()
 
-            self.n_turns += 1
-            if self.board.is_draw():
+        self.n_turns += 1
+        if self.board.is_draw():
+            if self.verbose:
                 print(f"\nGame ended in draw after {self.n_turns} turns")
-                self.draw = True
-                break
+            self.draw = True
+            return
 
-            if self.board.has_checkmated(curr_agent.player):
-                self.winner = curr_agent
+        if self.board.has_checkmated(curr_agent.player):
+            self.winner = curr_agent
+            if self.verbose:
                 print(f'{self.winner} has checkmated after {self.n_turns} turns')
-            
-            elif self.board.has_checked(curr_agent.player):
-                print(f'{curr_agent} has checked')
-            
+        
+        elif self.verbose and self.board.has_checked(curr_agent.player):
+            print(f'{curr_agent} has checked')
+
+        probe = self.board.probe_tablebase() if not self.winner else None
+        if probe is not None and probe[0]:
+            # won or lost with perfect play, agents[n_turns % 2] is the side to move
+            self.winner = self.agents[(self.n_turns + (probe[0] < 0)) % 2]
+            if self.verbose:
+                print(f'{self.winner} wins by tablebase adjudication after {self.n_turns} turns')
+        
+        if self.verbose:
             print(f"{self.n_turns} turns passed\n")
-            
-                
+
+        if not self.winner and self.max_turns and self.n_turns >= self.max_turns:
+            if self.verbose:
+                print(f"\nGame adjudicated as draw after {self.n_turns} turns")
+            self.draw = True
+
+    def forfeit(self, agent: Agent, reason: str):
+        # the side to move loses without playing, e.g. a remote agent timed out or sent an illegal move
+        self.winner = self.agents[1] if agent is self.agents[0] else self.agents[0]
+        self.termination = reason
+        if self.verbose:
+            print(f"\n{agent} forfeits after {self.n_turns} turns: {reason}")
+
+    def finish(self):
+        if self.record_writer:
+            self.record_writer.write_game(self.seed, self.result(), self.move_codes)
+        if self.replay_buffer is not None:
+            self.replay_buffer.finish_game(self.result())
+        for agent in self.agents:
+            agent.close()
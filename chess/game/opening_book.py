@@ -0,0 +1,122 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.game.record import GameRecordReader
+from chess.game.replay_buffer import outcome_for
+import numpy as np
+import argparse
+import mmap
+import random
+import struct
+
+# opening book, all little endian:
+#   header  16 bytes            magic b'CHBK', u16 version, u16 reserved, u64 number of entries n
+#   keys    n * u64             zobrist hash of the position (Board.hash), sorted, one entry per (position, move)
+#   stats   n * 3 * u32         games, wins and draws for the side to move after playing the move
+#   moves   n * u16             16 bit move code (utils.encode_move)
+# entries of a position are contiguous and most played first, lookups binary search the mapped keys
+
+MAGIC = b'CHBK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ')
+
+def build_book(archive_paths: list[str], path: str, max_plies=20, min_games=2, board_class: type[Board] = BitBoard):
+    """
+    Count every (position, move) of the first max_plies plies of the games in the archives (chess.game.record)
+    and write the moves played in at least min_games games to a book at path. Unfinished games are skipped.
+    Returns the number of entries written.
+    """
+    stats = {} # (hash, code) -> [games, wins, draws]
+    for archive_path in archive_paths:
+        with GameRecordReader(archive_path) as reader:
+            for record in reader:
+                if record.result is None:
+                    continue
+                board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+                for code in record.moves[:max_plies]:
+                    outcome = outcome_for(record.result, board.turn == Color.WHITE)
+                    entry = stats.setdefault((board.hash, code), [0, 0, 0])
+                    entry[0] += 1
+                    entry[1] += outcome == 1
+                    entry[2] += outcome == 0
+                    board.make_move_code(code)
+
+    entries = sorted(
+        ((key, code, counts) for (key, code), counts in stats.items() if counts[0] >= min_games),
+        key=lambda x: (x[0], -x[2][0], x[1])
+    )
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(entries)))
+        f.write(np.array([key for key, _, _ in entries], dtype=np.uint64).tobytes())
+        f.write(np.array([counts for _, _, counts in entries], dtype=np.uint32).reshape(-1, 3).tobytes())
+        f.write(np.array([code for _, code, _ in entries], dtype=np.uint16).tobytes())
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    Memory mapped opening book written by build_book. lookup(board) lists the book moves of the position,
+    choose(board) draws one weighted by games ** (1 / temperature) from the random module, so seeded games replay exactly.
+    Agents created with book=... play choose() while it has a move and search from there on, see Agent.play_book_move.
+    """
+    def __init__(self, path: str, temperature=1.0, min_games=1):
+        self.path = path
+        self.temperature = temperature
+        self.min_games = min_games
+        self.file = open(path, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, n = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+
+        self.keys = np.frombuffer(self.mmap, dtype=np.uint64, count=n, offset=HEADER.size)
+        self.stats = np.frombuffer(self.mmap, dtype=np.uint32, count=3 * n, offset=HEADER.size + 8 * n).reshape(n, 3)
+        self.moves = np.frombuffer(self.mmap, dtype=np.uint16, count=n, offset=HEADER.size + 20 * n)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __deepcopy__(self, memo):
+        # read only, copied agents share the map
+        return self
+
+    def lookup(self, board: Board):
+        # [(code, games, wins, draws)] for the side to move, most played first, empty when out of book
+        key = np.uint64(board.hash)
+        lo, hi = np.searchsorted(self.keys, key, 'left'), np.searchsorted(self.keys, key, 'right')
+        return [(int(self.moves[i]), *map(int, self.stats[i])) for i in range(lo, hi)]
+
+    def choose(self, board: Board):
+        entries = [entry for entry in self.lookup(board) if entry[1] >= self.min_games]
+        if not entries:
+            return None # out of book, a binary search and no move generation
+        # guard against a hash collision with a position the book was not built from
+        legal = set(board.generate_legal_move_codes(board.get_player(board.turn)))
+        entries = [entry for entry in entries if entry[0] in legal]
+        if not entries:
+            return None
+        return random.choices([code for code, *_ in entries], weights=[games ** (1 / self.temperature) for _, games, _, _ in entries])[0]
+
+    def close(self):
+        del self.keys, self.stats, self.moves
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='build an opening book from game archives')
+    parser.add_argument('archives', nargs='+')
+    parser.add_argument('--out', default='book.bin')
+    parser.add_argument('--max-plies', type=int, default=20)
+    parser.add_argument('--min-games', type=int, default=2)
+    args = parser.parse_args()
+
+    n = build_book(args.archives, args.out, args.max_plies, args.min_games)
+    print(f"{n} book moves written to {args.out}")
@@ -0,0 +1,201 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.piece import PieceType
+from chess.environment.color import Color
+from chess.environment.utils import decode_move, square_pos_to_str, MOVE_FLAG_PROMOTION, MOVE_FLAG_CASTLE
+from array import array
+import mmap
+import struct
+
+# binary game archive, all little endian:
+#   file header  8 bytes   magic b'CHRL', u16 version, u16 reserved
+#   per game     16 bytes  i64 seed, u32 number of plies, u8 result, 3 pad
+#                2 bytes   per ply, 16 bit move code (utils.encode_move)
+# games are appended whole, so a reader can open an archive while a writer is still running
+
+MAGIC = b'CHRL'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+GAME_HEADER = struct.Struct('<qIB3x')
+
+RESULT_CODES = {'white': 0, 'black': 1, 'draw': 2, 'stalemate': 3, None: 255}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+PGN_RESULTS = {'white': '1-0', 'black': '0-1', 'draw': '1/2-1/2', 'stalemate': '1/2-1/2', None: '*'}
+
+
+class GameRecord:
+    def __init__(self, seed: int, result: str | None, moves):
+        self.seed = seed
+        self.result = result
+        self.moves = moves # sequence of 16 bit move codes
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __repr__(self):
+        return f"GameRecord(seed={self.seed}, result={self.result}, plies={len(self.moves)})"
+
+
+class GameRecordWriter:
+    """
+    Appends finished games to an archive, pass it to Game(record_writer=...).
+    Writes are buffered, use as a context manager or call close() to flush.
+    """
+    def __init__(self, path: str, buffer_size=1 << 20):
+        self.path = path
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        self.n_games = 0
+
+    def write_game(self, seed: int, result: str | None, move_codes):
+        self.file.write(GAME_HEADER.pack(seed, len(move_codes), RESULT_CODES[result]))
+        self.file.write(array('H', move_codes).tobytes())
+        self.n_games += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecordReader:
+    """
+    Memory mapped view of an archive. Opening only walks the fixed size game headers to build an offset index,
+    the moves of a game are copied out of the map when it is accessed, so archives far larger than memory can be indexed and replayed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _ = FILE_HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game archive")
+
+        self.offsets = array('Q')
+        offset = FILE_HEADER.size
+        size = len(self.mmap)
+        while offset + GAME_HEADER.size <= size:
+            _, n_plies, _ = GAME_HEADER.unpack_from(self.mmap, offset)
+            end = offset + GAME_HEADER.size + 2 * n_plies
+            if end > size:
+                break # partially written trailing game
+            self.offsets.append(offset)
+            offset = end
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, idx: int):
+        offset = self.offsets[idx]
+        seed, n_plies, result = GAME_HEADER.unpack_from(self.mmap, offset)
+        start = offset + GAME_HEADER.size
+        moves = array('H')
+        moves.frombytes(self.mmap[start:start + 2 * n_plies])
+        return GameRecord(seed, RESULTS[result], moves)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def results(self):
+        # result per game without touching move data
+        return [RESULTS[GAME_HEADER.unpack_from(self.mmap, offset)[2]] for offset in self.offsets]
+
+    def close(self):
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(record: GameRecord, board_class: type[Board] = BitBoard):
+    # yields the board after each ply, the same Board object is updated in place
+    board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    for code in record.moves:
+        board.make_move_code(code)
+        yield board
+
+
+def move_to_san(board: Board, code: int):
+    # standard algebraic notation of a move code in the current position, before it is played
+    from_pos, to_pos, flag = decode_move(code)
+    piece = board.board[from_pos[0]][from_pos[1]]
+    player = board.get_player(piece.color)
+    if flag == MOVE_FLAG_CASTLE:
+        san = 'O-O' if to_pos[0] == 6 else 'O-O-O'
+
+    else:
+        target = square_pos_to_str(to_pos).lower()
+        capture = board.board[to_pos[0]][to_pos[1]] is not None
+        if piece.type == PieceType.PAWN:
+            san = f"{square_pos_to_str(from_pos)[0].lower()}x{target}" if capture else target
+            if flag == MOVE_FLAG_PROMOTION:
+                san += '=Q'
+
+        else:
+            letter = 'N' if piece.type == PieceType.KNIGHT else piece.type.name[0]
+            rivals = [
+                other.position for other, move in board.get_legal_moves(player)
+                if move == to_pos and other.type == piece.type and other is not piece
+            ]
+            disambiguation = ''
+            if rivals:
+                if all(position[0] != from_pos[0] for position in rivals):
+                    disambiguation = square_pos_to_str(from_pos)[0].lower()
+                elif all(position[1] != from_pos[1] for position in rivals):
+                    disambiguation = square_pos_to_str(from_pos)[1]
+                else:
+                    disambiguation = square_pos_to_str(from_pos).lower()
+            san = f"{letter}{disambiguation}{'x' if capture else ''}{target}"
+
+    board.make_move_code(code)
+    if board.has_checkmated(player):
+        san += '#'
+    elif board.has_checked(player):
+        san += '+'
+    board.unmake_move()
+    return san
+
+
+def to_pgn(record: GameRecord, event='chess_rl self-play', board_class: type[Board] = BitBoard):
+    board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    result = PGN_RESULTS[record.result]
+    tokens = []
+    for ply, code in enumerate(record.moves):
+        if ply % 2 == 0:
+            tokens.append(f"{ply // 2 + 1}.")
+        tokens.append(move_to_san(board, code))
+        board.make_move_code(code)
+    tokens.append(result)
+
+    lines, line = [], ''
+    for token in tokens:
+        if len(line) + len(token) + 1 > 80:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+
+    headers = [f'[Event "{event}"]', f'[Seed "{record.seed}"]', f'[Result "{result}"]']
+    return '\n'.join(headers) + '\n\n' + '\n'.join(lines) + '\n'
+
+
+def export_pgn(archive_path: str, pgn_path: str):
+    with GameRecordReader(archive_path) as reader, open(pgn_path, 'w') as f:
+        for record in reader:
+            f.write(to_pgn(record))
+            f.write('\n')
@@ -0,0 +1,250 @@
+from chess.environment.board import Board, ActionType
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.utils import encode_move, encode_castle
+from chess.environment.encoding import N_PLANES, N_ACTIONS, CASTLING_FLAGS, piece_bitboards, bitboards_to_planes
+import numpy as np
+import fcntl
+import json
+import os
+
+# a buffer is a directory of .npy arrays opened as memory maps, all indexed by slot:
+#   bitboards   (capacity, 12) uint64   piece sets in encoding plane order
+#   state       (capacity, 4) uint16    white to move, castling mask, halfmove clock, ply
+#   action      (capacity,) uint16      action index played (encoding.action_index)
+#   score_index (capacity, n_scores) uint16, score_value (capacity, n_scores) float32
+#               best scored actions of the position, highest first, padded with N_ACTIONS
+#   outcome     (capacity,) int8        1 / 0 / -1 for the side to move, OUTCOME_PENDING until the game ends
+#   priority    (capacity,) float32     sampling priority
+#   seq         (capacity,) int64       append number of the slot content, tells overwritten slots apart
+#   cursor      (1,) int64              positions appended so far, slot = seq % capacity
+# plus meta.json with the capacity and layout version, and a lock file serializing slot reservations
+
+VERSION = 1
+OUTCOME_PENDING = 127
+STATE_WHITE_TO_MOVE, STATE_CASTLING, STATE_HALFMOVE_CLOCK, STATE_PLY = range(4)
+
+def outcome_for(result: str | None, white_to_move: bool):
+    # final result of a game (Game.result) from the point of view of the side to move at a position
+    if result == 'white':
+        return 1 if white_to_move else -1
+    if result == 'black':
+        return -1 if white_to_move else 1
+    if result is None:
+        return OUTCOME_PENDING
+    return 0
+
+
+class ReplayBuffer:
+    """
+    Fixed capacity ring of self-play positions in memory mapped NumPy files, nothing per position lives in Python objects.
+    Several processes can open the same directory and append at once: slot ranges are reserved under an flock'ed lock file,
+    the writes themselves go straight to the shared maps. Once full, the oldest positions are overwritten.
+
+    Positions are appended with a pending outcome as they are played (add_position/set_action, see Game(replay_buffer=...))
+    and back-filled by finish_game when the game ends. Only finished positions are sampled,
+    uniformly or proportional to priority ** alpha with importance weights.
+    create() makes a new buffer, the constructor reopens an existing one, e.g. after a restart.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != VERSION:
+            raise ValueError(f"{path} is a version {self.meta['version']} replay buffer, expected {VERSION}")
+
+        self.capacity = self.meta['capacity']
+        self.n_scores = self.meta['n_scores']
+        open_array = lambda name: np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode='r+')
+        self.bitboards = open_array('bitboards')
+        self.state = open_array('state')
+        self.action = open_array('action')
+        self.score_index = open_array('score_index')
+        self.score_value = open_array('score_value')
+        self.outcome = open_array('outcome')
+        self.priority = open_array('priority')
+        self.seq = open_array('seq')
+        self.cursor = open_array('cursor')
+        self.lock_file = open(os.path.join(path, 'lock'), 'a')
+        self.game_slots = [] # (slot, seq) appended for the game in progress in this process
+
+    @classmethod
+    def create(cls, path: str, capacity: int, n_scores=32):
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            raise FileExistsError(f"{path} already holds a replay buffer")
+
+        for name, shape, dtype in [
+            ('bitboards', (capacity, 12), np.uint64),
+            ('state', (capacity, 4), np.uint16),
+            ('action', (capacity,), np.uint16),
+            ('score_index', (capacity, n_scores), np.uint16),
+            ('score_value', (capacity, n_scores), np.float32),
+            ('outcome', (capacity,), np.int8),
+            ('priority', (capacity,), np.float32),
+            ('seq', (capacity,), np.int64),
+            ('cursor', (1,), np.int64)
+        ]:
+            # sparse files, pages are only backed once written
+            array = np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode='w+', dtype=dtype, shape=shape)
+            if name == 'outcome':
+                array[:] = OUTCOME_PENDING
+            elif name == 'seq':
+                array[:] = -1
+            array.flush()
+            del array
+
+        # meta.json last, its presence marks a complete buffer
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'version': VERSION, 'capacity': capacity, 'n_scores': n_scores}, f)
+        return cls(path)
+
+    @classmethod
+    def open_or_create(cls, path: str, capacity: int, n_scores=32):
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            return cls(path)
+        return cls.create(path, capacity, n_scores)
+
+    def __len__(self):
+        return int(min(self.cursor[0], self.capacity))
+
+    def reserve(self, n: int):
+        # append numbers of n new slots, the only step that needs the cross process lock
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        try:
+            start = int(self.cursor[0])
+            self.cursor[0] = start + n
+        finally:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        return start
+
+    def add_position(self, board: Board, player: Player, valid_actions: dict = None, priority=1.0):
+        """
+        Append the position board is in with player to move and, if given, its Board.get_valid_actions scores.
+        Returns the slot, set the action played there with set_action. The outcome stays pending until finish_game.
+        """
+        seq = self.reserve(1)
+        slot = seq % self.capacity
+        # invalidate first: a concurrent finish_game for the overwritten game must not match
+        # and a concurrent sample must not pair the new position with the old outcome
+        self.seq[slot] = -1
+        self.outcome[slot] = OUTCOME_PENDING
+        self.bitboards[slot] = piece_bitboards(board)
+        self.state[slot] = (board.turn == Color.WHITE, board.castling, min(board.halfmove_clock, 0xffff), min(board.ply, 0xffff))
+        self.action[slot] = N_ACTIONS
+        self.priority[slot] = priority
+
+        self.score_index[slot] = N_ACTIONS
+        self.score_value[slot] = 0
+        if valid_actions is not None and self.n_scores:
+            col = 0 if player.color == Color.WHITE else 7
+            scored = [
+                (score, encode_move(piece.position, move) & 4095)
+                for piece, moves in valid_actions[ActionType.MOVE].items() for move, score in moves
+            ]
+            scored += [(score, encode_castle(col, king_side) & 4095) for king_side, score in valid_actions[ActionType.CASTLE].items()]
+            scored.sort(reverse=True)
+            scored = scored[:self.n_scores]
+            self.score_index[slot, :len(scored)] = [index for _, index in scored]
+            self.score_value[slot, :len(scored)] = [score for score, _ in scored]
+
+        self.seq[slot] = seq
+        self.game_slots.append((slot, seq))
+        return slot
+
+    def set_action(self, slot: int, action_code: int):
+        self.action[slot] = action_code & 4095
+
+    def finish_game(self, result: str | None):
+        # back-fill the outcome of every position appended since the last finish_game, skipping slots already overwritten
+        for slot, seq in self.game_slots:
+            if self.seq[slot] == seq:
+                self.outcome[slot] = outcome_for(result, bool(self.state[slot, STATE_WHITE_TO_MOVE]))
+        self.game_slots = []
+
+    def finished_slots(self):
+        n = len(self)
+        return np.flatnonzero(self.outcome[:n] != OUTCOME_PENDING)
+
+    def sample(self, batch_size: int, rng: np.random.Generator = None, alpha=0.0, beta=0.4):
+        """
+        Minibatch of finished positions. alpha=0 samples uniformly, otherwise proportional to priority ** alpha
+        with importance weights (N * p) ** -beta normalized to a maximum of 1.
+        Returns a dict of arrays: obs (B, N_PLANES, 8, 8), action, score_index, score_value, outcome, weight and slot,
+        pass slot back to update_priorities.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        slots, weight = self.pick(batch_size, rng, alpha, beta)
+        seq = self.seq[slots]
+        batch = self.read(slots)
+        # seqlock: a slot overwritten while it was copied has another seq (-1 while written) afterwards,
+        # its rows may mix two positions, draw them again until every row was copied whole
+        torn = np.flatnonzero((self.seq[slots] != seq) | (seq < 0) | (batch['outcome'] == OUTCOME_PENDING))
+        while len(torn):
+            slots[torn], weight[torn] = self.pick(len(torn), rng, alpha, beta)
+            seq[torn] = self.seq[slots[torn]]
+            for key, value in self.read(slots[torn]).items():
+                batch[key][torn] = value
+            torn = torn[(self.seq[slots[torn]] != seq[torn]) | (seq[torn] < 0) | (batch['outcome'][torn] == OUTCOME_PENDING)]
+
+        batch['outcome'] = batch['outcome'].astype(np.float32)
+        batch['weight'] = (weight / weight.max()).astype(np.float32)
+        batch['slot'] = slots
+        return batch
+
+    def pick(self, batch_size: int, rng: np.random.Generator, alpha: float, beta: float):
+        # finished slots drawn for sample, with their importance weights before normalization
+        slots = self.finished_slots()
+        if not len(slots):
+            raise ValueError("no finished positions to sample")
+
+        if alpha:
+            p = self.priority[slots].astype(np.float64) ** alpha
+            p /= p.sum()
+            picks = rng.choice(len(slots), size=batch_size, p=p)
+            weight = (len(slots) * p[picks]) ** -beta
+        else:
+            picks = rng.integers(len(slots), size=batch_size)
+            weight = np.ones(batch_size)
+        return slots[picks], weight
+
+    def read(self, slots: np.ndarray):
+        # copies of the fields of the given slots, outcome as stored
+        return {
+            'obs': self.planes(slots),
+            'action': self.action[slots].astype(np.int64),
+            'score_index': self.score_index[slots],
+            'score_value': self.score_value[slots],
+            'outcome': self.outcome[slots]
+        }
+
+    def planes(self, slots: np.ndarray):
+        # feature planes of chess.environment.encoding for the given slots
+        obs = np.empty((len(slots), N_PLANES, 8, 8), dtype=np.float32)
+        bitboards_to_planes(self.bitboards[slots], obs[:, :12])
+        state = self.state[slots]
+        scalars = np.empty((len(slots), N_PLANES - 12), dtype=np.float32)
+        scalars[:, 0] = state[:, STATE_WHITE_TO_MOVE]
+        for j, flag in enumerate(CASTLING_FLAGS):
+            scalars[:, 1 + j] = (state[:, STATE_CASTLING] & flag) != 0
+        scalars[:, 5] = state[:, STATE_HALFMOVE_CLOCK] / 100
+        scalars[:, 6] = (state[:, STATE_PLY] // 2 + 1) / 200
+        obs[:, 12:] = scalars[:, :, None, None]
+        return obs
+
+    def update_priorities(self, slots: np.ndarray, priorities: np.ndarray):
+        self.priority[slots] = priorities
+
+    def flush(self):
+        for array in (self.bitboards, self.state, self.action, self.score_index, self.score_value, self.outcome, self.priority, self.seq, self.cursor):
+            array.flush()
+
+    def close(self):
+        self.flush()
+        self.lock_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,165 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.tablebase import Tablebase
+from chess.game.game import Game
+from chess.game.agent_random import AgentRandom
+from chess.game.record import GameRecordWriter
+from chess.game.replay_buffer import ReplayBuffer
+from chess.game.opening_book import OpeningBook
+from multiprocessing import Pool
+import argparse
+import os
+import random
+import time
+
+def game_seed(seed: int, game_idx: int):
+    # per game seed derived from the run seed, results do not depend on which worker picks the game up
+    return seed * 1_000_003 + game_idx
+
+_record_writers = {} # record dir -> writer of this process, one archive file per worker
+
+def _get_record_writer(record_dir: str):
+    if record_dir not in _record_writers:
+        _record_writers[record_dir] = GameRecordWriter(os.path.join(record_dir, f"selfplay-{os.getpid()}.bin"))
+    return _record_writers[record_dir]
+
+_replay_buffers = {} # replay dir -> this process's handle on the shared buffer
+
+def _get_replay_buffer(replay_dir: str):
+    if replay_dir not in _replay_buffers:
+        _replay_buffers[replay_dir] = ReplayBuffer(replay_dir)
+    return _replay_buffers[replay_dir]
+
+_tablebases = {} # tablebase dir -> this process's maps of the tables
+
+def _get_tablebase(tablebase_dir: str):
+    if tablebase_dir not in _tablebases:
+        _tablebases[tablebase_dir] = Tablebase(tablebase_dir)
+    return _tablebases[tablebase_dir]
+
+_books = {} # book path -> this process's map of the book
+
+def _get_book(book_path: str):
+    if book_path not in _books:
+        _books[book_path] = OpeningBook(book_path)
+    return _books[book_path]
+
+def play_game(
+    seed: int, board_class: type[Board] = BitBoard, max_turns=None, record_dir=None, replay_dir=None, tablebase_dir=None,
+    book_path=None
+):
+    random.seed(seed)
+    record_writer = _get_record_writer(record_dir) if record_dir else None
+    replay_buffer = _get_replay_buffer(replay_dir) if replay_dir else None
+    tablebase = _get_tablebase(tablebase_dir) if tablebase_dir else None
+    book = _get_book(book_path) if book_path else None
+    game = Game(
+        AgentRandom('P1', book), AgentRandom('P2', book), display_board=False, board_class=board_class,
+        verbose=False, max_turns=max_turns, record_writer=record_writer, seed=seed, replay_buffer=replay_buffer,
+        tablebase=tablebase
+    )
+
+    time_start = time.perf_counter()
+    game.gameplay_loop()
+    if record_writer:
+        record_writer.flush() # pool workers are terminated, not shut down, so never leave a game in the buffer
+    return {
+        'seed': seed,
+        'result': game.result(),
+        'n_turns': game.n_turns,
+        'seconds': time.perf_counter() - time_start
+    }
+
+def _play_game_task(args):
+    return play_game(*args)
+
+def _init_worker(seed: int):
+    # games reseed themselves, this only keeps anything else drawing from random in a worker reproducible
+    random.seed(seed)
+
+
+class SelfPlayStats:
+    def __init__(self):
+        self.n_games = 0
+        self.n_turns = 0
+        self.results = {'white': 0, 'black': 0, 'draw': 0, 'stalemate': 0}
+        self.time_start = time.perf_counter()
+
+    def update(self, result: dict):
+        self.n_games += 1
+        self.n_turns += result['n_turns']
+        self.results[result['result']] += 1
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.time_start
+        return {
+            'games': self.n_games,
+            'plies': self.n_turns,
+            'seconds': elapsed,
+            'games_per_sec': self.n_games / elapsed if elapsed else 0.0,
+            'plies_per_sec': self.n_turns / elapsed if elapsed else 0.0,
+            **{k: v / self.n_games if self.n_games else 0.0 for k, v in self.results.items()}
+        }
+
+
+def run_selfplay(
+    n_games: int, n_workers=None, seed=0, board_class: type[Board] = BitBoard, max_turns=None,
+    stats: SelfPlayStats = None, record_dir=None, replay_dir=None, replay_capacity=1_000_000,
+    tablebase_dir=None, book_path=None
+):
+    """
+    Play n_games of AgentRandom vs AgentRandom with all printing off across a process pool.
+    Yields one result dict per finished game as soon as it is done (completion order, not game order).
+    Pass a SelfPlayStats to follow aggregate throughput and the result split while results stream in.
+    With record_dir set every worker appends its games to its own binary archive in that directory (see chess.game.record).
+    With replay_dir set all workers append their positions to one shared replay buffer there (see chess.game.replay_buffer),
+    created with replay_capacity positions if it does not exist yet.
+    With tablebase_dir set games end as soon as they reach an endgame the tables there cover (see chess.environment.tablebase).
+    With book_path set both agents open from that opening book (see chess.game.opening_book).
+    """
+    stats = stats if stats is not None else SelfPlayStats()
+    if replay_dir:
+        ReplayBuffer.open_or_create(replay_dir, replay_capacity).close()
+    tasks = [(game_seed(seed, i), board_class, max_turns, record_dir, replay_dir, tablebase_dir, book_path) for i in range(n_games)]
+
+    if n_workers == 1:
+        for task in tasks:
+            result = _play_game_task(task)
+            stats.update(result)
+            yield result
+        return
+
+    # a few chunks per worker keeps the pool busy without holding results back for long
+    chunksize = max(1, min(64, n_games // (4 * (n_workers or os.cpu_count() or 1))))
+    with Pool(n_workers, initializer=_init_worker, initargs=(seed,)) as pool:
+        for result in pool.imap_unordered(_play_game_task, tasks, chunksize=chunksize):
+            stats.update(result)
+            yield result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='headless random agent self-play')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of cpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=None)
+    parser.add_argument('--board', choices=['bitboard', 'list'], default='bitboard')
+    parser.add_argument('--report-every', type=int, default=100)
+    parser.add_argument('--record-dir', default=None, help='write binary game archives here')
+    parser.add_argument('--replay-dir', default=None, help='append positions to the replay buffer here')
+    parser.add_argument('--replay-capacity', type=int, default=1_000_000)
+    parser.add_argument('--tablebase-dir', default=None, help='adjudicate endgames covered by the tablebases here')
+    parser.add_argument('--book', default=None, help='open from this opening book')
+    args = parser.parse_args()
+
+    stats = SelfPlayStats()
+    board_class = BitBoard if args.board == 'bitboard' else Board
+    for result in run_selfplay(
+        args.games, args.workers, args.seed, board_class, args.max_turns, stats, args.record_dir, args.replay_dir, args.replay_capacity,
+        args.tablebase_dir, args.book
+    ):
+        if stats.n_games % args.report_every == 0:
+            print(stats.summary(), flush=True)
+
+    if stats.n_games % args.report_every:
+        print(stats.summary())
@@ -0,0 +1,376 @@
+from abc import ABC, abstractmethod
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.fen import board_to_fen
+from chess.game.agent import Agent
+from chess.game.agent_random import AgentRandom
+from chess.game.agents import AGENTS
+from chess.game.game import Game
+import argparse
+import asyncio
+import itertools
+import json
+import threading
+
+# line protocol between the server and remote agents, one JSON object per line:
+#   client -> server  {"op": "hello", "name": str, "capacity": int}           once, capacity = move requests it takes at once
+#   server -> client  {"op": "move", "id": int, "game": int, "fen": str, "moves": [int], "timeout": float}
+#   client -> server  {"op": "move", "id": int, "move": int}                  16 bit move code (utils.encode_move)
+#   server -> client  {"op": "result", "game": int, "result": str | None}     the game is over, its state can go
+# moves is the whole game from the start position, so clients can keep the repetition history, fen is for those that cannot
+
+async def send(writer: asyncio.StreamWriter, message: dict):
+    # drain makes a slow reader push back on the sender instead of piling up in the transport buffer
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+
+
+class AsyncAgent(Agent, ABC):
+    """
+    Agent whose move is awaited, for GameServer. choose_move() returns the move code for self.player on self.board
+    without playing it, the server checks it is legal and plays it. act() keeps it usable in a plain Game.
+    """
+    @abstractmethod
+    async def choose_move(self):
+        pass
+
+    def act(self):
+        self.play_code(asyncio.run(self.choose_move()))
+
+
+class ExecutorAgent(AsyncAgent):
+    """
+    Runs a plain agent for GameServer: its act() runs in the loop's default executor on a private board,
+    caught up with the game's moves, and the code it played there is returned as the move.
+    The game board is only touched on the loop, so a search outliving its move timeout plays on its own board
+    and its late move is dropped. The wrapped agent is closed once no search of it is running.
+    """
+    def __init__(self, agent: Agent, board_class: type[Board] = BitBoard, tablebase=None):
+        super().__init__(agent.name)
+        self.agent = agent
+        self.board_class = board_class
+        self.tablebase = tablebase
+        self.game_moves = None # Game.move_codes of the game played
+        self.played = [] # codes on the private board
+        self.lock = threading.Lock()
+        self.searching = False
+        self.closing = False
+
+    def search(self, codes: list[int]):
+        try:
+            agent = self.agent
+            if not self.played:
+                agent.board = self.board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+                agent.board.tablebase = self.tablebase
+            board = agent.board
+            for code in codes[len(self.played):]:
+                board.make_move_code(code)
+            agent.player = board.get_player(board.turn)
+            agent.act()
+            code = board.last_move_code()
+            self.played = codes + [code]
+            return code
+        finally:
+            with self.lock:
+                self.searching = False
+                if self.closing:
+                    self.agent.close()
+
+    async def choose_move(self):
+        with self.lock:
+            self.searching = True
+        return await asyncio.get_running_loop().run_in_executor(None, self.search, list(self.game_moves))
+
+    def close(self):
+        with self.lock:
+            self.closing = True
+            if not self.searching:
+                self.agent.close()
+
+
+class RemoteClient:
+    # server side of a connected remote agent, at most capacity move requests are in flight at once
+    def __init__(self, name: str, capacity: int, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.slots = asyncio.Semaphore(capacity)
+        self.pending = {} # request id -> future of the move code
+        self.request_ids = itertools.count()
+        self.closed = False
+
+    async def request_move(self, message: dict):
+        async with self.slots:
+            if self.closed:
+                raise ConnectionError(f"{self.name} disconnected")
+            request_id = next(self.request_ids)
+            future = asyncio.get_running_loop().create_future()
+            self.pending[request_id] = future
+            try:
+                await send(self.writer, {'op': 'move', 'id': request_id, **message})
+                return await future
+            finally:
+                # a timed out request is dropped here, a late reply finds nothing to resolve
+                self.pending.pop(request_id, None)
+
+    async def read_replies(self):
+        try:
+            while line := await self.reader.readline():
+                message = json.loads(line)
+                future = self.pending.get(message.get('id'))
+                if message.get('op') == 'move' and future is not None and not future.done():
+                    future.set_result(message['move'])
+        finally:
+            self.closed = True
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"{self.name} disconnected"))
+            self.writer.close()
+
+
+class RemoteAgent(AsyncAgent):
+    """
+    Plays through the remote client that connected to the server under engine, see run_client.
+    GameServer.play_game waits for that client before the game starts.
+    """
+    def __init__(self, name: str, engine: str):
+        super().__init__(name)
+        self.engine = engine
+        self.client = None
+        self.game_id = None
+        self.game_moves = None # Game.move_codes of the game played
+        self.timeout = None
+
+    async def choose_move(self):
+        return await self.client.request_move({
+            'game': self.game_id, 'fen': board_to_fen(self.board), 'moves': self.game_moves, 'timeout': self.timeout
+        })
+
+
+class GameServer:
+    """
+    Hosts many games in one asyncio event loop, interleaving them whenever an agent is waited on.
+
+    Agents are plain Agents, run through ExecutorAgent so their act() is off the loop, AsyncAgents, whose choose_move() is awaited,
+    or RemoteAgents answered by client processes connected over a unix socket (path) or TCP (port), see run_client.
+    A move that takes longer than move_timeout seconds, is illegal or is lost with a disconnect forfeits the game.
+    At most max_games games run at once, further play_game calls wait for a free slot, and every remote client
+    gets at most as many move requests as the capacity it announced, so a slow client backs up its own games only.
+    Games follow Game (board_class, max_turns, record_writer, tablebase), results are Game.result plus termination.
+    Interleaved games draw from one random module, so unlike selfplay a seed does not replay a game.
+    """
+    def __init__(
+        self, path=None, host='127.0.0.1', port=None, max_games=1000, move_timeout=10.0,
+        board_class: type[Board] = BitBoard, max_turns=None, record_writer=None, tablebase=None
+    ):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.move_timeout = move_timeout
+        self.board_class = board_class
+        self.max_turns = max_turns
+        self.record_writer = record_writer
+        self.tablebase = tablebase
+        self.game_slots = asyncio.Semaphore(max_games)
+        self.game_ids = itertools.count()
+        self.clients = {} # engine name -> RemoteClient
+        self.client_connected = {} # engine name -> asyncio.Event
+        self.client_tasks = set() # connection handlers, awaited on close
+        self.server = None
+        self.n_active = 0
+
+    async def start(self):
+        if self.path:
+            self.server = await asyncio.start_unix_server(self.handle_client, self.path)
+        elif self.port is not None:
+            self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1] # port=0 picks a free one
+        return self
+
+    async def close(self):
+        for client in self.clients.values():
+            client.writer.close()
+        # closed writers end the handlers' reads, wait for them so none is cancelled with the loop
+        await asyncio.gather(*self.client_tasks, return_exceptions=True)
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hello = json.loads(await reader.readline() or b'{}')
+        if hello.get('op') != 'hello' or not hello.get('name'):
+            writer.close()
+            return
+        client = RemoteClient(hello['name'], max(1, int(hello.get('capacity', 1))), reader, writer)
+        self.client_tasks.add(asyncio.current_task())
+        self.clients[client.name] = client
+        self.client_connected.setdefault(client.name, asyncio.Event()).set()
+        try:
+            await client.read_replies()
+        finally:
+            if self.clients.get(client.name) is client:
+                del self.clients[client.name]
+                self.client_connected[client.name].clear()
+            self.client_tasks.discard(asyncio.current_task())
+
+    async def engine(self, name: str):
+        # the connected client of an engine, waiting for it to connect
+        while name not in self.clients:
+            await self.client_connected.setdefault(name, asyncio.Event()).wait()
+        return self.clients[name]
+
+    async def play_game(self, agent_white: Agent, agent_black: Agent, seed=0):
+        async with self.game_slots:
+            game_id = next(self.game_ids)
+            # plain agents search off the loop on a board of their own, so the loop keeps serving the other games
+            agent_white, agent_black = (
+                agent if isinstance(agent, AsyncAgent) else ExecutorAgent(agent, self.board_class, self.tablebase)
+                for agent in (agent_white, agent_black)
+            )
+            game = Game(
+                agent_white, agent_black, display_board=False, board_class=self.board_class, verbose=False,
+                max_turns=self.max_turns, record_writer=self.record_writer, seed=seed, tablebase=self.tablebase
+            )
+            for agent in game.agents:
+                if isinstance(agent, RemoteAgent):
+                    agent.client = await self.engine(agent.engine)
+                    agent.game_id, agent.game_moves, agent.timeout = game_id, game.move_codes, self.move_timeout
+                elif isinstance(agent, ExecutorAgent):
+                    agent.game_moves = game.move_codes
+
+            self.n_active += 1
+            try:
+                while game.start_turn():
+                    agent = game.agents[game.n_turns % 2]
+                    try:
+                        code = await asyncio.wait_for(agent.choose_move(), self.move_timeout)
+                    except asyncio.TimeoutError:
+                        game.forfeit(agent, 'timeout')
+                        break
+                    except ConnectionError:
+                        game.forfeit(agent, 'disconnect')
+                        break
+                    if code not in game.board.generate_legal_move_codes(agent.player):
+                        game.forfeit(agent, 'illegal move')
+                        break
+                    agent.play_code(code)
+                    game.end_turn()
+                game.finish()
+            finally:
+                self.n_active -= 1
+
+            for agent in game.agents:
+                if isinstance(agent, RemoteAgent) and not agent.client.closed:
+                    await send(agent.client.writer, {'op': 'result', 'game': game_id, 'result': game.result()})
+            return {
+                'game': game_id,
+                'seed': seed,
+                'white': agent_white.name,
+                'black': agent_black.name,
+                'result': game.result(),
+                'termination': game.termination,
+                'n_turns': game.n_turns,
+                'moves': game.move_codes
+            }
+
+    async def run_games(self, pairings, seed=0):
+        # play (white, black) agent pairs concurrently, results in pairing order
+        return await asyncio.gather(*[
+            self.play_game(white, black, seed * 1_000_003 + i) for i, (white, black) in enumerate(pairings)
+        ])
+
+
+async def run_client(
+    name: str, agent_class: type[Agent] = AgentRandom, agent_kwargs: dict = None, path=None, host='127.0.0.1', port=None,
+    capacity=1, board_class: type[Board] = BitBoard
+):
+    """
+    Serve move requests of a GameServer with agent_class(name, **agent_kwargs), one agent and board per game.
+    Up to capacity requests are computed at once in the default executor. Returns when the server closes the connection.
+    """
+    if path:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    await send(writer, {'op': 'hello', 'name': name, 'capacity': capacity})
+    loop = asyncio.get_running_loop()
+    games = {} # game id -> [board, agent, codes on the board]
+    tasks = set()
+
+    def choose(state: list, codes: list[int]):
+        # catch the game board up with the moves since the last request, let the agent play and take its move back
+        board, agent, played = state
+        for code in codes[len(played):]:
+            board.make_move_code(code)
+        agent.player = board.get_player(board.turn)
+        agent.act()
+        code = board.last_move_code()
+        state[2] = codes + [code]
+        return code
+
+    async def answer(message: dict):
+        if message['game'] not in games:
+            board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+            agent = agent_class(name, **(agent_kwargs or {}))
+            agent.board = board
+            games[message['game']] = [board, agent, []]
+        code = await loop.run_in_executor(None, choose, games[message['game']], message['moves'])
+        await send(writer, {'op': 'move', 'id': message['id'], 'move': code})
+
+    while line := await reader.readline():
+        message = json.loads(line)
+        if message['op'] == 'move':
+            task = asyncio.create_task(answer(message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        elif message['op'] == 'result':
+            games.pop(message['game'], None)
+    writer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='asyncio game server and remote agent client')
+    parser.add_argument('mode', choices=['serve', 'client'])
+    parser.add_argument('--socket', default=None, help='unix socket path, otherwise TCP on --host/--port')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--games', type=int, default=100, help='serve: games to play')
+    parser.add_argument('--white', default='random', help='serve: agent name or remote:<engine>')
+    parser.add_argument('--black', default='random', help='serve: agent name or remote:<engine>')
+    parser.add_argument('--max-games', type=int, default=1000)
+    parser.add_argument('--move-timeout', type=float, default=10.0)
+    parser.add_argument('--max-turns', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--name', default='engine', help='client: engine name games refer to')
+    parser.add_argument('--agent', choices=list(AGENTS), default='random', help='client: agent answering the requests')
+    parser.add_argument('--capacity', type=int, default=1, help='client: move requests taken at once')
+    args = parser.parse_args()
+
+    def make_agent(spec: str, name: str):
+        return RemoteAgent(name, spec[len('remote:'):]) if spec.startswith('remote:') else AGENTS[spec](name)
+
+    async def serve():
+        server = GameServer(
+            args.socket, args.host, None if args.socket else args.port, args.max_games, args.move_timeout, max_turns=args.max_turns
+        )
+        async with server:
+            pairings = [(make_agent(args.white, 'white'), make_agent(args.black, 'black')) for _ in range(args.games)]
+            results = await server.run_games(pairings, args.seed)
+        counts = {}
+        for result in results:
+            key = result['result'] if result['termination'] is None else f"{result['result']} ({result['termination']})"
+            counts[key] = counts.get(key, 0) + 1
+        print(f"{len(results)} games: {counts}")
+
+    if args.mode == 'serve':
+        asyncio.run(serve())
+    else:
+        asyncio.run(run_client(args.name, AGENTS[args.agent], path=args.socket, host=args.host, port=args.port, capacity=args.capacity))
@@ -0,0 +1,297 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.game.agent import Agent
+from chess.game.agents import AGENTS
+from chess.game.game import Game
+from chess.game.selfplay import game_seed
+from collections import deque
+from multiprocessing import Pool
+from statistics import NormalDist
+import argparse
+import ast
+import math
+import os
+import queue
+import random
+
+def expected_score(elo: float):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+def elo_from_score(score: float):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+def score_stats(wins: float, draws: float, losses: float):
+    # mean and per game variance of the score (1 / 0.5 / 0), half a game of each kind keeps short one sided runs from zero variance
+    n = wins + draws + losses
+    score = (wins + 0.5 * draws) / n
+    w, d, l = wins + 0.5, draws + 0.5, losses + 0.5
+    variance = (w * (1 - score) ** 2 + d * (0.5 - score) ** 2 + l * score ** 2) / (w + d + l)
+    return score, variance
+
+def elo_estimate(wins: int, draws: int, losses: int, confidence=0.95):
+    """
+    Elo difference of the player scoring wins/draws/losses with a normal approximation confidence interval,
+    returns (elo, low, high), all 0 without games.
+    """
+    n = wins + draws + losses
+    if not n:
+        return 0.0, 0.0, 0.0
+    score, variance = score_stats(wins, draws, losses)
+    margin = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(variance / n)
+    return elo_from_score(score), elo_from_score(score - margin), elo_from_score(score + margin)
+
+
+class SPRT:
+    """
+    Sequential probability ratio test of H0: elo = elo0 against H1: elo = elo1 for the first player of a pair,
+    with error rates alpha (accepting H1 when H0 holds) and beta (the reverse).
+    The log likelihood ratio uses the normal approximation of the game scores with their observed variance.
+    status() is 'H1' or 'H0' once a bound is crossed, None while undecided.
+    """
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def llr(self, wins: int, draws: int, losses: int):
+        n = wins + draws + losses
+        if not n:
+            return 0.0
+        score, variance = score_stats(wins, draws, losses)
+        s0, s1 = expected_score(self.elo0), expected_score(self.elo1)
+        return n * (s1 - s0) * (2 * score - s0 - s1) / (2 * variance)
+
+    def status(self, wins: int, draws: int, losses: int):
+        llr = self.llr(wins, draws, losses)
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+
+class Entrant:
+    # an agent configuration taking part, agent_class(name, **kwargs) is built fresh for every game
+    def __init__(self, name: str, agent_class: type[Agent], kwargs: dict = None):
+        self.name = name
+        self.agent_class = agent_class
+        self.kwargs = kwargs or {}
+
+    def make(self):
+        return self.agent_class(self.name, **self.kwargs)
+
+    def __repr__(self):
+        return f"Entrant({self.name})"
+
+
+class PairStats:
+    # results of a pair from the point of view of the first entrant
+    def __init__(self, first: int, second: int):
+        self.first = first
+        self.second = second
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.white_score = 0.0 # of the first entrant, with white only
+        self.white_games = 0
+        self.decided = None # SPRT status once decided
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def update(self, score: float, first_white: bool):
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        if first_white:
+            self.white_score += score
+            self.white_games += 1
+
+    def elo(self, confidence=0.95):
+        return elo_estimate(self.wins, self.draws, self.losses, confidence)
+
+
+def schedule(n_entrants: int, games_per_pair: int, kind='round_robin'):
+    """
+    (white, black) entrant indices of every game, pairs alternate colors game by game and are interleaved
+    so early results cover every pair. round_robin pairs everyone, gauntlet pairs entrant 0 with each of the others.
+    """
+    if kind == 'round_robin':
+        pairs = [(i, j) for i in range(n_entrants) for j in range(i + 1, n_entrants)]
+    elif kind == 'gauntlet':
+        pairs = [(0, j) for j in range(1, n_entrants)]
+    else:
+        raise ValueError(f"unknown schedule {kind}")
+    return [(i, j) if k % 2 == 0 else (j, i) for k in range(games_per_pair) for i, j in pairs]
+
+def score_of(result: str | None, white: bool):
+    # 1 / 0.5 / 0 for the white or black side, stalemates and unfinished games count as draws
+    if result == 'white':
+        return 1.0 if white else 0.0
+    if result == 'black':
+        return 0.0 if white else 1.0
+    return 0.5
+
+def play_match_game(entrants: list[Entrant], white: int, black: int, seed: int, board_class: type[Board] = BitBoard, max_turns=None):
+    random.seed(seed)
+    game = Game(
+        entrants[white].make(), entrants[black].make(), display_board=False, board_class=board_class,
+        verbose=False, max_turns=max_turns, seed=seed
+    )
+    game.gameplay_loop()
+    return {'white': white, 'black': black, 'seed': seed, 'result': game.result(), 'n_turns': game.n_turns}
+
+_entrants = None # the entrant list of a pool worker, sent once by the initializer
+
+def _init_worker(entrants: list[Entrant]):
+    global _entrants
+    _entrants = entrants
+
+def _play_task(args):
+    return play_match_game(_entrants, *args)
+
+
+class Tournament:
+    """
+    Plays a schedule of games between entrants and keeps per pair results, Elo with confidence intervals and standings.
+
+    Games run in an n_workers process pool (inline with n_workers=1), at most 2 * n_workers at a time so results
+    feed back while the schedule is played. With an SPRT, each pair stops getting games once the test decides
+    whether its first entrant (the challenger of a gauntlet) is elo1 rather than elo0 stronger,
+    already running games of the pair still count.
+    """
+    def __init__(
+        self, entrants: list[Entrant], games_per_pair=10, kind='round_robin', sprt: SPRT = None,
+        n_workers=None, seed=0, board_class: type[Board] = BitBoard, max_turns=None
+    ):
+        self.entrants = entrants
+        self.sprt = sprt
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.board_class = board_class
+        self.max_turns = max_turns
+        self.games = schedule(len(entrants), games_per_pair, kind)
+        self.seeds = [game_seed(seed, i) for i in range(len(self.games))]
+        self.pairs = {}
+        for white, black in self.games:
+            key = (min(white, black), max(white, black))
+            self.pairs.setdefault(key, PairStats(*key))
+        self.results = []
+
+    def pair(self, white: int, black: int):
+        return self.pairs[(min(white, black), max(white, black))]
+
+    def update(self, result: dict):
+        self.results.append(result)
+        pair = self.pair(result['white'], result['black'])
+        first_white = result['white'] == pair.first
+        pair.update(score_of(result['result'], first_white), first_white)
+        if self.sprt and pair.decided is None:
+            pair.decided = self.sprt.status(pair.wins, pair.draws, pair.losses)
+
+    def run(self):
+        # yields each game result as it comes in, stats are updated before it is yielded
+        tasks = deque(
+            (white, black, seed, self.board_class, self.max_turns) for (white, black), seed in zip(self.games, self.seeds)
+        )
+        if self.n_workers == 1:
+            while tasks:
+                task = tasks.popleft()
+                if self.pair(task[0], task[1]).decided is None:
+                    result = play_match_game(self.entrants, *task)
+                    self.update(result)
+                    yield result
+            return
+
+        done = queue.Queue()
+        with Pool(self.n_workers, initializer=_init_worker, initargs=(self.entrants,)) as pool:
+            in_flight = 0
+            while tasks or in_flight:
+                while tasks and in_flight < 2 * self.n_workers:
+                    task = tasks.popleft()
+                    if self.pair(task[0], task[1]).decided is None:
+                        pool.apply_async(_play_task, (task,), callback=done.put, error_callback=done.put)
+                        in_flight += 1
+                if not in_flight:
+                    break
+                result = done.get()
+                in_flight -= 1
+                if isinstance(result, BaseException):
+                    raise result
+                self.update(result)
+                yield result
+
+    def standings(self, confidence=0.95):
+        # per entrant score over all its games and the Elo that score is worth against its opponents on average
+        rows = []
+        for idx, entrant in enumerate(self.entrants):
+            wins = draws = losses = 0
+            for pair in self.pairs.values():
+                if pair.first == idx:
+                    wins, draws, losses = wins + pair.wins, draws + pair.draws, losses + pair.losses
+                elif pair.second == idx:
+                    wins, draws, losses = wins + pair.losses, draws + pair.draws, losses + pair.wins
+            elo, low, high = elo_estimate(wins, draws, losses, confidence)
+            games = wins + draws + losses
+            rows.append({
+                'name': entrant.name, 'games': games, 'wins': wins, 'draws': draws, 'losses': losses,
+                'score': (wins + 0.5 * draws) / games if games else 0.0, 'elo': elo, 'elo_low': low, 'elo_high': high
+            })
+        return sorted(rows, key=lambda row: -row['score'])
+
+    def report(self, confidence=0.95):
+        lines = [f"{'entrant':<28} {'games':>6} {'+':>5} {'=':>5} {'-':>5} {'score':>6} {'elo':>18}"]
+        for row in self.standings(confidence):
+            lines.append(
+                f"{row['name']:<28} {row['games']:>6} {row['wins']:>5} {row['draws']:>5} {row['losses']:>5} "
+                f"{row['score']:>6.3f} {row['elo']:>7.0f} [{row['elo_low']:.0f}, {row['elo_high']:.0f}]"
+            )
+        lines.append('')
+        for pair in self.pairs.values():
+            elo, low, high = pair.elo(confidence)
+            first, second = self.entrants[pair.first].name, self.entrants[pair.second].name
+            sprt = f", SPRT {pair.decided or 'undecided'} (llr {self.sprt.llr(pair.wins, pair.draws, pair.losses):.2f})" if self.sprt else ''
+            lines.append(
+                f"{first} vs {second}: +{pair.wins} ={pair.draws} -{pair.losses}, "
+                f"elo {elo:.0f} [{low:.0f}, {high:.0f}]{sprt}"
+            )
+        return '\n'.join(lines)
+
+
+def parse_entrant(spec: str):
+    # agent[:key=value,...], e.g. alphabeta:max_depth=3,time_limit=0.5, values are Python literals
+    name, _, params = spec.partition(':')
+    kwargs = {}
+    for param in filter(None, params.split(',')):
+        key, value = param.split('=', 1)
+        kwargs[key] = ast.literal_eval(value)
+    return Entrant(spec, AGENTS[name], kwargs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='round robin or gauntlet tournament between agent configurations')
+    parser.add_argument('agents', nargs='+', help='agent[:key=value,...], the first one is the gauntlet challenger')
+    parser.add_argument('--games', type=int, default=20, help='games per pair')
+    parser.add_argument('--schedule', choices=['round_robin', 'gauntlet'], default='round_robin')
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of cpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=300)
+    parser.add_argument('--sprt', type=float, nargs=2, default=None, metavar=('ELO0', 'ELO1'), help='stop a pair once decided')
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--report-every', type=int, default=10)
+    args = parser.parse_args()
+
+    tournament = Tournament(
+        [parse_entrant(spec) for spec in args.agents], args.games, args.schedule,
+        SPRT(*args.sprt, args.alpha, args.beta) if args.sprt else None, args.workers, args.seed, max_turns=args.max_turns
+    )
+    for result in tournament.run():
+        if len(tournament.results) % args.report_every == 0:
+            print(f"{len(tournament.results)}/{len(tournament.games)} games", flush=True)
+    print(tournament.report())
@@ -0,0 +1,144 @@
+from array import array
+from enum import Enum
+from multiprocessing import shared_memory
+import struct
+
+class Bound(Enum):
+    EXACT = 1
+    LOWER = 2 # fail high, value is a lower bound
+    UPPER = 3 # fail low, value is an upper bound
+
+# key (8) + value (8) + depth (1) + bound (1) + move (2)
+ENTRY_BYTES = 20
+
+class TranspositionTable:
+    """
+    Fixed size table keyed by Board.hash. Entries live in flat typed arrays so the memory budget is exact.
+    Each bucket holds two slots: a depth-preferred slot that is only overwritten by searches at least as deep,
+    and an always-replace slot that takes everything else.
+    Moves are stored as 16 bit codes chosen by the caller, 0 meaning no move.
+    """
+    def __init__(self, size_mb=16):
+        self.size_mb = size_mb
+        self.n_buckets = max(1, size_mb * 1024 * 1024 // (2 * ENTRY_BYTES))
+        n_slots = 2 * self.n_buckets
+        self.keys = array('Q', bytes(8 * n_slots))
+        self.values = array('d', bytes(8 * n_slots))
+        self.depths = array('b', bytes(n_slots))
+        self.bounds = array('B', bytes(n_slots)) # 0 marks an empty slot
+        self.moves = array('H', bytes(2 * n_slots))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(1 for bound in self.bounds if bound)
+
+    def clear(self):
+        self.__init__(self.size_mb)
+
+    def probe(self, key: int):
+        # (depth, value, bound, move) stored for key, None if it is not in the table
+        slot = 2 * (key % self.n_buckets)
+        for slot in (slot, slot + 1):
+            if self.bounds[slot] and self.keys[slot] == key:
+                self.hits += 1
+                return self.depths[slot], self.values[slot], Bound(self.bounds[slot]), self.moves[slot]
+
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, value: float, bound: Bound, move=0):
+        slot = 2 * (key % self.n_buckets)
+        if self.bounds[slot] and self.keys[slot] != key and self.depths[slot] > depth:
+            slot += 1
+
+        # keep the best move of a shallower result when the new one has none
+        if not move and self.keys[slot] == key and self.bounds[slot]:
+            move = self.moves[slot]
+
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.depths[slot] = max(-128, min(127, depth))
+        self.bounds[slot] = bound.value
+        self.moves[slot] = move
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """
+    TranspositionTable laid out in one multiprocessing.shared_memory block so worker processes search into the same table.
+    Create it once with name=None and attach in the workers with the creator's name and size_mb.
+    Slots are written without locks. The stored key is xor-ed with the rest of the entry, so a slot torn by
+    concurrent writers fails the key check on probe and reads as a miss instead of a mixed up entry.
+    The creator owns the block and unlinks it in close().
+    """
+    def __init__(self, size_mb=16, name: str = None):
+        self.size_mb = size_mb
+        self.n_buckets = max(1, size_mb * 1024 * 1024 // (2 * ENTRY_BYTES))
+        n_slots = 2 * self.n_buckets
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=ENTRY_BYTES * n_slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        # widest fields first so every view stays aligned
+        self.views = []
+        for start, end, fmt in [(0, 8, 'Q'), (8, 16, 'd'), (16, 18, 'H'), (18, 19, 'b'), (19, 20, 'B')]:
+            view = self.shm.buf[start * n_slots:end * n_slots]
+            self.views += [view, view.cast(fmt)]
+        self.keys, self.values, self.moves, self.depths, self.bounds = self.views[1::2]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def check(value: float, depth: int, bound: int, move: int):
+        return struct.unpack('<Q', struct.pack('<d', value))[0] ^ (depth & 0xff) ^ (bound << 8) ^ (move << 16)
+
+    def clear(self):
+        self.shm.buf[:] = bytes(len(self.shm.buf))
+
+    def probe(self, key: int):
+        slot = 2 * (key % self.n_buckets)
+        for slot in (slot, slot + 1):
+            bound = self.bounds[slot]
+            if bound:
+                value, depth, move = self.values[slot], self.depths[slot], self.moves[slot]
+                if self.keys[slot] ^ self.check(value, depth, bound, move) == key:
+                    self.hits += 1
+                    return depth, value, Bound(bound), move
+
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, value: float, bound: Bound, move=0):
+        slot = 2 * (key % self.n_buckets)
+        stored = self.probe_slot(slot)
+        if stored is not None and stored[0] != key and stored[1] > depth:
+            slot += 1
+            stored = self.probe_slot(slot)
+
+        if not move and stored is not None and stored[0] == key:
+            move = stored[2]
+
+        depth = max(-128, min(127, depth))
+        self.values[slot] = value
+        self.depths[slot] = depth
+        self.bounds[slot] = bound.value
+        self.moves[slot] = move
+        self.keys[slot] = key ^ self.check(value, depth, bound.value, move)
+
+    def probe_slot(self, slot: int):
+        # (key, depth, move) of a consistent slot, None if it is empty or torn
+        bound = self.bounds[slot]
+        if not bound:
+            return None
+        value, depth, move = self.values[slot], self.depths[slot], self.moves[slot]
+        return self.keys[slot] ^ self.check(value, depth, bound, move), depth, move
+
+    def close(self):
+        for view in reversed(self.views):
+            view.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
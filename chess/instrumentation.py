@@ -0,0 +1,205 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.game.agent import Agent
+from chess.game.game import Game
+from chess.game.selfplay import run_selfplay
+import argparse
+import cProfile
+import functools
+import json
+import time
+
+# Board methods timed when instrumentation is on, True where the result length is counted (moves per call)
+BOARD_HOT_PATHS = {
+    'get_valid_actions': False,
+    'get_legal_moves': True,
+    'generate_legal_moves': True,
+    'get_valid_moves': True,
+    'get_attack_options': False,
+    'can_castle': False,
+    'has_checked': False,
+    'has_checkmated': False,
+    'is_stalemate': False,
+    'make_move': False,
+    'make_castle': False,
+    'unmake_move': False
+}
+LEGALITY_CHECKS = ('generate_legal_moves', 'can_castle')
+
+def subclasses(cls: type):
+    out = [cls]
+    for subclass in cls.__subclasses__():
+        out += subclasses(subclass)
+    return out
+
+
+class Instrumentation:
+    """
+    Opt-in timing of the Board hot paths, agent act() calls and whole games.
+    enable() swaps timing wrappers into the classes and disable() puts the original functions back,
+    so nothing is wrapped and nothing is paid while it is off. Use it as a context manager around the games to measure.
+
+    Every game played while enabled gets its own report in games, timed from its first Game.start_turn to Game.finish,
+    so games driven turn by turn (chess.game.server) are covered as well as gameplay_loop. Games interleaved in one
+    process share the method counters, their reports count each other's calls. report() aggregates all of them:
+    time per ply, nodes/sec (positions made with make_move/make_castle), average branching factor
+    (legal moves per generate_legal_moves call), the share of time in legality checks and per method calls/times.
+    Method times are inclusive, nested calls (has_checkmated -> has_checked) are counted in both.
+    With profile=True a cProfile.Profile runs over the same window, see dump_profile.
+    """
+    def __init__(self, profile=False):
+        self.stats = {} # name -> [calls, seconds, items]
+        self.games = []
+        self.running = {} # id(game) -> (method stats and time at its first start_turn)
+        self.patched = [] # (class, attribute, original)
+        self.profiler = cProfile.Profile() if profile else None
+
+    def enable(self):
+        if self.patched:
+            return self
+
+        for cls in subclasses(Board):
+            for name, count_items in BOARD_HOT_PATHS.items():
+                if name in cls.__dict__:
+                    self.patch(cls, name, self.timed(name, cls.__dict__[name], count_items))
+        for cls in subclasses(Agent):
+            if 'act' in cls.__dict__:
+                self.patch(cls, 'act', self.timed('act', cls.__dict__['act']))
+        self.patch(Game, 'start_turn', self.timed_game_start(Game.__dict__['start_turn']))
+        self.patch(Game, 'finish', self.timed_game_finish(Game.__dict__['finish']))
+
+        if self.profiler:
+            self.profiler.enable()
+        return self
+
+    def disable(self):
+        if self.profiler:
+            self.profiler.disable()
+        for cls, name, original in reversed(self.patched):
+            setattr(cls, name, original)
+        self.patched = []
+        self.running = {}
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def patch(self, cls: type, name: str, wrapper):
+        self.patched.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, wrapper)
+
+    def timed(self, name: str, fn, count_items=False):
+        stats = self.stats.setdefault(name, [0, 0.0, 0])
+        perf_counter = time.perf_counter
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            time_start = perf_counter()
+            result = fn(*args, **kwargs)
+            stats[1] += perf_counter() - time_start
+            stats[0] += 1
+            if count_items:
+                stats[2] += len(result)
+            return result
+        return wrapper
+
+    def timed_game_start(self, fn):
+        instrumentation = self
+
+        @functools.wraps(fn)
+        def wrapper(game: Game):
+            if id(game) not in instrumentation.running:
+                before = {name: list(stats) for name, stats in instrumentation.stats.items()}
+                instrumentation.running[id(game)] = (before, time.perf_counter())
+            return fn(game)
+        return wrapper
+
+    def timed_game_finish(self, fn):
+        instrumentation = self
+
+        @functools.wraps(fn)
+        def wrapper(game: Game):
+            result = fn(game)
+            if id(game) not in instrumentation.running:
+                return result # started before enable()
+            before, time_start = instrumentation.running.pop(id(game))
+            seconds = time.perf_counter() - time_start
+            diff = {
+                name: [stats[i] - before.get(name, [0, 0.0, 0])[i] for i in range(3)]
+                for name, stats in instrumentation.stats.items()
+            }
+            instrumentation.games.append({
+                'board': type(game.board).__name__,
+                'result': game.result(),
+                **instrumentation.summarize(diff, game.n_turns, seconds)
+            })
+            return result
+        return wrapper
+
+    @staticmethod
+    def summarize(stats: dict, plies: int, seconds: float):
+        get = lambda name, i: stats.get(name, [0, 0.0, 0])[i]
+        nodes = get('make_move', 0) + get('make_castle', 0)
+        legality_seconds = sum(get(name, 1) for name in LEGALITY_CHECKS)
+        return {
+            'plies': plies,
+            'seconds': seconds,
+            'seconds_per_ply': seconds / plies if plies else 0.0,
+            'nodes': nodes,
+            'nodes_per_sec': nodes / seconds if seconds else 0.0,
+            'branching_factor': get('generate_legal_moves', 2) / get('generate_legal_moves', 0) if get('generate_legal_moves', 0) else 0.0,
+            'legality_seconds': legality_seconds,
+            'legality_overhead': legality_seconds / seconds if seconds else 0.0,
+            'calls': {
+                name: {'calls': calls, 'seconds': total, 'usec_per_call': 1e6 * total / calls if calls else 0.0}
+                for name, (calls, total, _) in stats.items() if calls
+            }
+        }
+
+    def report(self):
+        # totals over every game played while enabled, with the per game reports attached
+        plies = sum(game['plies'] for game in self.games)
+        seconds = sum(game['seconds'] for game in self.games)
+        return {'games': len(self.games), **self.summarize(self.stats, plies, seconds), 'per_game': self.games}
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def dump_profile(self, path: str):
+        # pstats compatible dump, e.g. python -m pstats path or snakeviz
+        if not self.profiler:
+            raise ValueError("created without profile=True")
+        self.profiler.dump_stats(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='instrumented headless self-play, writes a json report and optionally a cProfile dump')
+    parser.add_argument('--games', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=300)
+    parser.add_argument('--board', choices=['bitboard', 'list'], default='bitboard')
+    parser.add_argument('--out', default='instrumentation.json')
+    parser.add_argument('--profile', default=None, help='also write a cProfile dump here')
+    args = parser.parse_args()
+
+    board_class = BitBoard if args.board == 'bitboard' else Board
+    with Instrumentation(profile=args.profile is not None) as instrumentation:
+        for _ in run_selfplay(args.games, n_workers=1, seed=args.seed, board_class=board_class, max_turns=args.max_turns):
+            pass
+
+    instrumentation.write_json(args.out)
+    if args.profile:
+        instrumentation.dump_profile(args.profile)
+
+    report = instrumentation.report()
+    print(
+        f"{report['games']} games, {report['plies']} plies: {1e3 * report['seconds_per_ply']:.2f} ms/ply, "
+        f"{report['nodes_per_sec']:.0f} nodes/sec, branching factor {report['branching_factor']:.1f}, "
+        f"legality checks {100 * report['legality_overhead']:.0f}% of game time"
+    )
+    for name, calls in sorted(report['calls'].items(), key=lambda x: -x[1]['seconds']):
+        print(f"{name:>22}: {calls['calls']:>9} calls {calls['seconds']:8.3f}s {calls['usec_per_call']:9.1f} us/call")
+    print(f"report written to {args.out}")
@@ -0,0 +1,59 @@
+from chess.environment.board import Board, ActionType
+from chess.environment.bitboard import BitBoard
+from chess.environment.color import Color
+from chess.environment.fen import board_from_fen
+from chess.environment.encoding import (
+    BoardEncoder, N_PLANES, N_ACTIONS, PIECE_PLANES, PLANE_SIDE_TO_MOVE, PLANE_CASTLING, PLANE_HALFMOVE_CLOCK,
+    action_index, castle_action_index, decode_action, encode_actions, encode_legal_mask
+)
+import numpy as np
+
+# start position, white with both castles and a promotion, black to move with a promotion and a promoting capture
+FENS = [
+    'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'r3k2r/pP4pp/2n5/8/3Pb3/5N2/P4PPP/R3K2R w KQ - 12 20',
+    '4k3/8/8/8/8/8/6p1/4K2R b K - 3 41'
+]
+
+def planes_test(board_class=Board):
+    boards = [board_from_fen(fen, board_class, verbose=False) for fen in FENS]
+    encoder = BoardEncoder(len(boards))
+    out = encoder.encode(boards, np.zeros((len(boards), N_PLANES, 8, 8), dtype=np.float32))
+    for board, planes in zip(boards, out):
+        # plane[y, x] of a piece plane is set exactly where board.board[x][y] holds that piece
+        expected = np.zeros((12, 8, 8), dtype=np.float32)
+        for x in range(8):
+            for y in range(8):
+                piece = board.board[x][y]
+                if piece:
+                    expected[PIECE_PLANES[(piece.color, piece.type)], y, x] = 1
+        assert np.array_equal(planes[:12], expected)
+        assert (planes[PLANE_SIDE_TO_MOVE] == (board.turn == Color.WHITE)).all()
+        assert (planes[PLANE_HALFMOVE_CLOCK] == np.float32(board.halfmove_clock / 100)).all()
+        castling = [planes[PLANE_CASTLING + i, 0, 0] for i in range(4)]
+        assert sum(castling) == bin(board.castling).count('1')
+
+def action_round_trip_test(board_class=Board):
+    for fen in FENS:
+        board = board_from_fen(fen, board_class, verbose=False)
+        player = board.get_player(board.turn)
+        valid_actions = board.get_valid_actions(player)
+        mask = encode_actions(valid_actions, player.color, np.zeros(N_ACTIONS, dtype=bool))
+        assert np.array_equal(mask, encode_legal_mask(board, player, np.zeros(N_ACTIONS, dtype=bool)))
+
+        n_actions = 0
+        for piece, moves in valid_actions[ActionType.MOVE].items():
+            for move, _ in moves:
+                assert decode_action(board, action_index(piece.position, move)) == (ActionType.MOVE, piece, move)
+                n_actions += 1
+        for king_side in valid_actions[ActionType.CASTLE]:
+            assert decode_action(board, castle_action_index(player.color, king_side)) == (ActionType.CASTLE, king_side)
+            n_actions += 1
+        assert mask.sum() == n_actions > 0
+
+
+if __name__ == "__main__":
+    for board_class in [Board, BitBoard]:
+        planes_test(board_class)
+        action_round_trip_test(board_class)
+    print("encoding ok")
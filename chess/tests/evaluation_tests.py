@@ -0,0 +1,90 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.fen import board_from_fen
+from chess.environment.evaluation import PSTEvaluator
+from chess.game.game import Game
+from chess.game.agent_random import AgentRandom, CHECKMATE_SCORE
+from chess.game.agent_alphabeta import AgentAlphaBeta
+import random
+
+def incremental_matches_full_test(board_class=Board):
+    # make/unmake, castles and promotions keep eval_score equal to a full recount, and move_delta predicts each change
+    evaluator = PSTEvaluator()
+    random.seed(0)
+    for fen in [None, 'r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1', '4k3/1P6/8/8/8/8/6p1/4K3 w - - 0 1']:
+        board = board_from_fen(fen, board_class, verbose=False) if fen else board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+        evaluator.attach(board)
+        start_score = board.eval_score
+        for _ in range(60):
+            player = board.get_player(board.turn)
+            moves = board.get_legal_moves(player)
+            castles = [king_side for king_side in [True, False] if board.can_castle(player, king_side)]
+            if not moves and not castles:
+                break
+            before = evaluator(board, player)
+            if castles and random.random() < 0.5:
+                delta = evaluator.castle_delta(player, castles[0])
+                board.make_castle(player, castles[0])
+            else:
+                piece, move = random.choice(moves)
+                delta = evaluator.move_delta(board, piece, move)
+                board.make_move(player, piece, move)
+            assert board.eval_score == evaluator.full_score(board)
+            assert evaluator(board, player) - before == delta
+        while board.undo_stack:
+            board.unmake_move()
+        assert board.eval_score == start_score == evaluator.full_score(board)
+
+def promotion_delta_test():
+    evaluator = PSTEvaluator()
+    board = board_from_fen('4k3/1P6/8/8/8/8/6p1/4K3 w - - 0 1', BitBoard, verbose=False)
+    before = evaluator(board, board.player_white)
+    delta = evaluator.move_delta(board, board.board[1][6], (1, 7))
+    board.make_move(board.player_white, board.board[1][6], (1, 7))
+    assert board.board[1][7].type.name == 'QUEEN' and delta > 700
+    assert evaluator(board, board.player_white) - before == delta and board.eval_score == evaluator.full_score(board)
+    board.unmake_move()
+    assert evaluator(board, board.player_white) == before
+
+def random_agent_weighting_test(board_class=BitBoard):
+    # with an evaluator moves are weighted by their table deltas, mates keep get_valid_actions' checkmate score.
+    # Ra8 mates on the back rank, h8=Q only by opening the h file: a promotion whose pawn stood on the queen's line
+    evaluator = PSTEvaluator()
+    for fen, mate in [('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1', ((0, 0), (0, 7))), ('8/7P/8/8/8/8/5K2/7k w - - 0 1', ((7, 6), (7, 7)))]:
+        board = board_from_fen(fen, board_class, verbose=False)
+        agent = AgentRandom('R', evaluator=evaluator)
+        agent.board, agent.player = board, board.player_white
+        hash_before = board.hash
+        options = agent.scored_options()
+        assert board.hash == hash_before and not board.undo_stack
+        for _, score, piece, move in options:
+            if (piece.position, move) == mate:
+                assert score == CHECKMATE_SCORE
+            else:
+                assert score == evaluator.move_delta(board, piece, move)
+
+        random.seed(0)
+        agent.act()
+        assert board.has_checkmated(board.player_white)
+
+def agents_pick_evaluator_test():
+    evaluator = PSTEvaluator(mobility=2, king_safety=10)
+    random.seed(1)
+    game = Game(
+        AgentRandom('R', evaluator=evaluator), AgentAlphaBeta('AB', max_depth=1, evaluate=evaluator),
+        display_board=False, board_class=BitBoard, verbose=False, max_turns=20
+    )
+    game.gameplay_loop()
+    assert game.board.evaluator is evaluator and game.board.eval_score == evaluator.full_score(game.board)
+
+
+if __name__ == "__main__":
+    incremental_matches_full_test(Board)
+    incremental_matches_full_test(BitBoard)
+    promotion_delta_test()
+    random_agent_weighting_test(Board)
+    random_agent_weighting_test(BitBoard)
+    agents_pick_evaluator_test()
+    print("evaluation ok")
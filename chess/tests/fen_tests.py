@@ -0,0 +1,56 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.fen import board_from_fen, board_to_fen, player_to_fen, load_epd, START_FEN
+from chess.environment.perft import perft
+from chess.tests.make_unmake_tests import full_hash
+import tempfile
+import os
+
+def startpos_test(board_class=Board):
+    board = board_from_fen(START_FEN, board_class, verbose=False)
+    opening = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    assert board.hash == opening.hash and board.castling == opening.castling
+    assert board_to_fen(board) == START_FEN
+    assert player_to_fen(board.player_white) == '8/8/8/8/8/8/PPPPPPPP/RNBQKBNR'
+
+def round_trip_test(board_class=Board):
+    for fen in [
+        'r3k2r/8/8/8/8/8/8/R3K2R b Kq - 3 20',
+        'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1',
+        '8/8/8/4k3/8/8/4P3/4K3 w - - 12 57'
+    ]:
+        board = board_from_fen(fen, board_class, verbose=False)
+        assert board_to_fen(board) == fen
+        assert board.hash == full_hash(board)
+
+    # castling rights only as far as has_moved allows them
+    board = board_from_fen('r3k2r/8/8/8/8/8/8/R3K2R b Kq - 3 20', board_class, verbose=False)
+    assert board.can_castle(board.player_black, False) and not board.can_castle(board.player_black, True)
+
+def epd_test():
+    lines = [
+        '# perft counts hold for this ruleset: no castling, en passant or promotion within reach',
+        'r3k2r/8/8/8/8/8/8/R3K2R w - - id "rooks; both sides"; c0 "no castling rights" "kings home"; D1 24;',
+        'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - hmvc 0; fmvn 1; D1 20; D2 400;'
+    ]
+    with tempfile.TemporaryDirectory() as path:
+        with open(os.path.join(path, 'suite.epd'), 'w') as f:
+            f.write('\n'.join(lines))
+
+        positions = list(load_epd(os.path.join(path, 'suite.epd'), BitBoard, verbose=False))
+        assert len(positions) == 2 and positions[0][1]['id'] == ['rooks; both sides']
+        assert positions[0][1]['c0'] == ['no castling rights', 'kings home'] and positions[0][1]['D1'] == ['24']
+        for board, operations in positions:
+            for depth in range(1, 3):
+                if f"D{depth}" in operations:
+                    assert perft(board, board.get_player(board.turn), depth) == int(operations[f"D{depth}"][0])
+
+
+if __name__ == "__main__":
+    for board_class in [Board, BitBoard]:
+        startpos_test(board_class)
+        round_trip_test(board_class)
+    epd_test()
+    print("fen ok")
@@ -1,4 +1,4 @@
-from chess.environment.board import Board
+from chess.environment.board import Board, ActionType
 from chess.environment.player import Player
 from chess.environment.color import Color
 from chess.environment.utils import *
@@ -10,13 +10,15 @@ def init_moves_test():
    
     board.print_board()
 
-    print(f"\nValid moves for white:")
-    for piece, moves in board.get_valid_actions(player_white).items():
-        print(f"{piece}: {[square_pos_to_str(x) for x in moves]}")
-    
-    print(f"\nValid moves for black:")
-    for piece, moves in board.get_valid_actions(player_black).items():
-        print(f"{piece}: {[square_pos_to_str(x) for x in moves]}")
+    # get_valid_actions is keyed by ActionType, moves are piece -> [(move, score)]
+    for player in [player_white, player_black]:
+        print(f"\nValid moves for {player.color.name.lower()}:")
+        valid_actions = board.get_valid_actions(player)
+        for piece, moves in valid_actions[ActionType.MOVE].items():
+            print(f"{piece}: {[square_pos_to_str(move) for move, _ in moves]}")
+        
+        assert sum(len(moves) for moves in valid_actions[ActionType.MOVE].values()) == 20
+        assert not valid_actions[ActionType.CASTLE]
     
 
 def to_pos_tests():
@@ -25,8 +27,9 @@ def to_pos_tests():
         pos = square_str_to_pos(s)
         str = square_pos_to_str(pos)
         print(f"{s} - {pos} - {str}")
+        assert str == s
 
 
 if __name__ == "__main__":
     to_pos_tests()
-    init_moves_test()
\ No newline at end of file
+    init_moves_test()
@@ -0,0 +1,49 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.game.agent_random import AgentRandom
+from chess.game.game import Game
+from chess.instrumentation import Instrumentation
+import random
+
+def report_and_restore_test(board_class=BitBoard):
+    originals = (board_class.generate_legal_moves, Board.get_valid_actions, AgentRandom.act, Game.start_turn, Game.finish)
+    random.seed(0)
+    with Instrumentation() as instrumentation:
+        game = Game(AgentRandom('P1'), AgentRandom('P2'), display_board=False, board_class=board_class, verbose=False, max_turns=20)
+        game.gameplay_loop()
+
+    # disabled again, the classes hold the very same functions as before
+    assert (board_class.generate_legal_moves, Board.get_valid_actions, AgentRandom.act, Game.start_turn, Game.finish) == originals
+
+    report = instrumentation.report()
+    assert report['games'] == 1 and report['plies'] == game.n_turns
+    assert report['calls']['act']['calls'] == game.n_turns
+    assert report['nodes'] > 0 and report['branching_factor'] > 0
+    assert 0 < report['legality_overhead'] < 1
+    assert report['per_game'][0]['result'] == game.result()
+
+def stepped_game_test(board_class=BitBoard):
+    # games driven turn by turn, the way chess.game.server plays them, get their reports too
+    random.seed(1)
+    with Instrumentation() as instrumentation:
+        games = [
+            Game(AgentRandom('P1'), AgentRandom('P2'), display_board=False, board_class=board_class, verbose=False, max_turns=10)
+            for _ in range(2)
+        ]
+        for game in games:
+            while game.start_turn():
+                game.agents[game.n_turns % 2].act()
+                game.end_turn()
+            game.finish()
+
+    report = instrumentation.report()
+    assert report['games'] == 2 and report['plies'] == sum(game.n_turns for game in games)
+    assert [game_report['plies'] for game_report in report['per_game']] == [game.n_turns for game in games]
+    assert not instrumentation.running
+
+
+if __name__ == "__main__":
+    for board_class in [Board, BitBoard]:
+        report_and_restore_test(board_class)
+    stepped_game_test()
+    print("instrumentation ok")
@@ -0,0 +1,81 @@
+from chess.environment.board import Board, ActionType
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.zobrist import ZOBRIST_PIECES, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_CASTLING
+import random
+
+def board_state(board: Board):
+    pieces = sorted(
+        (piece._id, piece.type.value, piece.position, piece.has_moved)
+        for player in [board.player_white, board.player_black] for piece in player.pieces
+    )
+    eliminated = sorted(piece._id for player in [board.player_white, board.player_black] for piece in player.pieces_eliminated)
+    squares = [[piece._id if piece else None for piece in row] for row in board.board]
+    return pieces, eliminated, squares, board.hash, board.turn, dict(board.repetitions)
+
+def full_hash(board: Board):
+    hash = ZOBRIST_CASTLING[board.get_castling_rights()] ^ (ZOBRIST_BLACK_TO_MOVE if board.turn == Color.BLACK else 0)
+    for x in range(8):
+        for y in range(8):
+            if board.board[x][y]:
+                hash ^= ZOBRIST_PIECES[board.board[x][y].color][board.board[x][y].type][y * 8 + x]
+    return hash
+
+def make_unmake_restores_test(board_class=Board, n_plies=120, seed=0):
+    random.seed(seed)
+    player_white = Player(Color.WHITE)
+    player_black = Player(Color.BLACK)
+    board = board_class(player_white, player_black, main_board=False)
+
+    for ply in range(n_plies):
+        player = player_white if ply % 2 == 0 else player_black
+        state = board_state(board)
+        actions = board.get_valid_actions(player)
+        assert board_state(board) == state, f"get_valid_actions mutated the board at ply {ply}"
+
+        # every pseudo legal move and castle must unmake back to the exact same state
+        for piece in list(player.pieces):
+            for move in board.get_valid_moves(piece):
+                board.make_move(player, piece, move)
+                board.unmake_move()
+                assert board_state(board) == state, f"unmake of {piece} -> {move} did not restore the board"
+
+        assert board.hash == full_hash(board), f"incremental hash diverged at ply {ply}"
+        options = [(piece, move) for piece, moves in actions[ActionType.MOVE].items() for move, _ in moves]
+        options += [(None, king_side) for king_side in actions[ActionType.CASTLE]]
+        if not options:
+            break
+        piece, move = random.choice(options)
+        if piece:
+            board.move(player, piece, move)
+        else:
+            board.castle(player, move)
+
+    # unwinding the whole game returns to the initial position
+    while board.undo_stack:
+        board.unmake_move()
+    assert all(not piece.has_moved for player in [player_white, player_black] for piece in player.pieces)
+    assert len(player_white.pieces) == len(player_black.pieces) == 16
+
+def repetition_test(board_class=Board):
+    player_white = Player(Color.WHITE)
+    player_black = Player(Color.BLACK)
+    board = board_class(player_white, player_black, main_board=False)
+    hash_start = board.hash
+    
+    # shuffle the knights out and back, the start position recurs with the same key
+    shuffle = [((6, 0), (5, 2)), ((6, 7), (5, 5)), ((5, 2), (6, 0)), ((5, 5), (6, 7))]
+    for n_cycle in range(2):
+        assert not board.is_draw()
+        for i, (position, move) in enumerate(shuffle):
+            board.move(player_white if i % 2 == 0 else player_black, board.board[position[0]][position[1]], move)
+        assert board.hash == hash_start
+    assert board.is_repetition() and board.is_draw()
+
+
+if __name__ == "__main__":
+    for board_class in [Board, BitBoard]:
+        make_unmake_restores_test(board_class)
+        repetition_test(board_class)
+        print(f"{board_class.__name__}: make/unmake ok")
@@ -0,0 +1,52 @@
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.fen import board_from_fen
+from chess.game.record import GameRecordReader
+from chess.game.selfplay import run_selfplay
+from chess.game.opening_book import OpeningBook, build_book
+from chess.game.agent_alphabeta import AgentAlphaBeta
+from collections import Counter
+import os
+import tempfile
+
+def book_counts_test():
+    with tempfile.TemporaryDirectory() as path:
+        for _ in run_selfplay(40, n_workers=1, max_turns=12, record_dir=path):
+            pass
+        archives = [os.path.join(path, name) for name in os.listdir(path)]
+        book_path = os.path.join(path, 'book.bin')
+        assert build_book(archives, book_path, max_plies=8, min_games=1) > 0
+
+        first_moves = Counter()
+        for archive in archives:
+            with GameRecordReader(archive) as reader:
+                first_moves.update(record.moves[0] for record in reader if record.result is not None)
+
+        with OpeningBook(book_path) as book:
+            board = BitBoard(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+            entries = book.lookup(board)
+            assert {code: games for code, games, _, _ in entries} == dict(first_moves)
+            assert [games for _, games, _, _ in entries] == sorted(first_moves.values(), reverse=True)
+
+            # a search agent plays from the book and only searches once out of book
+            agent = AgentAlphaBeta('AB', max_depth=1, book=book)
+            agent.board, agent.player = board, board.player_white
+            agent.act()
+            assert board.last_move_code() in first_moves and agent.last_search is None
+
+            board = board_from_fen('4k3/8/8/8/8/8/4P3/4K3 w - - 0 1', BitBoard, verbose=False)
+            agent.board, agent.player = board, board.player_white
+            assert not book.lookup(board)
+            # out of book is found without generating the legal moves
+            generate = board.generate_legal_move_codes
+            board.generate_legal_move_codes = None
+            assert book.choose(board) is None
+            board.generate_legal_move_codes = generate
+            agent.act()
+            assert agent.last_search is not None
+
+
+if __name__ == "__main__":
+    book_counts_test()
+    print("opening book ok")
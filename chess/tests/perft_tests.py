@@ -0,0 +1,36 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.perft import perft, divide, run_perft, PERFT_REFERENCE, PERFT_POSITIONS
+
+def startpos_perft_test(board_class=Board, depth=3):
+    for d in range(1, depth + 1):
+        board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+        nodes = perft(board, board.player_white, d)
+        assert nodes == PERFT_REFERENCE['startpos'][d], f"{board_class.__name__} perft({d}) = {nodes}"
+        assert not board.undo_stack, "perft left moves on the undo stack"
+
+def divide_matches_test(depth=3):
+    # both representations must agree move by move, not just in total
+    counts = []
+    for board_class in [Board, BitBoard]:
+        board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+        counts.append(divide(board, board.player_white, depth))
+    assert counts[0] == counts[1]
+    assert sum(counts[0].values()) == PERFT_REFERENCE['startpos'][depth]
+
+def reference_positions_test(board_class=Board, depth=2):
+    # castling, promotion and in-check positions from FEN, through the harness
+    for position in PERFT_POSITIONS:
+        for result in run_perft(board_class, depth, position):
+            assert result['ok'], f"{board_class.__name__} {position} perft({result['depth']}) = {result['nodes']}, expected {result['expected']}"
+
+
+if __name__ == "__main__":
+    startpos_perft_test(Board, 3)
+    startpos_perft_test(BitBoard, 4)
+    divide_matches_test()
+    reference_positions_test(Board, 2)
+    reference_positions_test(BitBoard, 3)
+    print("perft ok")
@@ -0,0 +1,61 @@
+from chess.environment.bitboard import BitBoard
+from chess.environment.utils import encode_move
+from chess.game.agent_random import AgentRandom
+from chess.game.game import Game
+from chess.game.record import GameRecord, GameRecordWriter, GameRecordReader, replay, to_pgn, export_pgn
+import os
+import random
+import tempfile
+
+FOOLS_MATE = [encode_move((5, 1), (5, 2)), encode_move((4, 6), (4, 4)), encode_move((6, 1), (6, 3)), encode_move((3, 7), (7, 3))]
+
+def round_trip_test(n_games=3):
+    with tempfile.TemporaryDirectory() as path:
+        archive = os.path.join(path, 'games.bin')
+        games = []
+        with GameRecordWriter(archive) as writer:
+            for seed in range(n_games):
+                random.seed(seed)
+                game = Game(
+                    AgentRandom('W'), AgentRandom('B'), display_board=False, board_class=BitBoard,
+                    verbose=False, max_turns=40, record_writer=writer, seed=seed
+                )
+                game.gameplay_loop()
+                games.append(game)
+
+        # a partly written trailing game is skipped
+        with open(archive, 'ab') as f:
+            f.write(b'\x07' * 10)
+
+        with GameRecordReader(archive) as reader:
+            assert len(reader) == n_games
+            assert reader.results() == [game.result() for game in games]
+            for game, record in zip(games, reader):
+                assert record.seed == game.seed and list(record.moves) == game.move_codes
+                # replaying the codes reaches the final position of the game
+                board = None
+                for board in replay(record):
+                    pass
+                assert board.hash == game.board.hash and len(board.undo_stack) == len(record)
+
+def pgn_test():
+    record = GameRecord(7, 'black', FOOLS_MATE)
+    pgn = to_pgn(record)
+    assert pgn.splitlines()[:3] == ['[Event "chess_rl self-play"]', '[Seed "7"]', '[Result "0-1"]']
+    assert pgn.splitlines()[-1] == '1. f3 e5 2. g4 Qh4# 0-1'
+
+    with tempfile.TemporaryDirectory() as path:
+        archive, pgn_path = os.path.join(path, 'games.bin'), os.path.join(path, 'games.pgn')
+        with GameRecordWriter(archive) as writer:
+            writer.write_game(7, 'black', FOOLS_MATE)
+            writer.write_game(8, None, FOOLS_MATE[:2])
+        export_pgn(archive, pgn_path)
+        with open(pgn_path) as f:
+            text = f.read()
+        assert text.count('[Event ') == 2 and '1. f3 e5 *' in text
+
+
+if __name__ == "__main__":
+    round_trip_test()
+    pgn_test()
+    print("record ok")
@@ -0,0 +1,114 @@
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.encoding import BoardEncoder, N_PLANES
+from chess.game.replay_buffer import ReplayBuffer, OUTCOME_PENDING
+import numpy as np
+import random
+import tempfile
+
+def play_positions(buffer: ReplayBuffer, n_plies: int, seed=0):
+    # random plies appended to the buffer, returns the planes of every position as BoardEncoder sees them
+    random.seed(seed)
+    board = BitBoard(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    encoder = BoardEncoder(1)
+    planes = []
+    for _ in range(n_plies):
+        player = board.get_player(board.turn)
+        slot = buffer.add_position(board, player, board.get_valid_actions(player))
+        planes.append(encoder.encode_one(board, np.zeros((N_PLANES, 8, 8), dtype=np.float32)).copy())
+        code = random.choice(board.generate_legal_move_codes(player))
+        board.make_move_code(code)
+        buffer.set_action(slot, code)
+    return planes
+
+def planes_match_encoder_test():
+    with tempfile.TemporaryDirectory() as path:
+        buffer = ReplayBuffer.create(path, capacity=64)
+        planes = play_positions(buffer, 20)
+        assert not len(buffer.finished_slots()), "positions are only sampled once the game is finished"
+        buffer.finish_game('white')
+
+        assert np.array_equal(buffer.planes(np.arange(20)), np.stack(planes))
+        assert list(buffer.outcome[:20]) == [1, -1] * 10
+        batch = buffer.sample(8, np.random.default_rng(0))
+        assert batch['obs'].shape == (8, N_PLANES, 8, 8) and (batch['score_value'][:, 0] >= batch['score_value'][:, 1]).all()
+        buffer.close()
+
+def ring_and_reload_test():
+    with tempfile.TemporaryDirectory() as path:
+        buffer = ReplayBuffer.create(path, capacity=16)
+        play_positions(buffer, 10, seed=1)
+        buffer.finish_game('draw')
+        play_positions(buffer, 10, seed=2) # wraps over the first game
+        buffer.close()
+
+        # reopened from disk, the unfinished second game is still pending and the overwritten slots are gone
+        buffer = ReplayBuffer(path)
+        assert len(buffer) == 16 and buffer.cursor[0] == 20
+        assert (buffer.outcome[4:10] == 0).all() and (buffer.outcome[:4] == OUTCOME_PENDING).all()
+        batch = buffer.sample(32, np.random.default_rng(0), alpha=0.6)
+        assert set(batch['slot']) <= set(range(4, 10))
+        buffer.update_priorities(batch['slot'], np.full(32, 2.0, dtype=np.float32))
+        buffer.close()
+
+def overwrite_excluded_while_written_test():
+    class WatchedBoard(BitBoard):
+        # castling is read while the position's fields are written, record whether the slot was sampleable then
+        @property
+        def castling(self):
+            if watch:
+                seen.append(slot in buffer.finished_slots())
+            return self._castling
+
+        @castling.setter
+        def castling(self, value):
+            self._castling = value
+
+    with tempfile.TemporaryDirectory() as path:
+        buffer = ReplayBuffer.create(path, capacity=4)
+        play_positions(buffer, 4)
+        buffer.finish_game('white')
+        assert len(buffer.finished_slots()) == 4
+
+        watch, seen, slot = False, [], 0 # the next append wraps to slot 0
+        board = WatchedBoard(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+        player = board.get_player(board.turn)
+        valid_actions = board.get_valid_actions(player)
+        watch = True
+        assert buffer.add_position(board, player, valid_actions) == slot
+        assert seen and not any(seen), "a slot being overwritten must not be sampled with the old game's outcome"
+        assert slot not in buffer.finished_slots()
+        buffer.close()
+
+def sample_torn_by_writer_test():
+    class RacedBuffer(ReplayBuffer):
+        # another game overwrites and finishes slots 0 and 1 while the first batch is copied
+        def planes(self, slots):
+            obs = super().planes(slots)
+            if not self.raced:
+                self.raced = True
+                play_positions(self, 2, seed=5)
+                self.finish_game('black')
+            return obs
+
+    with tempfile.TemporaryDirectory() as path:
+        buffer = RacedBuffer.create(path, capacity=4)
+        buffer.raced = True
+        play_positions(buffer, 4)
+        buffer.finish_game('white')
+
+        buffer.raced = False
+        batch = buffer.sample(64, np.random.default_rng(0))
+        assert buffer.raced and {0, 1} <= set(batch['slot'])
+        # every row is one slot's position with that position's outcome, copied rows of the old game were drawn again
+        assert np.array_equal(batch['obs'], buffer.planes(batch['slot']))
+        assert np.array_equal(batch['outcome'], buffer.outcome[batch['slot']])
+        buffer.close()
+
+if __name__ == "__main__":
+    planes_match_encoder_test()
+    ring_and_reload_test()
+    overwrite_excluded_while_written_test()
+    sample_torn_by_writer_test()
+    print("replay buffer ok")
@@ -0,0 +1,149 @@
+from chess.environment.board import Board
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+from chess.environment.utils import encode_move, move_code_str
+from chess.game.agent_alphabeta import AgentAlphaBeta, MATE_BOUND, MATE_SCORE
+from chess.game.agent_mcts import AgentMCTS, RolloutEvaluator
+from chess.game.agent_parallel import AgentParallel
+from chess.game.transposition import SharedTranspositionTable, Bound
+from chess.game.agent_random import AgentRandom
+from chess.game.game import Game
+from chess.environment.fen import board_from_fen
+
+def fools_mate_board(board_class=Board):
+    # 1. f3 e5 2. g4, black to move has Qh4#
+    board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    for position, move in [((5, 1), (5, 2)), ((4, 6), (4, 4)), ((6, 1), (6, 3))]:
+        board.make_move(board.get_player(board.turn), board.board[position[0]][position[1]], move)
+    return board
+
+def finds_mate_test(board_class=Board):
+    board = fools_mate_board(board_class)
+    agent = AgentAlphaBeta('AB', max_depth=3)
+    agent.board, agent.player = board, board.player_black
+    hash_before, n_undo = board.hash, len(board.undo_stack)
+
+    code = agent.search()
+    assert code == encode_move((3, 7), (7, 3)), move_code_str(code)
+    assert agent.last_search['score'] >= MATE_BOUND
+    assert board.hash == hash_before and len(board.undo_stack) == n_undo, "search did not restore the board"
+
+def quiescence_mate_test(board_class=BitBoard):
+    # at depth 1 the reply to Qh4 is left to quiescence, which has to see that white has no evasion
+    board = fools_mate_board(board_class)
+    agent = AgentAlphaBeta('AB', max_depth=1)
+    agent.board, agent.player = board, board.player_black
+    assert agent.search() == encode_move((3, 7), (7, 3))
+    assert agent.last_search['score'] == MATE_SCORE - 1
+
+    # in check, standing pat on the extra queen would hide that the queen is lost: Kxd2 is forced and recaptures it
+    board = board_from_fen('4k3/8/8/8/8/8/3q4/4K3 w - - 0 1', board_class, verbose=False)
+    agent.board, agent.player = board, board.player_white
+    assert agent.quiescence(board.player_white, -MATE_SCORE, MATE_SCORE, 0) == 0
+
+def node_budget_test(board_class=BitBoard, max_nodes=2000):
+    board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    agent = AgentAlphaBeta('AB', max_depth=20, max_nodes=max_nodes)
+    agent.board, agent.player = board, board.player_white
+
+    code = agent.search()
+    assert code in {encode_move(piece.position, move) for piece, move in board.get_legal_moves(board.player_white)}
+    assert 1 <= agent.last_search['depth'] < 20
+    assert agent.last_search['nodes'] <= max_nodes
+    assert not board.undo_stack
+
+def mcts_finds_mate_test(board_class=BitBoard):
+    board = fools_mate_board(board_class)
+    agent = AgentMCTS('MCTS', n_simulations=200, evaluator=RolloutEvaluator(seed=0))
+    agent.board, agent.player = board, board.player_black
+    hash_before, n_undo = board.hash, len(board.undo_stack)
+
+    code = agent.search()
+    assert code == encode_move((3, 7), (7, 3)), move_code_str(code)
+    assert agent.last_search['root_visits'] == agent.last_search['simulations'] == 200
+    assert board.hash == hash_before and len(board.undo_stack) == n_undo, "search did not restore the board"
+
+def mcts_terminal_root_test(board_class=BitBoard):
+    # checkmated (after fools mate) and stalemated roots have no move to choose
+    for fen in ['rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3', '7k/5Q2/6K1/8/8/8/8/8 b - - 0 1']:
+        board = board_from_fen(fen, board_class, verbose=False)
+        agent = AgentMCTS('MCTS', n_simulations=20, evaluator=RolloutEvaluator(seed=0))
+        agent.board, agent.player = board, board.get_player(board.turn)
+        assert agent.search() is None
+        try:
+            agent.act()
+            assert False, "act() on a terminal position raises"
+        except ValueError:
+            pass
+        assert not board.undo_stack
+
+def mcts_tree_reuse_test(board_class=BitBoard):
+    board = board_class(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    agent = AgentMCTS('MCTS', n_simulations=100, evaluator=RolloutEvaluator(max_plies=10, seed=0))
+    agent.board, agent.player = board, board.player_white
+    agent.act()
+
+    # the opponent's most explored reply keeps its statistics for the next search
+    replies = agent.root.children
+    reply = max(replies, key=lambda code: replies[code].visits)
+    visits = replies[reply].visits
+    board.make_move_code(reply)
+    agent.search()
+    assert agent.last_search['visits_reused'] == visits > 0
+
+def shared_tt_test():
+    table = SharedTranspositionTable(1)
+    attached = SharedTranspositionTable(1, table.name)
+    attached.store(12345, 3, -1.5, Bound.LOWER, 77)
+    assert table.probe(12345) == (3, -1.5, Bound.LOWER, 77)
+    assert table.probe(12346) is None
+    attached.close()
+    table.close()
+
+def parallel_finds_mate_test(n_workers=2):
+    board = fools_mate_board(BitBoard)
+    for agent_class, agent_kwargs, shared_tt in [(AgentAlphaBeta, {'max_depth': 2}, True), (AgentMCTS, {'n_simulations': 100}, False)]:
+        with AgentParallel('P', agent_class, agent_kwargs, n_workers=n_workers, shared_tt=shared_tt) as agent:
+            agent.board, agent.player = board, board.player_black
+            code = agent.search()
+            assert code == encode_move((3, 7), (7, 3)), move_code_str(code)
+            assert agent.last_search['workers'] == n_workers
+            assert len(board.undo_stack) == 3
+
+def parallel_from_fen_test(n_workers=2):
+    # workers search the FEN root, not the start position: white mates with Ra8
+    board = board_from_fen('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1', BitBoard, verbose=False)
+    for agent_class, agent_kwargs, shared_tt in [(AgentAlphaBeta, {'max_depth': 2}, False), (AgentMCTS, {'n_simulations': 100}, False)]:
+        with AgentParallel('P', agent_class, agent_kwargs, n_workers=n_workers, shared_tt=shared_tt) as agent:
+            agent.board, agent.player = board, board.player_white
+            code = agent.search()
+            assert code == encode_move((0, 0), (0, 7)), move_code_str(code)
+
+    # without a shared table every worker searches to the same depth
+    board = board_from_fen('r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3', BitBoard, verbose=False)
+    with AgentParallel('P', AgentAlphaBeta, {'max_depth': 2}, n_workers=n_workers) as agent:
+        agent.board, agent.player = board, board.player_white
+        agent.search()
+        assert [search['depth'] for search in agent.last_search['worker_searches']] == [2] * n_workers
+
+def parallel_closed_by_game_test():
+    agent = AgentParallel('P', AgentAlphaBeta, {'max_depth': 1}, n_workers=1, shared_tt=True)
+    game = Game(agent, AgentRandom('R'), display_board=False, board_class=BitBoard, verbose=False, max_turns=2)
+    game.gameplay_loop()
+    assert agent.pool is None and agent.tt is None, "Game.finish releases the pool and the shared table"
+
+
+if __name__ == "__main__":
+    for board_class in [Board, BitBoard]:
+        finds_mate_test(board_class)
+    quiescence_mate_test()
+    node_budget_test()
+    mcts_finds_mate_test()
+    mcts_terminal_root_test()
+    mcts_tree_reuse_test()
+    shared_tt_test()
+    parallel_finds_mate_test()
+    parallel_from_fen_test()
+    parallel_closed_by_game_test()
+    print("search ok")
@@ -0,0 +1,109 @@
+from chess.game.server import GameServer, AsyncAgent, RemoteAgent, run_client
+from chess.game.agent_random import AgentRandom
+from chess.environment.bitboard import BitBoard
+from chess.environment.player import Player
+from chess.environment.color import Color
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+class AgentAsyncRandom(AsyncAgent):
+    async def choose_move(self):
+        await asyncio.sleep(0.001)
+        return random.choice(self.board.generate_legal_move_codes(self.player))
+
+class AgentStalling(AsyncAgent):
+    async def choose_move(self):
+        await asyncio.sleep(3600)
+
+class AgentIllegal(AsyncAgent):
+    async def choose_move(self):
+        return 0 # a1 -> a1
+
+class AgentSlowSync(AgentRandom):
+    # a plain agent with a blocking search, records whether it was closed while searching
+    def __init__(self, name):
+        super().__init__(name)
+        self.searching = False
+        self.closed_searching = []
+
+    def act(self):
+        self.searching = True
+        time.sleep(0.5)
+        super().act()
+        self.searching = False
+
+    def close(self):
+        self.closed_searching.append(self.searching)
+
+def assert_legal(moves: list[int]):
+    board = BitBoard(Player(Color.WHITE), Player(Color.BLACK), verbose=False)
+    for code in moves:
+        assert code in board.generate_legal_move_codes(board.get_player(board.turn))
+        board.make_move_code(code)
+
+def interleaved_games_test():
+    async def main():
+        server = GameServer(max_games=8, max_turns=30)
+        pairings = [(AgentRandom('sync'), AgentAsyncRandom('async')) for _ in range(20)]
+        return await server.run_games(pairings)
+
+    results = asyncio.run(main())
+    assert len(results) == 20 and all(result['result'] and result['termination'] is None for result in results)
+    for result in results:
+        assert result['n_turns'] == len(result['moves']) <= 30
+        assert_legal(result['moves'])
+
+def forfeit_test():
+    async def main():
+        server = GameServer(move_timeout=0.05)
+        return await server.run_games([(AgentRandom('w'), AgentStalling('b')), (AgentIllegal('w'), AgentRandom('b'))])
+
+    stalled, illegal = asyncio.run(main())
+    assert (stalled['result'], stalled['termination'], stalled['n_turns']) == ('white', 'timeout', 1)
+    assert (illegal['result'], illegal['termination'], illegal['n_turns']) == ('black', 'illegal move', 0)
+
+def sync_agent_timeout_test():
+    async def main():
+        server = GameServer(move_timeout=0.1, max_turns=20)
+        time_start = time.perf_counter()
+        slow = asyncio.create_task(server.play_game(agent, AgentRandom('b')))
+        fast = await server.play_game(AgentAsyncRandom('w'), AgentAsyncRandom('b'), seed=1)
+        # the blocking act() runs off the loop, the other game went on meanwhile
+        fast_seconds = time.perf_counter() - time_start
+        slow = await slow
+        await asyncio.sleep(0.6)
+        return slow, fast, fast_seconds
+
+    agent = AgentSlowSync('slow')
+    slow, fast, fast_seconds = asyncio.run(main())
+    assert (slow['result'], slow['termination'], slow['n_turns'], slow['moves']) == ('black', 'timeout', 0, [])
+    # the late move went to the agent's own board and the agent was closed only once its search was over
+    assert agent.board.last_move_code() is not None and agent.closed_searching == [False]
+    assert fast['termination'] is None and fast['result'] is not None
+    assert fast_seconds < 0.45, fast_seconds
+
+def remote_games_test():
+    async def main(path: str):
+        async with GameServer(path, max_turns=20, move_timeout=5.0) as server:
+            client = asyncio.create_task(run_client('engine', AgentRandom, path=path, capacity=4))
+            pairings = [(RemoteAgent('remote', 'engine'), AgentAsyncRandom('local')) for _ in range(6)]
+            results = await server.run_games(pairings)
+        await client
+        return results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(main(os.path.join(tmp, 'server.sock')))
+    assert all(result['result'] and result['termination'] is None for result in results)
+    for result in results:
+        assert_legal(result['moves'])
+
+
+if __name__ == "__main__":
+    interleaved_games_test()
+    forfeit_test()
+    sync_agent_timeout_test()
+    remote_games_test()
+    print("server ok")
@@ -0,0 +1,80 @@
+from chess.environment.bitboard import BitBoard
+from chess.environment.fen import board_from_fen
+from chess.environment.tablebase import Tablebase, generate_tablebases, ILLEGAL
+from chess.game.agent_alphabeta import AgentAlphaBeta
+import numpy as np
+import tempfile
+
+def krk_fen(squares, stm: int):
+    # FEN of a KRK table position, squares are (white king, white rook, black king)
+    grid = [['1'] * 8 for _ in range(8)]
+    for sq, letter in zip(squares, 'KRk'):
+        grid[7 - (sq >> 3)][sq & 7] = letter
+    placement = '/'.join(''.join(rank) for rank in grid)
+    for n in range(8, 1, -1):
+        placement = placement.replace('1' * n, str(n))
+    return f"{placement} {'wb'[stm]} - - 0 1"
+
+def probe_matches_board_test(tablebase: Tablebase, n_positions=300):
+    # every sampled value is the minimax of its children, with the moves generated by the board itself
+    table = tablebase.table('KRK')
+    rng = np.random.default_rng(0)
+    for index in rng.choice(np.flatnonzero(table != ILLEGAL), size=n_positions, replace=False):
+        stm, rest = divmod(int(index), 64 ** 3)
+        board = board_from_fen(krk_fen((rest >> 12, rest >> 6 & 63, rest & 63), stm), BitBoard, verbose=False)
+        player = board.get_player(board.turn)
+        children = []
+        for code in board.generate_legal_move_codes(player):
+            board.make_move_code(code)
+            children.append(tablebase.probe(board))
+            board.unmake_move()
+
+        wdl, dtm = tablebase.probe(board)
+        if not children:
+            assert wdl == (-1 if board.has_checked(board.get_opp_player(player)) else 0) and dtm == 0
+        elif any(child[0] < 0 for child in children):
+            assert (wdl, dtm) == (1, 1 + min(child[1] for child in children if child[0] < 0))
+        elif all(child[0] > 0 for child in children):
+            assert (wdl, dtm) == (-1, 1 + max(child[1] for child in children))
+        else:
+            assert (wdl, dtm) == (0, 0)
+
+def known_positions_test(tablebase: Tablebase):
+    board = board_from_fen('k7/8/1K6/8/8/8/8/7R w - - 0 1', BitBoard, verbose=False)
+    assert tablebase.probe(board) == (1, 1) # Rh8#
+    board = board_from_fen('k7/8/1K6/8/8/8/8/7R b - - 0 1', BitBoard, verbose=False)
+    assert tablebase.probe(board)[0] == -1
+    # the mirrored KRK table answers for a black rook: white takes it, is stalemated or is mated
+    assert tablebase.probe(board_from_fen('8/8/8/8/8/8/r7/K1k5 w - - 0 1', BitBoard, verbose=False)) == (0, 0)
+    assert tablebase.probe(board_from_fen('8/8/8/8/8/8/1r6/K1k5 w - - 0 1', BitBoard, verbose=False)) == (0, 0)
+    assert tablebase.probe(board_from_fen('8/8/8/8/8/r7/2k5/K7 w - - 0 1', BitBoard, verbose=False)) == (-1, 0)
+    # outside the tables, or with castling still possible
+    assert tablebase.probe(board_from_fen('8/8/8/4k3/8/8/4P3/4K3 w - - 0 1', BitBoard, verbose=False)) is None
+    assert tablebase.probe(board_from_fen('4k3/8/8/8/8/8/8/4K2R w K - 0 1', BitBoard, verbose=False)) is None
+
+    board = board_from_fen('8/8/8/8/8/8/r7/K1k5 w - - 0 1', BitBoard, verbose=False)
+    board.tablebase = tablebase
+    assert board.is_draw()
+
+def alphabeta_plays_shortest_mate_test(tablebase: Tablebase):
+    board = board_from_fen('8/8/8/3k4/8/8/8/R3K3 w - - 0 1', BitBoard, verbose=False)
+    wdl, dtm = tablebase.probe(board)
+    agent = AgentAlphaBeta('tb', max_depth=2, tablebase=tablebase)
+    agent.board, agent.player = board, board.player_white
+    while dtm:
+        board.make_move_code(agent.search())
+        # both sides play perfectly, the winner mating as fast and the loser holding out as long as possible
+        assert tablebase.probe(board) == (-wdl, dtm - 1)
+        wdl, dtm = -wdl, dtm - 1
+        agent.player = board.get_player(board.turn)
+    assert board.has_checkmated(board.player_white)
+
+
+if __name__ == "__main__":
+    # KRK only, the table takes a few seconds to generate
+    with tempfile.TemporaryDirectory() as path:
+        tablebase = generate_tablebases(path, ['KRK'])
+        probe_matches_board_test(tablebase)
+        known_positions_test(tablebase)
+        alphabeta_plays_shortest_mate_test(tablebase)
+    print("tablebase ok")
@@ -0,0 +1,36 @@
+from chess.game.tournament import Tournament, Entrant, SPRT, elo_estimate, schedule
+from chess.game.agent_random import AgentRandom
+from collections import Counter
+
+def elo_test():
+    elo, low, high = elo_estimate(75, 0, 25)
+    assert round(elo) == 191 and low < elo < high
+    assert all(abs(a + b) < 1e-6 for a, b in zip(elo_estimate(25, 0, 75), (elo, high, low)))
+    assert elo_estimate(0, 0, 0) == (0.0, 0.0, 0.0)
+
+    sprt = SPRT(0, 50)
+    assert sprt.status(60, 20, 20) == 'H1' and sprt.status(0, 40, 0) == 'H0' and sprt.status(3, 2, 2) is None
+
+def schedule_test():
+    games = schedule(3, 4)
+    assert len(games) == 12
+    # every pair plays each color twice
+    assert Counter(games) == {pair: 2 for pair in [(0, 1), (1, 0), (0, 2), (2, 0), (1, 2), (2, 1)]}
+    assert schedule(4, 2, 'gauntlet') == [(0, 1), (0, 2), (0, 3), (1, 0), (2, 0), (3, 0)]
+
+def sprt_stops_pair_test():
+    # random agents only draw in 10 plies, far from the 400 elo of H1
+    for n_workers in (1, 2):
+        entrants = [Entrant('a', AgentRandom), Entrant('b', AgentRandom)]
+        tournament = Tournament(entrants, games_per_pair=20, sprt=SPRT(0, 400, 0.2, 0.2), n_workers=n_workers, max_turns=10)
+        results = list(tournament.run())
+        pair = tournament.pairs[(0, 1)]
+        assert pair.decided == 'H0' and pair.games == len(results) < 20
+        assert [row['score'] for row in tournament.standings()] == [0.5, 0.5]
+
+
+if __name__ == "__main__":
+    elo_test()
+    schedule_test()
+    sprt_stops_pair_test()
+    print("tournament ok")
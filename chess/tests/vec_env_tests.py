@@ -0,0 +1,53 @@
+from chess.environment.bitboard import BitBoard
+from chess.environment.color import Color
+from chess.environment.encoding import N_PLANES, N_ACTIONS, action_index
+from chess.environment.vec_env import VecEnv
+import numpy as np
+
+# 1. f3 e5 2. g4 Qh4#
+FOOLS_MATE = [action_index((5, 1), (5, 2)), action_index((4, 6), (4, 4)), action_index((6, 1), (6, 3)), action_index((3, 7), (7, 3))]
+
+def step_shapes_test(n_envs=4, n_steps=30):
+    env = VecEnv(n_envs, BitBoard, max_plies=10)
+    obs, masks = env.reset()
+    assert obs.shape == (n_envs, N_PLANES, 8, 8) and masks.shape == (n_envs, N_ACTIONS)
+    assert (masks.sum(axis=1) == 20).all()
+
+    rng = np.random.default_rng(0)
+    n_done = 0
+    for _ in range(n_steps):
+        actions = [rng.choice(np.flatnonzero(mask)) for mask in masks]
+        obs, masks, rewards, dones, infos = env.step(actions)
+        assert set(infos) == set(np.flatnonzero(dones))
+        for board in env.boards:
+            assert board.ply < 10
+        n_done += len(infos)
+    assert n_done >= 2 * n_envs, "games truncated at 10 plies are reset and played again"
+
+    try:
+        env.step([0] * n_envs)
+        assert False, "an illegal action raises"
+    except ValueError:
+        pass
+
+def checkmate_reset_test():
+    env = VecEnv(2, BitBoard)
+    start, _ = env.reset()
+    start = start.copy()
+    # the second board moves the g knights out and back
+    knights = [action_index((6, 0), (5, 2)), action_index((6, 7), (5, 5)), action_index((5, 2), (6, 0)), action_index((5, 5), (6, 7))]
+    for action, other in zip(FOOLS_MATE, knights):
+        obs, masks, rewards, dones, infos = env.step([action, other])
+
+    assert list(dones) == [True, False] and list(rewards) == [1.0, 0.0]
+    assert infos == {0: {'result': 'checkmate', 'winner': Color.BLACK, 'plies': 4}}
+    # the finished board is already back at the start, the other has the start pieces four plies later
+    assert np.array_equal(obs[0], start[0]) and np.array_equal(obs[1, :12], start[1, :12])
+    assert env.boards[1].ply == 4
+    assert masks[0].sum() == 20 and not env.boards[0].undo_stack
+
+
+if __name__ == "__main__":
+    step_shapes_test()
+    checkmate_reset_test()
+    print("vec env ok")